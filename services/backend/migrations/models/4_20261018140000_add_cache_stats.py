@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "detection_history" ADD "cache_hits" INT NOT NULL  DEFAULT 0;
+        ALTER TABLE "detection_history" ADD "cache_misses" INT NOT NULL  DEFAULT 0;
+        COMMENT ON COLUMN "detection_history"."cache_hits" IS 'files served from result cache';
+        COMMENT ON COLUMN "detection_history"."cache_misses" IS 'files that required a model inference';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "detection_history" DROP COLUMN "cache_hits";
+        ALTER TABLE "detection_history" DROP COLUMN "cache_misses";"""
@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "detection_history" ADD "encode_time" DOUBLE PRECISION NOT NULL  DEFAULT 0;
+        ALTER TABLE "detection_history" ADD "output_bytes" BIGINT NOT NULL  DEFAULT 0;
+        COMMENT ON COLUMN "detection_history"."encode_time" IS 'seconds spent encoding output video';
+        COMMENT ON COLUMN "detection_history"."output_bytes" IS 'total output size in bytes';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "detection_history" DROP COLUMN "encode_time";
+        ALTER TABLE "detection_history" DROP COLUMN "output_bytes";"""
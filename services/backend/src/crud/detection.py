@@ -31,6 +31,10 @@ async def create_detection_record(
         processing_time=detection_data.processing_time,
         file_names=detection_data.file_names,
         output_files=detection_data.output_files,
+        cache_hits=detection_data.cache_hits,
+        cache_misses=detection_data.cache_misses,
+        encode_time=detection_data.encode_time,
+        output_bytes=detection_data.output_bytes,
     )
 
     return detection_record
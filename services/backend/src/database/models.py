@@ -46,6 +46,14 @@ class DetectionHistory(models.Model):
         description="list of processed file names"
     )  # 用JSON存储文件名列表，是因为文件名数量不固定，JsonField可以存储任意JSON数据
     output_files = fields.JSONField(description="list of output file names")
+    cache_hits = fields.IntField(default=0, description="files served from result cache")
+    cache_misses = fields.IntField(
+        default=0, description="files that required a model inference"
+    )
+    encode_time = fields.FloatField(
+        default=0, description="seconds spent encoding output video"
+    )
+    output_bytes = fields.BigIntField(default=0, description="total output size in bytes")
     created_at = fields.DatetimeField(auto_now_add=True)
 
     class Meta:
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from tortoise import Tortoise
@@ -39,3 +40,16 @@ register_tortoise(app, config=TORTOISE_ORM, generate_schemas=False)
 @app.get("/")
 def home():
     return "Hello,World!"
+
+
+# 存活检查：进程已启动即返回200，不依赖模型
+@app.get("/health")
+def health():
+    return {"status": "up"}
+
+
+# 就绪检查：模型加载并预热完成后返回200，否则返回503，同时上报冷启动各阶段耗时
+@app.get("/ready")
+def ready():
+    state = yolo.readiness.to_dict()
+    return JSONResponse(status_code=200 if yolo.readiness.ready else 503, content=state)
@@ -1,11 +1,47 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query
+from fastapi import Request, WebSocket, WebSocketDisconnect
+from starlette.requests import ClientDisconnect  # 上传途中客户端断开
+from starlette.background import BackgroundTask  # 流式响应结束后取消视频处理
+from fastapi.security.utils import get_authorization_scheme_param  # 解析WebSocket握手中的Cookie
+from fastapi.concurrency import run_in_threadpool  # 在线程池中执行同步的绘制和编码
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import List, Literal, Optional
 import os  # 用于路径操作
+import json  # 组装multipart响应中的JSON部分
+import uuid  # multipart响应的分隔符
 import shutil  # 用于文件操作
 import time  # 用于计时
-from src.yolo.detector import Detector  # 导入YOLO检测类
+import asyncio  # 并发处理多张图片
+import threading  # 边上传边检测的取消信号
+from src.yolo.detector import (  # 导入YOLO检测类
+    DetectionCancelled,
+    Detector,
+    VideoDetection,
+)
+from src.yolo.scheduler import BatchScheduler  # 微批调度器
+from src.yolo.executor import InferenceExecutor, QueueFullError  # 有界推理线程池
+from src.yolo.jobs import JobStatus, VideoJob, VideoJobManager  # 异步视频任务
+from src.yolo.image_io import decode_image, encode_image  # 内存中的图像编解码
+from src.yolo.video_pipeline import FrameStream  # 视频帧流式输出通道
+from src.yolo.ingest import StreamingUpload  # 边上传边检测的输入管道
+from src.yolo.live import LatestFrame, LiveStats  # 实时检测的帧调度和统计
+from src.yolo.readiness import DetectorReadiness  # 模型就绪状态
+from src.yolo.storage import RequestStorage, StorageJanitor  # 按请求隔离的文件存储
+from src.yolo.quantize import load_reports  # INT8量化变体的评估报告
+from src.yolo.detections import (  # 检测结果的紧凑表示
+    boxes_array,
+    detections_from_result,
+    format_detections,
+)
+from src.yolo.tracker import ByteTracker  # 统计实时检测会话中的独立目标数量
+from src.yolo.cache import (  # 检测结果缓存
+    CacheEntry,
+    DetectionCache,
+    DiskCacheTier,
+    MemoryCacheTier,
+)
 from src.auth.jwthandler import get_current_user  # JWT验证用户函数
-from src.schemas.detection import DetectionHistoryCreate, UserStatsOut
+from src.schemas.detection import DetectionHistoryCreate, UserStatsOut, VideoJobOut
 from src.database.models import DetectionType
 from src.crud.detection import create_detection_record, get_user_stats  # CRUD操作函数
 
@@ -15,102 +51,556 @@ router = APIRouter(
 
 # 初始化YOLO目标检测器
 model_path = "src/yolo/models/yolo11n.pt"
-detector = Detector(model_path)  # 创建全局检测器实例，所有请求共享同一个检测器
+# 创建全局检测器实例，所有请求共享同一个检测器
+# lazy=True：导入本模块时不加载模型，也不导入torch，模型在应用启动阶段后台加载
+detector = Detector(model_path, lazy=True)
+readiness = DetectorReadiness()
+# 推理线程池：阻塞的推理在这里执行，事件循环保持响应；队列满时拒绝新任务
+executor = InferenceExecutor(
+    max_workers=detector.config.inference_workers,
+    max_queue_size=detector.config.inference_queue_size,
+)
+# 视频推理线程池：整段视频的检测耗时很长，与图片推理分开排队，
+# 长视频占满的只是视频线程池，图片和实时检测的批次始终有自己的工作线程
+video_executor = InferenceExecutor(
+    max_workers=detector.config.video_inference_workers,
+    max_queue_size=detector.config.video_inference_queue_size,
+    name="yolo-video",
+)
+# 并发图片请求经调度器合并为批量推理，合并后的批次交给推理线程池执行
+scheduler = BatchScheduler(detector, executor=executor)
+# 上传和输出文件按请求写入独立子目录，清理线程按TTL和容量配额删除旧目录
+upload_images = RequestStorage(detector.config.upload_image_dir)
+upload_videos = RequestStorage(detector.config.upload_video_dir)
+output_images = RequestStorage(detector.config.output_image_dir)
+output_videos = RequestStorage(detector.config.output_video_dir)
+storage_janitor = StorageJanitor(
+    [upload_images, upload_videos, output_images, output_videos],
+    ttl_seconds=detector.config.storage_ttl_seconds,
+    max_bytes=detector.config.storage_max_bytes,
+    interval_seconds=detector.config.storage_sweep_interval_seconds,
+    grace_seconds=detector.config.storage_grace_seconds,
+)
+
+
+async def record_video_job(job: VideoJob):
+    """
+    视频任务完成后写入检测历史
+    Args:
+        job (VideoJob): 已完成处理的视频任务
+    """
+    detection_record = DetectionHistoryCreate(
+        user_id=job.user_id,
+        detection_type=DetectionType.VIDEO,
+        model_used=job.model_used,
+        file_count=1,
+        conf_threshold=job.conf_threshold,
+        detected_objects_count=job.unique_objects,  # 跟踪得到的独立目标数量
+        processing_time=job.processing_time,
+        encode_time=job.encode_seconds,
+        output_bytes=job.output_bytes,
+        file_names=[job.file_name],
+        output_files=(
+            [output_videos.relative(job.output_video_path)]
+            if job.output_video_path
+            else []
+        ),
+    )
+    await create_detection_record(job.user_id, detection_record)
+
+
+# 视频任务管理器：任务在视频推理线程池中后台执行，完成后写入检测历史；
+# 任务结束前其上传和输出目录被固定，清理线程不会删除
+video_jobs = VideoJobManager(
+    detector,
+    video_executor,
+    on_complete=record_video_job,
+    storages=[upload_videos, output_videos],
+)
+
+
+def video_job_out(job: VideoJob) -> VideoJobOut:
+    """把任务对象转换为响应模式"""
+    return VideoJobOut(
+        job_id=job.id,
+        status=job.status.value,
+        file_name=job.file_name,
+        model_used=job.model_used,
+        conf_threshold=job.conf_threshold,
+        render=job.render,
+        progress=job.progress(),
+        inferred_frames=job.inferred_frames,
+        reused_frames=job.reused_frames,
+        unique_objects=job.unique_objects,
+        processing_time=round(job.processing_time, 2),
+        output_video=(
+            output_videos.relative(job.output_video_path)
+            if job.status == JobStatus.COMPLETED and job.output_video_path
+            else None
+        ),
+        error=job.error,
+    )
+
+
+def build_cache_tiers(config) -> list:
+    """根据检测器配置创建缓存层：内存层在前，磁盘层(可选)在后"""
+    if not config.cache_enabled:
+        return []
+    tiers = [
+        MemoryCacheTier(config.cache_memory_max_entries, config.cache_memory_max_bytes)
+    ]
+    if config.cache_disk_dir:
+        tiers.append(DiskCacheTier(config.cache_disk_dir, config.cache_disk_max_bytes))
+    return tiers
+
+
+@router.on_event("startup")
+async def load_detector():
+    """
+    应用启动时在后台线程中加载默认模型并预热，
+    不等待加载完成，注册/登录等不需要模型的接口可以立即提供服务
+    """
+    readiness.start(detector)
+    storage_janitor.start()
+
+
+@router.on_event("shutdown")
+async def stop_inference():
+    """
+    应用关闭时停止调度线程、推理线程池和存储清理线程
+    """
+    scheduler.stop()
+    executor.shutdown(wait=False)
+    video_executor.shutdown(wait=False)
+    storage_janitor.stop()
+
+
+def require_detector_ready():
+    """
+    依赖项：模型尚未就绪时返回503，避免推理请求在加载期间长时间挂起
+    """
+    if not readiness.ready:
+        detail = "Model is not ready"
+        if readiness.error:
+            detail = f"Model failed to load: {readiness.error}"
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(detector.config.retry_after_seconds)},
+        )
+
+
+# 检测结果缓存：相同内容+模型+参数的图片直接复用结果，并发的相同请求只推理一次
+image_cache = DetectionCache(build_cache_tiers(detector.config))
+
+
+# 标注图片的编码格式：扩展名和响应的Content-Type
+IMAGE_FORMATS = {"jpeg": (".jpg", "image/jpeg"), "webp": (".webp", "image/webp")}
+
+
+def build_cache_entry(
+    result, render: bool = True, ext: str = ".jpg", quality: Optional[int] = None
+) -> CacheEntry:
+    """
+    把单张图片的检测结果转换为缓存记录
+    render=True时需要绘制和编码图片(同步函数，应在线程池中调用)；
+    render=False时只转换检测框，不绘制也不编码
+    """
+    return CacheEntry(
+        detections=detections_from_result(result),
+        image=detector.encode_picture_result(result, ext, quality) if render else b"",
+    )
+
+
+async def detect_picture_cached(
+    data: bytes,
+    file_name: str,
+    conf_threshold: float,
+    model_path: str,
+    render: bool = True,
+    ext: str = ".jpg",
+    quality: Optional[int] = None,
+    tiled: bool = False,
+    imgsz: Optional[int] = None,
+) -> tuple:
+    """
+    检测单张图片，优先使用缓存
+    Args:
+        data (bytes): 上传文件的原始字节
+        file_name (str): 文件名(用于错误信息)
+        conf_threshold (float): 置信度阈值
+        model_path (str): 使用的模型路径
+        render (bool): 是否需要标注后的图片
+        ext (str): 标注图片的编码格式(".jpg"或".webp")
+        quality (int): 编码质量，默认使用配置中的值
+        tiled (bool): 是否使用切片推理
+        imgsz (int): 推理尺寸，默认使用配置中的值
+    Returns:
+        tuple: (缓存记录, 是否命中缓存)
+    """
+    quality = quality or detector.config.output_image_quality
+    # 默认编码(JPEG+配置质量)不写入键，其他编码的图片分别缓存
+    encoding = None
+    if (ext, quality) != (".jpg", detector.config.output_image_quality):
+        encoding = f"{ext}:{quality}"
+    imgsz = imgsz or detector.config.default_imgsz
+    key_imgsz = imgsz
+    if tiled:  # 切片推理的结果还取决于图块参数
+        config = detector.config
+        key_imgsz = (
+            f"{imgsz}:tiles:{config.tile_size}:{config.tile_overlap}"
+            f":{config.tile_full_image}"
+        )
+    key = image_cache.make_key(
+        data, os.path.basename(model_path), conf_threshold, key_imgsz, render, encoding
+    )
+
+    async def compute() -> CacheEntry:
+        try:
+            image = decode_image(data)
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail=f"无法识别的图像文件: {file_name}"
+            )
+        if tiled:
+            # 图块之间已经整批推理，整张图作为一个任务提交到推理线程池
+            result = await executor.run(
+                detector.detect_tiled, image, conf_threshold, model_path, imgsz
+            )
+        else:
+            # 经微批调度器与其他并发请求合并推理
+            result = (
+                await scheduler.detect([image], conf_threshold, model_path, imgsz)
+            )[0]
+        if not render:
+            return build_cache_entry(result, render=False)
+        return await run_in_threadpool(build_cache_entry, result, True, ext, quality)
+
+    return await image_cache.get_or_compute(key, compute)
+
+
+def multipart_response(summary: dict, images: List[tuple], media_type: str) -> Response:
+    """
+    把检测摘要和标注图片组装为multipart/mixed响应
+    第一部分是JSON摘要，之后每张图片一个部分，顺序与上传顺序一致
+    Args:
+        summary (dict): JSON摘要
+        images (List[tuple]): (文件名, 图片字节)列表
+        media_type (str): 图片的Content-Type
+    Returns:
+        Response: multipart/mixed响应
+    """
+    boundary = uuid.uuid4().hex
+    parts = [
+        (
+            "Content-Type: application/json; charset=utf-8",
+            json.dumps(summary, ensure_ascii=False).encode(),
+        )
+    ]
+    for name, data in images:
+        parts.append(
+            (
+                f"Content-Type: {media_type}\r\n"
+                f'Content-Disposition: inline; filename="{name}"',
+                data,
+            )
+        )
+    body = b"".join(
+        f"--{boundary}\r\n{headers}\r\n\r\n".encode() + data + b"\r\n"
+        for headers, data in parts
+    )
+    body += f"--{boundary}--\r\n".encode()
+    return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}")
+
+
+def format_frames(frames: List[dict], int_coords: bool) -> List[dict]:
+    """按请求的坐标格式输出视频每帧的检测框"""
+    return [
+        {
+            "frame": frame["frame"],
+            "detections": format_detections(frame["detections"], int_coords),
+        }
+        for frame in frames
+    ]
+
+
+async def video_detection_response(
+    detection: VideoDetection,
+    user_id: int,
+    model_path: str,
+    conf_threshold: float,
+    file_name: str,
+    processing_time: float,
+    coords: str,
+) -> dict:
+    """
+    视频检测完成后写入检测历史并组装响应
+    Args:
+        detection (VideoDetection): 检测结果
+        user_id (int): 当前用户ID
+        model_path (str): 使用的模型路径
+        conf_threshold (float): 置信度阈值
+        file_name (str): 原始文件名
+        processing_time (float): 处理耗时(秒)
+        coords (str): 检测框坐标格式，"float"或"int"
+    Returns:
+        dict: 响应内容，render=False时包含每帧的检测框
+    """
+    output_files = []
+    if detection.output_video_path:
+        output_files = [output_videos.relative(detection.output_video_path)]
+
+    # 记录检测历史，目标数量为跟踪得到的独立目标数(同一目标跨帧只计一次)
+    detection_record = DetectionHistoryCreate(
+        user_id=user_id,
+        detection_type=DetectionType.VIDEO,
+        model_used=os.path.basename(model_path),
+        file_count=1,
+        conf_threshold=conf_threshold,
+        detected_objects_count=detection.unique_objects,
+        processing_time=processing_time,
+        encode_time=detection.encode_seconds,
+        output_bytes=detection.output_bytes,
+        file_names=[file_name],
+        output_files=output_files,
+    )
+
+    await create_detection_record(
+        user_id, detection_record
+    )  # 通过crud操作创建检测记录，通过ORM插入数据库
+
+    response = {
+        "message": "Detection completed successfully",
+        "output_video": output_files[0] if output_files else None,  # 返回处理后的视频文件名
+        "processing_time": round(processing_time, 2),
+        "detected_objects": detection.unique_objects,  # 独立目标数量
+        "frames_processed": detection.frame_count,
+        "inferred_frames": detection.inferred_frames,  # 实际运行检测的帧数
+        "reused_frames": detection.reused_frames,  # 画面静止、复用检测结果的帧数
+        "skipped_frames": detection.skipped_frames,  # 由跟踪器传递检测框的帧数
+        "encode_time": round(detection.encode_seconds, 2),  # 输出视频编码耗时(秒)
+        "output_bytes": detection.output_bytes,  # 输出视频大小(字节)
+    }
+    if detection.frames is not None:
+        response["frames"] = format_frames(detection.frames, coords == "int")
+    return response
+
+
+def save_upload_video(file: UploadFile) -> str:
+    """
+    把上传的视频保存到本次请求独立的上传目录
+    同步复制大文件，应在线程池中调用，避免阻塞事件循环
+    Args:
+        file (UploadFile): 上传的视频文件
+    Returns:
+        str: 保存后的视频文件路径
+    """
+    _, directory = upload_videos.allocate()
+    file_path = os.path.join(directory, os.path.basename(file.filename))
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)  # 将上传的文件内容写入本地文件
+    return file_path
+
+
+def queue_full_exception(e: QueueFullError) -> HTTPException:
+    """
+    推理队列已满时返回503，并通过Retry-After告诉客户端多久后重试
+    """
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(detector.config.retry_after_seconds)},
+    )
 
 
 # 1.图片检测端点
-@router.post("/detect_picture")
+@router.post("/detect_picture", dependencies=[Depends(require_detector_ready)])
 async def detect_picture(
     files: List[UploadFile] = File(
         ...
     ),  # 接收多个上传文件,使用Fastapi的UploadFile(异步文件上传）作为输入类型
     conf_threshold: float = Form(0.25),  # 置信度阈值，默认0.25
+    model: Optional[str] = Form(None),  # 使用的模型文件名，默认使用当前默认模型
+    render: bool = Form(True),  # 是否绘制并保存标注图片，为False时只返回检测框
+    coords: Literal["float", "int"] = Form("float"),  # 检测框坐标格式
+    response_format: Literal["json", "image", "multipart"] = Form("json"),  # 响应格式
+    image_format: Literal["jpeg", "webp"] = Form("jpeg"),  # 标注图片的编码格式
+    quality: Optional[int] = Form(None, ge=1, le=100),  # 编码质量，默认使用配置中的值
+    tiled: bool = Form(False),  # 是否对大图使用切片推理
+    imgsz: Optional[int] = Form(None, ge=32, le=1920),  # 推理尺寸，默认使用配置中的值
     current_user=Depends(get_current_user),  # 获取当前用户
 ):
     """
     图像目标检测-支持多个图片上传
-    先把图片保存到本地，然后调用YOLO检测器进行检测,并记录到用户统计中
+    上传内容直接在内存中解码并送入YOLO检测器，结果图片在内存中编码，
+    相同内容和参数的图片命中缓存时直接复用结果，原图和结果是否落盘由配置决定，
+    最后记录到用户统计中
     Args:
         files (List[UploadFile]): 上传的图像文件列表
         conf_threshold (float): 置信度阈值，默认0.25
+        model (str): models目录中的模型文件名，不传则使用默认模型
+        render (bool): 为False时跳过绘制、编码和结果落盘，按图片返回检测框
+        coords (str): 检测框坐标格式，"float"或"int"(整数像素)
+        response_format (str): "json"返回结果文件名；"image"直接返回单张标注图片；
+            "multipart"返回multipart/mixed(JSON摘要+每张标注图片)，内联返回时结果不落盘
+        image_format (str): 标注图片的编码格式，"jpeg"或"webp"
+        quality (int): 标注图片的编码质量(1-100)
+        tiled (bool): 为True时把大图切成重叠图块以原始分辨率推理，再跨图块合并检测框，
+            适合4K以上图像中的小目标
+        imgsz (int): 推理尺寸(长边，32-1920)，默认使用配置中的值；
+            同一批中纵横比不同的图片会分桶以矩形尺寸推理
         current_user:当前登录用户
     Returns:
     """
 
     start_time = time.time()  # 记录开始时间
     try:
-        save_dir = "src/yolo/uploads/images"
-        os.makedirs(save_dir, exist_ok=True)  # 创建保存上传文件的目录
+        inline = response_format != "json"
+        if inline and not render:
+            raise HTTPException(
+                status_code=400, detail="render=false时没有标注图片可以返回"
+            )
+        if response_format == "image" and len(files) != 1:
+            raise HTTPException(
+                status_code=400, detail="response_format=image只支持单张图片"
+            )
+        ext, media_type = IMAGE_FORMATS[image_format]
+        model_path = detector.resolve_model(model)  # 模型不存在时返回404
 
-        file_paths = []
-        file_names = []
+        file_names = [file.filename for file in files]  # 记录处理的文件
+        # 每个请求的上传和结果在独立目录中，并发请求的同名文件不会互相覆盖
+        upload_id = None
+        if detector.config.persist_uploads:  # 可选：保留原始文件
+            upload_id, _ = upload_images.allocate()
+        # 按配置决定是否把结果图片落盘，内联返回的图片不需要再经静态文件获取
+        output_id = None
+        if render and not inline and detector.config.persist_outputs:
+            output_id, _ = output_images.allocate()
 
-        for i, file in enumerate(files):
-            # 保存原始文件
-            file_path = os.path.join(
-                save_dir, file.filename
-            )  # 构建文件保存路径,获取文件完整路径
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)  # 将上传的文件内容写入本地文件
-            file_paths.append(file_path)  # 保存文件路径到列表
-            file_names.append(file.filename)  # 保存文件名到列表,记录处理的文件数量
+        # 同一请求中同时处理的图片数量有上限：每张图片读取、推理、编码、落盘后
+        # 只保留检测框(内联返回时还有编码后的图片)，原图字节和数组随即释放，
+        # 峰值内存不随上传数量增长
+        in_flight = asyncio.Semaphore(detector.config.picture_max_in_flight)
 
-        # 进行目标检测
-        detector.detect_picture(file_paths, conf_threshold)
+        async def process(index: int, file: UploadFile) -> tuple:
+            async with in_flight:
+                # 上传内容在内存中解码，推理不依赖磁盘上的文件
+                data = await file.read()
+                await file.close()
+                if upload_id:
+                    await run_in_threadpool(
+                        upload_images.write, upload_id, file.filename, data
+                    )
+                # 先查缓存，未命中的图片经微批调度器与其他请求合并推理
+                entry, hit = await detect_picture_cached(
+                    data,
+                    file.filename,
+                    conf_threshold,
+                    model_path,
+                    render,
+                    ext,
+                    quality,
+                    tiled,
+                    imgsz,
+                )
+                output_file = None
+                if output_id:
+                    output_file = await run_in_threadpool(
+                        output_images.write,
+                        output_id,
+                        f"detected_{index}{ext}",
+                        entry.image,
+                    )
+                image = entry.image if inline else None
+                return entry.detections, image, output_file, hit
+
+        outcomes = await asyncio.gather(
+            *(process(i, file) for i, file in enumerate(files))
+        )
+        detections = [outcome[0] for outcome in outcomes]
+        images = [outcome[1] for outcome in outcomes]
+        output_files = [outcome[2] for outcome in outcomes if outcome[2]]
+        cache_hits = sum(1 for outcome in outcomes if outcome[3])
+        cache_misses = len(outcomes) - cache_hits
 
         # 计算处理时间
         processing_time = time.time() - start_time
 
-        # 返回正确的处理后的图片文件名（与detector.py中保存的格式匹配)
-        output_images = [
-            f"detected_{i}.jpg" for i in range(len(files))
-        ]  # 这里的名字要与检测函数里detect_picture保存的名字对应，是detected_{i}就不能写成image_{i}
-
-        # 统计检测到的目标数量（这里需要从检测结果中获取实际数量)
-        detected_objects_count = 0
-        if (
-            hasattr(detector, "results") and detector.results
-        ):  # 检查目标检测器detector对象是否有results属性，并且results不为空
-            for result in (
-                detector.results
-            ):  # 遍历所有检测结果（每个result代表了一张图片的检测结果）
-                if result.boxes is not None:
-                    detected_objects_count += len(
-                        result.boxes
-                    )  # 若当前检测结果result对象的boxes属性不为空，将当前目标检测的目标数量（一张图片的所有目标框）加到总计数中
+        # 统计检测到的目标数量
+        detected_objects_count = sum(len(items) for items in detections)
 
         # 记录检测历史
         detection_record = DetectionHistoryCreate(
             user_id=current_user.id,
             detection_type=DetectionType.IMAGE,
-            model_used=os.path.basename(detector.model_path),
+            model_used=os.path.basename(model_path),
             file_count=len(files),
             conf_threshold=conf_threshold,
             detected_objects_count=detected_objects_count,
             processing_time=processing_time,
             file_names=file_names,
-            output_files=output_images,
+            output_files=output_files,
+            cache_hits=cache_hits,
+            cache_misses=cache_misses,
         )
 
         # 创建检测记录
         await create_detection_record(current_user.id, detection_record)
 
-        return {
+        response = {
             "message": "Detection completed successfully",
-            "output_images": output_images,  # 返回处理后的图片文件名列表
+            "output_images": output_files,  # 返回处理后的图片文件名列表
             "processing_time": round(processing_time, 2),  # 返回处理时间的秒数
             "detected_objects": detected_objects_count,  # 返回检测到的目标数量
+            "cache": {"hits": cache_hits, "misses": cache_misses},  # 缓存命中情况
         }
+        if not render or response_format == "multipart":
+            # 只要检测框的调用方：按上传顺序返回每张图片的检测结果
+            response["detections"] = [
+                {
+                    "file_name": name,
+                    "detections": format_detections(items, coords == "int"),
+                }
+                for name, items in zip(file_names, detections)
+            ]
+        if response_format == "image":
+            # 单张图片直接作为响应体返回，摘要信息放在响应头中
+            return Response(
+                content=images[0],
+                media_type=media_type,
+                headers={
+                    "X-Detected-Objects": str(detected_objects_count),
+                    "X-Processing-Time": f"{processing_time:.3f}",
+                    "X-Cache": "hit" if cache_hits else "miss",
+                },
+            )
+        if response_format == "multipart":
+            parts = [(f"detected_{i}{ext}", image) for i, image in enumerate(images)]
+            return multipart_response(response, parts, media_type)
+        return response
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    except QueueFullError as e:
+        raise queue_full_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
         # 捕获所有异常并返回HTTP 500错误，包含异常信息
 
 
 # 2.视频检测端点
-@router.post("/detect_video")
+@router.post("/detect_video", dependencies=[Depends(require_detector_ready)])
 async def detect_video(
     file: UploadFile = File(...),  # 接收单个上传文件
     conf_threshold: float = Form(0.25),  # 置信度阈值，默认0.25
+    model: Optional[str] = Form(None),  # 使用的模型文件名，默认使用当前默认模型
+    render: bool = Form(True),  # 是否输出标注视频，为False时只返回每帧的检测框
+    coords: Literal["float", "int"] = Form("float"),  # 检测框坐标格式
+    stride: Optional[int] = Form(None, ge=1, le=30),  # 初始检测间隔，默认使用配置中的值
+    max_stride: Optional[int] = Form(None, ge=1, le=30),  # 检测间隔上限
+    motion_threshold: Optional[float] = Form(None, ge=0, le=1),  # 运动门控阈值
+    segments: Optional[int] = Form(None, ge=1, le=64),  # 分段并行处理的片段数
     current_user=Depends(get_current_user),  # 获取当前用户
 ):
     """
@@ -119,73 +609,601 @@ async def detect_video(
     Args:
         file (UploadFile): 上传的视频文件
         conf_threshold (float): 置信度阈值，默认0.25
+        model (str): models目录中的模型文件名，不传则使用默认模型
+        render (bool): 为False时不绘制也不编码视频，按帧返回检测框
+        coords (str): 检测框坐标格式，"float"或"int"(整数像素)
+        stride (int): 每stride帧运行一次模型，中间帧由跟踪器传递检测框
+        max_stride (int): 检测间隔上限，大于stride时按跟踪结果的一致程度自适应调整
+        motion_threshold (float): 画面平均变化(0-1)低于该值时复用上次检测结果，
+            适合固定机位的视频，0表示不启用，默认使用配置中的值
+        segments (int): 长视频按帧序号切分的片段数，各段由独立的工作进程并行处理，
+            默认使用配置中的值
         current_user:当前登录用户
     Returns:
     """
     start_time = time.time()
 
     try:
-        save_dir = "src/yolo/uploads/videos"
-        os.makedirs(save_dir, exist_ok=True)  # 创建保存上传文件的目录
+        model_path = detector.resolve_model(model)  # 模型不存在时返回404
 
-        # 保存原始文件
-        file_path = os.path.join(
-            save_dir, file.filename
-        )  # 构建文件保存路径,获取文件完整路径
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)  # 将上传的文件内容写入本地文件
+        # 保存原始文件：每个请求独立的上传目录，同名视频不会互相覆盖
+        file_path = await run_in_threadpool(save_upload_video, file)
 
-        # 进行目标检测
-        output_video_path = detector.detect_video(file_path, conf_threshold)
+        # 输出视频同样写入本次请求独立的目录
+        output_dir = output_videos.allocate()[1] if render else None
 
-        # 计算处理时间
-        processing_time = time.time() - start_time
+        # 进行目标检测：在视频推理线程池中执行，避免长时间阻塞事件循环；
+        # 处理期间固定上传和输出目录，清理线程不会删除正在读写的文件
+        with upload_videos.pinned(file_path), output_videos.pinned(output_dir):
+            detection = await video_executor.run(
+                detector.detect_video,
+                file_path,
+                conf_threshold,
+                output_dir=output_dir,
+                model=model,
+                render=render,
+                stride=stride,
+                max_stride=max_stride,
+                motion_threshold=motion_threshold,
+                segments=segments,
+            )
+        return await video_detection_response(
+            detection,
+            current_user.id,
+            model_path,
+            conf_threshold,
+            file.filename,
+            time.time() - start_time,
+            coords,
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    except QueueFullError as e:
+        raise queue_full_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+        # 捕获所有异常并返回HTTP 500错误，包含异常信息
+
+
+# 边上传边检测端点：请求体直接是视频内容，数据一边到达一边解码推理
+@router.post("/detect_video/ingest", dependencies=[Depends(require_detector_ready)])
+async def ingest_video(
+    request: Request,
+    file_name: str = Query("video.mp4"),  # 原始文件名，用于命名输出视频和检测历史
+    conf_threshold: float = Query(0.25),  # 置信度阈值，默认0.25
+    model: Optional[str] = Query(None),  # 使用的模型文件名，默认使用当前默认模型
+    render: bool = Query(True),  # 是否输出标注视频，为False时只返回每帧的检测框
+    coords: Literal["float", "int"] = Query("float"),  # 检测框坐标格式
+    stride: Optional[int] = Query(None, ge=1, le=30),  # 初始检测间隔，默认使用配置中的值
+    max_stride: Optional[int] = Query(None, ge=1, le=30),  # 检测间隔上限
+    motion_threshold: Optional[float] = Query(None, ge=0, le=1),  # 运动门控阈值
+    save_upload: bool = Query(True),  # 是否同时把上传内容写入磁盘
+    current_user=Depends(get_current_user),  # 获取当前用户
+):
+    """
+    视频目标检测(边上传边检测)
+    请求体是视频文件本身(不是multipart表单)，参数通过查询字符串传递；
+    上传的数据经管道直接送入解码器，推理在第一批帧到达后就开始，
+    大文件在慢速链路上的总耗时接近处理时间，而不是上传时间加处理时间。
+    管道不能回退读取，视频需要是可流式读取的格式(faststart/分片MP4、MKV/WebM、MPEG-TS)；
+    其他格式(如moov在文件末尾的MP4)在save_upload=True时等上传完成后改为从磁盘副本检测，
+    否则返回415
+    Args:
+        request (Request): 请求，请求体为视频内容
+        file_name (str): 原始文件名
+        conf_threshold (float): 置信度阈值，默认0.25
+        model (str): models目录中的模型文件名，不传则使用默认模型
+        render (bool): 为False时不绘制也不编码视频，按帧返回检测框
+        coords (str): 检测框坐标格式，"float"或"int"(整数像素)
+        stride (int): 每stride帧运行一次模型，中间帧由跟踪器传递检测框
+        max_stride (int): 检测间隔上限，大于stride时按跟踪结果的一致程度自适应调整
+        motion_threshold (float): 画面平均变化(0-1)低于该值时复用上次检测结果
+        save_upload (bool): 是否把上传内容同时写入上传目录(写穿)
+        current_user:当前登录用户
+    Returns:
+        dict: 与/detect_video相同，另有streamed表示是否在上传过程中完成检测
+    """
+    start_time = time.time()
+    file_name = os.path.basename(file_name) or "video.mp4"
+    try:
+        model_path = detector.resolve_model(model)  # 模型不存在时返回404
+        copy_path = None
+        if save_upload:
+            copy_path = os.path.join(upload_videos.allocate()[1], file_name)
+        output_dir = output_videos.allocate()[1] if render else None
+        upload = StreamingUpload(copy_path)
+        cancel_event = threading.Event()
+        options = dict(
+            output_dir=output_dir,
+            model=model,
+            render=render,
+            stride=stride,
+            max_stride=max_stride,
+            motion_threshold=motion_threshold,
+            source_name=file_name,
+        )
+
+        def run():
+            try:
+                # 管道只能顺序读取，不能按帧定位分段，边上传边检测时不分段
+                return detector.detect_video(
+                    upload.source,
+                    conf_threshold,
+                    cancel_event=cancel_event,
+                    segments=1,
+                    **options,
+                )
+            finally:
+                upload.reader_done()
+
+        # 处理结束前固定上传和输出目录，清理线程不会删除正在读写的文件
+        upload_videos.pin(copy_path)
+        output_videos.pin(output_dir)
+        try:
+            future = video_executor.submit(run)  # 队列已满时抛出QueueFullError
+        except QueueFullError:
+            upload.cleanup()
+            upload_videos.unpin(copy_path)
+            output_videos.unpin(output_dir)
+            raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    except QueueFullError as e:
+        raise queue_full_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        try:
+            # 写入管道在线程池中进行，管道满时等待解码，上传随之减速
+            async for chunk in request.stream():
+                if chunk and not await run_in_threadpool(upload.write, chunk):
+                    break  # 检测已结束且不需要保留副本，剩余数据不再读取
+        except ClientDisconnect:
+            cancel_event.set()  # 上传中断，检测线程读到管道结尾后停止
+        finally:
+            await run_in_threadpool(upload.finish)
+        try:
+            detection = await asyncio.wrap_future(future)
+        except ValueError:
+            detection = None  # 管道中的数据无法打开为视频
+        finally:
+            upload.cleanup()
+
+        streamed = detection is not None and detection.frame_count > 0
+        if not streamed:
+            if detection is not None and detection.output_video_path:
+                os.remove(detection.output_video_path)  # 没有任何帧的空输出
+            if copy_path is None or not upload.bytes_received:
+                raise HTTPException(
+                    status_code=415,
+                    detail="视频无法边上传边解码，请使用faststart/分片MP4、MKV/WebM、"
+                    "MPEG-TS，或设置save_upload=true",
+                )
+            # 回退：上传已经完整写入磁盘，按普通视频文件检测
+            print(f"视频无法边上传边解码，改为从文件检测: {copy_path}")
+            detection = await video_executor.run(
+                detector.detect_video, copy_path, conf_threshold, **options
+            )
 
-        # 记录检测历史（视频检测的目标数量较难统计，暂时设为0或者可以从检测器中获取）
+        response = await video_detection_response(
+            detection,
+            current_user.id,
+            model_path,
+            conf_threshold,
+            file_name,
+            time.time() - start_time,
+            coords,
+        )
+        response["streamed"] = streamed
+        return response
+    except HTTPException:
+        raise
+    except DetectionCancelled:
+        raise HTTPException(status_code=499, detail="Upload was interrupted")
+    except QueueFullError as e:
+        raise queue_full_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload_videos.unpin(copy_path)
+        output_videos.unpin(output_dir)
+
+
+# 视频流式检测端点：边处理边以MJPEG推送标注后的帧
+@router.post("/detect_video/stream", dependencies=[Depends(require_detector_ready)])
+async def stream_video(
+    file: UploadFile = File(...),  # 接收单个上传文件
+    conf_threshold: float = Form(0.25),  # 置信度阈值，默认0.25
+    model: Optional[str] = Form(None),  # 使用的模型文件名，默认使用当前默认模型
+    quality: Optional[int] = Form(None, ge=1, le=100),  # 每帧JPEG的编码质量
+    stride: Optional[int] = Form(None, ge=1, le=30),  # 初始检测间隔，默认使用配置中的值
+    max_stride: Optional[int] = Form(None, ge=1, le=30),  # 检测间隔上限
+    motion_threshold: Optional[float] = Form(None, ge=0, le=1),  # 运动门控阈值
+    current_user=Depends(get_current_user),  # 获取当前用户
+):
+    """
+    视频目标检测(流式输出)
+    以multipart/x-mixed-replace(MJPEG)逐帧返回标注后的画面，第一批帧推理完成即开始推送，
+    不生成输出视频文件；客户端断开连接时停止处理
+    Args:
+        file (UploadFile): 上传的视频文件
+        conf_threshold (float): 置信度阈值，默认0.25
+        model (str): models目录中的模型文件名，不传则使用默认模型
+        quality (int): 每帧JPEG的编码质量(1-100)，默认使用配置中的值
+        stride (int): 每stride帧运行一次模型，中间帧由跟踪器传递检测框
+        max_stride (int): 检测间隔上限，大于stride时按跟踪结果的一致程度自适应调整
+        motion_threshold (float): 画面平均变化(0-1)低于该值时复用上次检测结果，
+            适合固定机位的视频，0表示不启用，默认使用配置中的值
+        current_user:当前登录用户
+    Returns:
+        StreamingResponse: MJPEG流，可直接用于<img>标签
+    """
+    start_time = time.time()
+    try:
+        model_path = detector.resolve_model(model)  # 模型不存在时返回404
+        file_path = await run_in_threadpool(save_upload_video, file)
+        quality = quality or detector.config.output_image_quality
+        # 推送跟不上时编码线程阻塞，流水线随之减速，不会无限缓存帧
+        stream = FrameStream(
+            detector.config.video_queue_size, detector.config.video_stream_stall_timeout
+        )
+
+        def on_frame(frame):
+            # 在编码线程中把标注后的帧编码为JPEG
+            stream.put(encode_image(frame, ".jpg", quality))
+
+        def run():
+            error = None
+            try:
+                return detector.detect_video(
+                    file_path,
+                    conf_threshold,
+                    cancel_event=stream.cancel_event,
+                    model=model,
+                    save_video=False,
+                    frame_callback=on_frame,
+                    stride=stride,
+                    max_stride=max_stride,
+                    motion_threshold=motion_threshold,
+                )
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                upload_videos.unpin(file_path)
+                stream.close(error)
+
+        # 处理结束前固定上传目录，清理线程不会删除正在读取的视频
+        upload_videos.pin(file_path)
+        try:
+            future = video_executor.submit(run)  # 队列已满时抛出QueueFullError，此时响应尚未开始
+        except QueueFullError:
+            upload_videos.unpin(file_path)
+            raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    except QueueFullError as e:
+        raise queue_full_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        try:
+            async for jpeg in stream:
+                yield (
+                    b"--frame\r\nContent-Type: image/jpeg\r\n"
+                    + f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg
+                    + b"\r\n"
+                )
+        except Exception as e:
+            # 响应已经开始，无法再返回错误状态码，只能结束流
+            print(f"视频流式检测失败: {e}")
+            return
+        finally:
+            stream.cancel()  # 客户端断开或出错时通知工作线程停止
+
+        # 流结束时工作线程已返回(close在detect_video返回之后调用)
+        detection = await asyncio.wrap_future(future)
         detection_record = DetectionHistoryCreate(
             user_id=current_user.id,
             detection_type=DetectionType.VIDEO,
-            model_used=os.path.basename(detector.model_path),
+            model_used=os.path.basename(model_path),
             file_count=1,
             conf_threshold=conf_threshold,
-            detected_objects_count=0,  # 视频检测的目标统计比较复杂，暂时设为0
-            processing_time=processing_time,
+            detected_objects_count=detection.unique_objects,
+            processing_time=time.time() - start_time,
             file_names=[file.filename],
-            output_files=[os.path.basename(output_video_path)],
+            output_files=[],  # 流式输出不生成结果文件
         )
+        await create_detection_record(current_user.id, detection_record)
 
-        await create_detection_record(
-            current_user.id, detection_record
-        )  # 通过crud操作创建检测记录，通过ORM插入数据库
+    # 客户端在响应开始前断开时body不会执行，其中的finally也不会运行，
+    # 由后台任务在响应结束后再取消一次
+    return StreamingResponse(
+        body(),
+        media_type="multipart/x-mixed-replace; boundary=frame",
+        background=BackgroundTask(stream.cancel),
+    )
 
-        return {
-            "message": "Detection completed successfully",
-            "output_video": os.path.basename(
-                output_video_path
-            ),  # 返回处理后的视频文件名
-            "processing_time": round(processing_time, 2),
-            "detected_objects": 0,  # 暂且设为0
-        }
+
+# 实时检测端点(WebSocket)：客户端持续推送编码后的帧，服务端逐帧返回检测结果
+async def authenticate_websocket(websocket: WebSocket):
+    """
+    WebSocket握手请求同样携带Cookie，按HTTP接口的方式从Authorization Cookie中验证用户
+
+    Raises:
+        HTTPException: 未登录或令牌无效(401)
+    """
+    scheme, token = get_authorization_scheme_param(
+        websocket.cookies.get("Authorization")
+    )
+    if not token or scheme.lower() != "bearer":
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return await get_current_user(token)
+
+
+@router.websocket("/ws/detect")
+async def live_detect(
+    websocket: WebSocket,
+    conf_threshold: float = 0.25,  # 置信度阈值，默认0.25
+    model: Optional[str] = None,  # 使用的模型文件名，默认使用当前默认模型
+    render: bool = False,  # 是否同时返回标注后的帧
+    coords: Literal["float", "int"] = "float",  # 检测框坐标格式
+    quality: Optional[int] = Query(None, ge=1, le=100),  # 标注帧的JPEG编码质量
+    imgsz: Optional[int] = Query(None, ge=32, le=1920),  # 推理尺寸，较小的尺寸延迟更低
+):
+    """
+    实时目标检测(WebSocket)
+    客户端以二进制消息推送编码后的帧(JPEG/PNG等)，服务端对每个处理的帧回复一条JSON消息:
+    {"frame": 帧序号, "detections": [...], "inference_ms": ..., "latency_ms": ..., "stats": {...}}，
+    render=True时紧接着再发送一条二进制消息(标注后的JPEG)。
+    推理跟不上推帧速度时只处理最新的一帧，被跳过的帧计入stats.dropped；
+    stats中包含该连接最近若干帧的处理帧率和平均端到端延迟(从收到帧到发出结果)
+    Args:
+        websocket (WebSocket): WebSocket连接
+        conf_threshold (float): 置信度阈值，默认0.25
+        model (str): models目录中的模型文件名，不传则使用默认模型
+        render (bool): 是否返回标注后的帧，默认只返回检测框
+        coords (str): 检测框坐标格式，"float"或"int"(整数像素)
+        quality (int): 标注帧的JPEG编码质量(1-100)，默认使用配置中的值
+        imgsz (int): 推理尺寸(长边，32-1920)，默认使用配置中的值
+    """
+    await websocket.accept()
+    try:
+        current_user = await authenticate_websocket(websocket)
+        if not readiness.ready:
+            await websocket.close(code=1013, reason="Model is not ready")
+            return
+        model_path = detector.resolve_model(model)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+    except FileNotFoundError:
+        await websocket.close(code=1008, reason="Model file not found")
+        return
+
+    start_time = time.time()
+    frames = LatestFrame()  # 单槽位缓冲：推理期间到达的新帧覆盖旧帧
+    stats = LiveStats(detector.config.live_stats_window)
+    # 与视频检测一致，检测历史中的目标数量为跟踪得到的独立目标数(同一目标跨帧只计一次)
+    config = detector.config
+    tracker = ByteTracker(
+        conf_threshold,
+        config.track_iou_threshold,
+        config.track_max_age,
+        config.track_min_hits,
+    )
+
+    async def receive():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    frames.put(message["bytes"])
+        finally:
+            frames.close()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while (frame := await frames.get()) is not None:
+            seq, data, received_at = frame
+            try:
+                image = await run_in_threadpool(decode_image, data)
+                inference_start = time.perf_counter()
+                # 与其他接口共用微批调度器和推理线程池
+                result = (
+                    await scheduler.detect([image], conf_threshold, model_path, imgsz)
+                )[0]
+            except ValueError:
+                await websocket.send_json({"frame": seq, "error": "无法识别的图像数据"})
+                continue
+            except QueueFullError:
+                # 服务繁忙时丢弃这一帧，客户端继续推帧即可
+                frames.dropped += 1
+                await websocket.send_json({"frame": seq, "error": "Inference queue is full"})
+                continue
+            inference_ms = (time.perf_counter() - inference_start) * 1000
+            tracker.predict()
+            tracker.update(boxes_array(result))
+            annotated = None
+            if render:
+                annotated = await run_in_threadpool(
+                    detector.encode_picture_result, result, ".jpg", quality
+                )
+            latency_ms = (time.perf_counter() - received_at) * 1000
+            stats.record(latency_ms)
+            await websocket.send_json(
+                {
+                    "frame": seq,
+                    "detections": format_detections(
+                        detections_from_result(result), coords == "int"
+                    ),
+                    "inference_ms": round(inference_ms, 2),
+                    "latency_ms": round(latency_ms, 2),
+                    "stats": stats.to_dict(frames.dropped),
+                }
+            )
+            if annotated is not None:
+                await websocket.send_bytes(annotated)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # 发送结果时客户端已断开
+    except Exception as e:
+        print(f"实时检测失败: {e}")
+        await websocket.close(code=1011, reason=str(e))
+    finally:
+        receiver.cancel()
+        print(f"实时检测连接结束: {stats.to_dict(frames.dropped)}")
+
+    if stats.processed:
+        detection_record = DetectionHistoryCreate(
+            user_id=current_user.id,
+            detection_type=DetectionType.VIDEO,
+            model_used=os.path.basename(model_path),
+            file_count=1,
+            conf_threshold=conf_threshold,
+            detected_objects_count=tracker.unique_objects,  # 会话中的独立目标数量
+            processing_time=time.time() - start_time,
+            file_names=["websocket"],
+            output_files=[],  # 实时检测不生成结果文件
+        )
+        await create_detection_record(current_user.id, detection_record)
+
+
+# 3.异步视频任务端点
+@router.post("/video_jobs", response_model=VideoJobOut, status_code=202, dependencies=[Depends(require_detector_ready)])
+async def submit_video_job(
+    file: UploadFile = File(...),  # 接收单个上传文件
+    conf_threshold: float = Form(0.25),  # 置信度阈值，默认0.25
+    model: Optional[str] = Form(None),  # 使用的模型文件名，默认使用当前默认模型
+    render: bool = Form(True),  # 是否输出标注视频，为False时只保留每帧的检测框
+    stride: Optional[int] = Form(None, ge=1, le=30),  # 初始检测间隔，默认使用配置中的值
+    max_stride: Optional[int] = Form(None, ge=1, le=30),  # 检测间隔上限
+    motion_threshold: Optional[float] = Form(None, ge=0, le=1),  # 运动门控阈值
+    segments: Optional[int] = Form(None, ge=1, le=64),  # 分段并行处理的片段数
+    current_user=Depends(get_current_user),  # 获取当前用户
+):
+    """
+    提交视频检测任务，立即返回任务ID，之后通过GET /video_jobs/{job_id}轮询进度
+    Args:
+        file (UploadFile): 上传的视频文件
+        conf_threshold (float): 置信度阈值，默认0.25
+        model (str): models目录中的模型文件名，不传则使用默认模型
+        render (bool): 为False时不输出视频，结果接口返回每帧的检测框
+        stride (int): 每stride帧运行一次模型，中间帧由跟踪器传递检测框
+        max_stride (int): 检测间隔上限，大于stride时按跟踪结果的一致程度自适应调整
+        motion_threshold (float): 画面平均变化(0-1)低于该值时复用上次检测结果，
+            适合固定机位的视频，0表示不启用，默认使用配置中的值
+        segments (int): 长视频按帧序号切分的片段数，各段由独立的工作进程并行处理，
+            默认使用配置中的值
+        current_user:当前登录用户
+    Returns:
+        VideoJobOut: 新建任务的状态
+    """
+    try:
+        detector.resolve_model(model)  # 提交前检查模型是否存在
+
+        # 每个任务独立的上传和输出目录，同名视频的任务不会互相覆盖输入和输出文件
+        file_path = await run_in_threadpool(save_upload_video, file)
+        output_dir = output_videos.allocate()[1] if render else None
+
+        job = await video_jobs.submit(
+            current_user.id,
+            file_path,
+            file.filename,
+            conf_threshold,
+            model,
+            render,
+            output_dir,
+            stride,
+            max_stride,
+            motion_threshold,
+            segments,
+        )
+        return video_job_out(job)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    except QueueFullError as e:
+        # 任务未被接收：删除本次请求分配的上传目录和输出目录
+        shutil.rmtree(os.path.dirname(file_path), ignore_errors=True)
+        if output_dir is not None:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        raise queue_full_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-        # 捕获所有异常并返回HTTP 500错误，包含异常信息
 
 
-# 3.切换模型端点
-@router.post("/change_model")
+@router.get("/video_jobs/{job_id}", response_model=VideoJobOut)
+async def get_video_job(job_id: str, current_user=Depends(get_current_user)):
+    """
+    查询视频任务的状态、进度(已处理帧数/总帧数、fps、预计剩余时间)和结果
+    """
+    job = video_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return video_job_out(job)
+
+
+@router.get("/video_jobs/{job_id}/result")
+async def get_video_job_result(
+    job_id: str,
+    coords: Literal["float", "int"] = "float",  # render=False任务的检测框坐标格式
+    current_user=Depends(get_current_user),
+):
+    """
+    下载已完成任务的检测结果视频；render=False的任务返回每帧的检测框(JSON)
+    """
+    job = video_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(
+            status_code=409, detail=f"Job is {job.status.value}, result not ready"
+        )
+    if job.frames is not None:
+        return {"job_id": job.id, "frames": format_frames(job.frames, coords == "int")}
+    if not job.output_video_path or not os.path.exists(job.output_video_path):
+        # 任务结束后输出目录不再固定，超过保留时间或容量配额时会被清理
+        raise HTTPException(status_code=410, detail="Result file has expired")
+    return FileResponse(
+        job.output_video_path, filename=os.path.basename(job.output_video_path)
+    )
+
+
+@router.delete("/video_jobs/{job_id}", response_model=VideoJobOut)
+async def cancel_video_job(job_id: str, current_user=Depends(get_current_user)):
+    """
+    取消排队中或处理中的视频任务
+    """
+    job = video_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not video_jobs.cancel(job):
+        raise HTTPException(
+            status_code=409, detail=f"Job is already {job.status.value}"
+        )
+    return video_job_out(job)
+
+
+# 4.切换模型端点
+@router.post("/change_model", status_code=202)
 async def change_model(
     model_path: str = Form(...),  # 接收新模型的路径
 ):
     """
     切换当前使用的YOLO模型
+    新模型在后台加载，就绪后原子替换默认模型，切换过程中的请求不受影响
     Args:
         model_path (str): 新模型的文件路径
     Returns:
-        JSONResponse: 包含切换结果的JSON响应
+        JSONResponse: 包含切换句柄的JSON响应，可通过GET /change_model/{swap_id}查询状态
     """
     try:
-        detector.change_model(model_path)
-        return {"message": f"Model changed successfully to {model_path}"}
+        swap = detector.change_model(model_path)
+        return {"message": f"Model change to {model_path} started", **swap.to_dict()}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model file not found")
     except Exception as e:
@@ -193,7 +1211,18 @@ async def change_model(
         # 捕获所有异常并返回HTTP 500错误，包含异常信息
 
 
-# 4.获取所有模型路由
+@router.get("/change_model/{swap_id}")
+async def get_model_change_status(swap_id: str):
+    """
+    查询模型切换状态：loading / ready / failed / superseded
+    """
+    swap = detector.swaps.get(swap_id)
+    if swap is None:
+        raise HTTPException(status_code=404, detail="Model change not found")
+    return {**swap.to_dict(), "current_model": os.path.basename(detector.model_path)}
+
+
+# 5.获取所有模型路由
 @router.get("/available_models")
 async def get_available_models():
     """
@@ -206,20 +1235,44 @@ async def get_available_models():
         if not os.path.exists(models_dir):
             os.makedirs(models_dir)
 
-        # 获取所有模型文件夹里面的.pt文件
-        models = [f for f in os.listdir(models_dir) if f.endswith(".pt")]
+        # 获取所有模型文件夹里面的.pt文件和.onnx文件(包括INT8量化变体)
+        models = [f for f in os.listdir(models_dir) if f.endswith((".pt", ".onnx"))]
 
         # 获取当前正在使用的模型名称
         current_model = os.path.basename(detector.model_path)
 
-        # 返回模型列表和当前模型的JSON响应
-        return {"models": models, "current_model": current_model}
+        # 返回模型列表、当前模型以及已加载到内存中的模型
+        return {
+            "models": models,
+            "current_model": current_model,
+            "backend": detector.config.inference_backend,
+            "loaded_models": detector.registry.loaded(),
+            "quantized_models": load_reports(models_dir),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
         # 捕获所有异常并返回HTTP 500错误，包含异常信息
 
 
-# 5.获取用户统计信息路由
+# 6.推理队列状态路由
+@router.get("/queue")
+async def get_queue_status():
+    """
+    获取推理队列深度，便于监控和客户端判断是否需要稍后重试
+    Returns:
+        dict: 图片/视频推理线程池与微批调度器的排队情况
+    """
+    return {
+        "executor": executor.stats(),
+        "video_executor": video_executor.stats(),
+        "scheduler": {
+            "pending": scheduler.pending,
+            "capacity": scheduler.max_queue_size,
+        },
+    }
+
+
+# 7.获取用户统计信息路由
 @router.get("/user_stats", response_model=UserStatsOut)
 async def get_user_detection_stats(current_user=Depends(get_current_user)):
     """
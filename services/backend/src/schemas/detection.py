@@ -18,6 +18,10 @@ class DetectionHistoryBase(BaseModel):
     processing_time: Optional[float] = None
     file_names: List[str] = []
     output_files: List[str] = []
+    cache_hits: int = 0
+    cache_misses: int = 0
+    encode_time: float = 0.0
+    output_bytes: int = 0
 
 
 class DetectionHistoryCreate(DetectionHistoryBase):
@@ -51,3 +55,32 @@ class UserStatsOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class VideoJobProgress(BaseModel):
+    """视频任务进度"""
+
+    frames_processed: int = 0
+    total_frames: int = 0
+    percent: Optional[float] = None
+    fps: float = 0.0
+    eta_seconds: Optional[float] = None
+
+
+class VideoJobOut(BaseModel):
+    """视频任务状态输出模式"""
+
+    # 用于查询异步视频任务的响应格式，output_video在任务完成后才有值
+    job_id: str
+    status: str
+    file_name: str
+    model_used: str
+    conf_threshold: float
+    render: bool = True  # 为False时没有输出视频，结果接口返回每帧的检测框
+    progress: VideoJobProgress
+    inferred_frames: int = 0  # 实际运行检测的帧数，其余帧由跟踪器传递检测框
+    reused_frames: int = 0  # 画面静止、复用上次检测结果的帧数
+    unique_objects: int = 0  # 跟踪得到的独立目标数量
+    processing_time: float = 0.0
+    output_video: Optional[str] = None
+    error: Optional[str] = None
@@ -0,0 +1,45 @@
+# 纵横比分桶：一批尺寸不同的图片按纵横比分组，每组使用矩形推理尺寸
+# ultralytics对尺寸不一致的一批图片统一填充为imgsz x imgsz的正方形，
+# 横竖图混合上传时大量计算浪费在填充区域；分桶后每组只填充到该组的矩形尺寸
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+STRIDE = 32  # YOLO检测模型的最大下采样倍数，推理尺寸需是它的整数倍
+
+
+def inference_shapes(shapes: Sequence[Tuple[int, int]], imgsz: int, step: int) -> np.ndarray:
+    """
+    计算每张图片的矩形推理尺寸：长边缩放到imgsz，短边按step向上取整
+
+    Args:
+        shapes (Sequence[Tuple[int, int]]): 每张图片的(高, 宽)
+        imgsz (int): 推理尺寸(长边)
+        step (int): 短边取整的步长，需为STRIDE的整数倍；步长越大分桶越少、填充越多
+    Returns:
+        np.ndarray: (N, 2)，每张图片的(高, 宽)推理尺寸
+    """
+    long_side = math.ceil(imgsz / STRIDE) * STRIDE  # 与ultralytics对imgsz的取整一致
+    shapes = np.asarray(shapes, dtype=np.float64).reshape(-1, 2)
+    scaled = shapes * (imgsz / shapes.max(axis=1, keepdims=True))
+    return np.minimum(np.ceil(scaled / step) * step, long_side).astype(int)
+
+
+def aspect_buckets(
+    shapes: Sequence[Tuple[int, int]], imgsz: int, step: int
+) -> Dict[Tuple[int, int], List[int]]:
+    """
+    按矩形推理尺寸把图片分组
+
+    Args:
+        shapes (Sequence[Tuple[int, int]]): 每张图片的(高, 宽)
+        imgsz (int): 推理尺寸(长边)
+        step (int): 短边取整的步长
+    Returns:
+        dict: 推理尺寸(高, 宽) -> 属于该组的图片下标(保持原顺序)
+    """
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    for index, (h, w) in enumerate(inference_shapes(shapes, imgsz, step).tolist()):
+        buckets.setdefault((h, w), []).append(index)
+    return buckets
@@ -0,0 +1,243 @@
+# 检测结果缓存：以上传内容的哈希+模型+推理参数为键，缓存检测框和标注后的图片
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class CacheEntry:
+    """一条缓存记录：检测框列表 + 编码后的标注图片(只要检测框的请求为空字节串)"""
+
+    detections: List[dict]
+    image: bytes
+
+    @property
+    def size(self) -> int:
+        """估算占用的字节数，用于按容量淘汰"""
+        return len(self.image) + 64 * len(self.detections)
+
+
+class MemoryCacheTier:
+    """内存缓存层：按最近最少使用(LRU)淘汰，同时限制条目数和总字节数"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_entries (int): 最多缓存的条目数
+            max_bytes (int): 缓存占用的总字节数上限
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)  # 标记为最近使用
+            return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return  # 单条超过总容量，不缓存
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            # 从最久未使用的一端开始淘汰
+            while (
+                len(self._entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+
+class DiskCacheTier:
+    """
+    磁盘缓存层：每条记录保存为<key>.json(检测框)和<key>.img(标注图片)
+    按文件修改时间近似LRU，超过总字节数时删除最久未使用的记录
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            directory (str): 缓存目录
+            max_bytes (int): 缓存占用的总字节数上限
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".img"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        meta_path, image_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                detections = json.load(f)
+            with open(image_path, "rb") as f:
+                image = f.read()
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(meta_path)  # 更新修改时间，作为最近使用的标记
+        except OSError:
+            pass  # 读取后记录被并发淘汰：数据已经读到，照常返回
+        return CacheEntry(detections=detections, image=image)
+
+    def put(self, key: str, entry: CacheEntry):
+        meta_path, image_path = self._paths(key)
+        with self._lock:
+            # 先写临时文件再重命名，避免并发读取到写了一半的文件
+            for path, data, mode in (
+                (image_path, entry.image, "wb"),
+                (meta_path, json.dumps(entry.detections), "w"),
+            ):
+                tmp_path = path + ".tmp"
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self):
+        """按修改时间从旧到新删除记录，直到总大小不超过上限"""
+        records = {}
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            if ext not in (".json", ".img"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            size, mtime = records.get(key, (0, 0.0))
+            # json文件每次命中都会更新时间，用两者中较新的时间作为最近使用时间
+            records[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+        total = sum(size for size, _ in records.values())
+        for key, (size, _) in sorted(records.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+
+
+class DetectionCache:
+    """
+    多层检测结果缓存
+    1.按顺序查询各层(通常内存在前、磁盘在后)，低层命中后回填到高层
+    2.get_or_compute实现单飞(single-flight)：相同键的并发请求只计算一次，其余等待结果
+    """
+
+    def __init__(self, tiers: Optional[list] = None):
+        """
+        Args:
+            tiers (list): 缓存层列表，为空时缓存关闭(仍保留单飞去重)
+        """
+        self.tiers = tiers or []
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(
+        data: bytes,
+        model_name: str,
+        conf_threshold: float,
+        imgsz,
+        render: bool = True,
+        encoding: Optional[str] = None,
+    ) -> str:
+        """
+        根据上传内容和推理参数生成缓存键
+
+        Args:
+            data (bytes): 上传文件的原始字节
+            model_name (str): 模型名称
+            conf_threshold (float): 置信度阈值
+            imgsz: 推理尺寸
+            render (bool): 是否包含标注图片(只含检测框的记录不能用于需要图片的请求)
+            encoding (str): 标注图片的编码格式和质量(如".webp:80")，None表示默认的JPEG编码
+        Returns:
+            str: 十六进制的SHA-256摘要
+        """
+        digest = hashlib.sha256(data)
+        digest.update(f"|{model_name}|{conf_threshold}|{imgsz}".encode())
+        if not render:
+            digest.update(b"|json")
+        elif encoding:
+            digest.update(f"|{encoding}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for upper in self.tiers[:i]:
+                    upper.put(key, entry)  # 回填到更快的缓存层
+                return entry
+        return None
+
+    def put(self, key: str, entry: CacheEntry):
+        for tier in self.tiers:
+            tier.put(key, entry)
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[CacheEntry]]
+    ) -> Tuple[CacheEntry, bool]:
+        """
+        查询缓存，未命中时执行compute并写入缓存
+
+        Args:
+            key (str): 缓存键
+            compute (Callable): 计算结果的协程函数
+        Returns:
+            tuple: (缓存记录, 是否命中)。等待其他请求正在进行的同一次计算也算命中
+        """
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            try:
+                return await asyncio.shield(inflight), True
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # 本请求自身被取消
+            # 进行计算的请求被取消(客户端断开)，它的登记已经移除；
+            # 等待中的请求不受影响，由其中第一个重新计算，其余继续等待它
+            inflight = self._inflight.get(key)
+
+        # 先登记为进行中再查缓存，保证查询期间到达的相同请求也会等待这一次
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = None
+            if self.tiers:
+                entry = await asyncio.to_thread(self.get, key)  # 磁盘层涉及文件IO
+            hit = entry is not None
+            if not hit:
+                entry = await compute()
+                if self.tiers:
+                    await asyncio.to_thread(self.put, key, entry)
+            future.set_result(entry)
+            return entry, hit
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 标记异常已读取，避免无人等待时产生警告
+            raise
+        finally:
+            del self._inflight[key]
@@ -0,0 +1,84 @@
+# 检测结果的紧凑表示：把ultralytics的Results转换为可序列化的检测框列表
+from typing import List, Optional
+
+import numpy as np
+
+
+def boxes_array(result) -> np.ndarray:
+    """
+    把单张图片(或单帧)的全部检测框一次性转换为NumPy数组
+
+    Args:
+        result: ultralytics的检测结果对象
+    Returns:
+        np.ndarray: (N, 6)，每行是[x1, y1, x2, y2, conf, cls]
+    """
+    if result.boxes is None or len(result.boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    # 一次性转到CPU/NumPy，避免逐框访问张量带来的多次同步
+    data = result.boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    data = np.asarray(data)
+    if data.shape[1] == 7:  # 跟踪结果：[x1, y1, x2, y2, track_id, conf, cls]
+        return data[:, [0, 1, 2, 3, 5, 6]]
+    return data[:, :6]
+
+
+def track_ids(result) -> Optional[np.ndarray]:
+    """
+    跟踪结果中每个检测框的轨迹ID，与boxes_array的行一一对应
+
+    Returns:
+        np.ndarray: (N,)整数数组，不是跟踪结果时返回None
+    """
+    if result.boxes is None:
+        return None
+    data = result.boxes.data
+    if data.shape[1] != 7:
+        return None
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    return np.asarray(data)[:, 4].astype(int)
+
+
+def detections_from_result(result) -> List[dict]:
+    """
+    把单张图片(或单帧)的检测结果转换为紧凑的字典列表
+
+    Args:
+        result: ultralytics的检测结果对象
+    Returns:
+        List[dict]: 每个检测框包含class_id、class_name、confidence和xyxy坐标，
+            跟踪结果还包含track_id
+    """
+    names = result.names
+    detections = [
+        {
+            "class_id": int(cls),
+            "class_name": names[int(cls)],
+            "confidence": round(float(conf), 4),
+            "xyxy": [round(float(v), 2) for v in (x1, y1, x2, y2)],
+        }
+        for x1, y1, x2, y2, conf, cls in boxes_array(result)
+    ]
+    ids = track_ids(result)
+    if ids is not None:
+        for detection, track_id in zip(detections, ids.tolist()):
+            detection["track_id"] = track_id
+    return detections
+
+
+def format_detections(detections: List[dict], int_coords: bool = False) -> List[dict]:
+    """
+    按请求的坐标格式输出检测框
+
+    Args:
+        detections (List[dict]): detections_from_result的结果
+        int_coords (bool): 为True时xyxy四舍五入为整数像素坐标
+    Returns:
+        List[dict]: 格式化后的检测框列表(不修改传入的列表)
+    """
+    if not int_coords:
+        return detections
+    return [{**d, "xyxy": [int(round(v)) for v in d["xyxy"]]} for d in detections]
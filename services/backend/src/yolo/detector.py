@@ -1,11 +1,33 @@
 import os
+import shutil  # 清理分段处理的临时目录
+import tempfile  # 分段处理的临时目录
+import multiprocessing  # 分段并行处理的工作进程
 import cv2  # opencv图像处理库
-import random  # 生成随机数（用于随机选择颜色）
-import torch  # PyTorch深度学习框架
-from typing import List, Optional  # 用于类型注解
-from ultralytics import YOLO  # Ultralytics YOLO模型 官方实现库
+import time  # 记录模型切换耗时
+import threading  # 视频流水线的停止信号、任务取消信号和后台模型切换
+import uuid  # 模型切换句柄的ID
+import numpy as np  # 生成预热用的合成图像
+from typing import Callable, Iterable, Iterator, List, Optional  # 用于类型注解
 from pathlib import Path
 from dataclasses import dataclass
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from src.yolo.video_pipeline import FrameDecoder, FrameEncoder  # 视频流水线的解码/编码阶段
+from src.yolo.video_writer import VideoEncodeOptions, VideoSink  # 输出视频的编码阶段
+from src.yolo.image_io import encode_image  # 内存中的图像编码
+from src.yolo.renderer import draw_detections, render_result  # 图片和视频共用的标注渲染器
+from src.yolo.detections import boxes_array, detections_from_result  # 检测结果的紧凑表示
+from src.yolo.tiling import merge_detections, offset_boxes, slice_tiles, tile_grid  # 大图切片推理
+from src.yolo.buckets import aspect_buckets  # 按纵横比分组推理
+from src.yolo.tracker import AdaptiveStride, ByteTracker  # 视频抽帧检测的目标跟踪
+from src.yolo.motion import MotionGate  # 静止画面跳过推理
+from src.yolo.segments import (  # 长视频分段并行处理
+    concat_videos,
+    init_worker,
+    run_segment,
+    segment_ranges,
+    worker_threads,
+)
+from src.yolo.registry import ModelRegistry, ModelSwap, SwapStatus  # 多模型注册表
 
 
 @dataclass  # 使用dataclass简化类的定义
@@ -29,6 +51,110 @@ class DetectorCOnfig:
         "src/yolo/output/videos"  # 视频输出目录：处理后的视频保存位置
     )
     models_dir: str = "src/yolo/models"  # 模型目录：存放YOLO模型文件的位置
+    upload_image_dir: str = "src/yolo/uploads/images"  # 上传图片的保存目录
+    upload_video_dir: str = "src/yolo/uploads/videos"  # 上传视频的保存目录
+    storage_ttl_seconds: int = 24 * 3600  # 上传和输出文件的保留时间(秒)，过期后由清理线程删除
+    storage_max_bytes: int = 2 * 1024 * 1024 * 1024  # 上传和输出文件的总容量配额(字节)
+    storage_sweep_interval_seconds: int = 300  # 清理线程的运行间隔(秒)
+    storage_grace_seconds: int = 300  # 最近仍有写入的请求目录不会被清理(秒)
+    batch_max_size: int = 8  # 微批调度：单次合并推理的最大图片数量
+    batch_max_wait_ms: float = 5.0  # 微批调度：收集并发请求的最长等待时间(毫秒)
+    batch_max_queue_size: int = 64  # 微批调度：等待调度的图片数量上限
+    inference_workers: int = 2  # 推理线程池的工作线程数量
+    inference_queue_size: int = 8  # 推理线程池允许排队的任务数量，满了返回503
+    video_inference_workers: int = 1  # 视频推理线程池的工作线程数量，与图片推理线程池相互独立
+    video_inference_queue_size: int = 4  # 视频推理线程池允许排队的视频数量，满了返回503
+    retry_after_seconds: int = 5  # 返回503时建议客户端的重试间隔(秒)
+    video_batch_size: int = 4  # 视频流水线：每次合并推理的帧数
+    video_queue_size: int = 16  # 视频流水线：解码/编码队列长度，限制缓存的帧数
+    live_stats_window: int = 30  # 实时检测：计算fps和平均延迟使用的最近帧数
+    picture_max_in_flight: int = 8  # 图片检测：单个请求同时读取/推理/编码的图片数量，限制大批量上传的峰值内存
+    persist_uploads: bool = True  # 是否把上传的原始图片保存到磁盘(推理本身只用内存中的数据)
+    persist_outputs: bool = True  # 是否把标注后的结果图片保存到磁盘
+    output_image_quality: int = 90  # 结果图片的JPEG/WebP编码质量(1-100)
+    cache_enabled: bool = True  # 是否启用检测结果缓存(相同图片+相同参数直接复用结果)
+    cache_memory_max_entries: int = 256  # 内存缓存最多保存的条目数
+    cache_memory_max_bytes: int = 64 * 1024 * 1024  # 内存缓存的容量上限(字节)
+    cache_disk_dir: Optional[str] = None  # 磁盘缓存目录，None表示不启用磁盘缓存层
+    cache_disk_max_bytes: int = 512 * 1024 * 1024  # 磁盘缓存的容量上限(字节)
+    model_memory_budget_mb: int = 1024  # 同时保持加载的模型总内存预算(MB)，超出时按LRU卸载
+    warmup_runs: int = 1  # 模型加载后用合成图像预热的次数，0表示不预热
+    inference_backend: str = "torch"  # 推理后端："torch"(ultralytics/PyTorch)或"onnx"(onnxruntime，仅CPU)
+    onnx_cache_dir: str = "src/yolo/models/onnx"  # .pt导出为ONNX后的缓存目录
+    onnx_intra_op_threads: int = 0  # onnxruntime算子内部并行线程数，0表示自动
+    onnx_inter_op_threads: int = 0  # onnxruntime算子之间并行线程数，0表示自动
+    quantization_max_map_drop: float = 0.01  # INT8量化变体允许的最大mAP50-95下降，超过则拒绝
+    quantization_min_speedup: float = 1.1  # INT8量化变体相对FP32的最低加速比，达不到则拒绝
+    tile_size: int = 640  # 切片推理：图块边长(像素)，图块以原始分辨率推理
+    tile_overlap: float = 0.2  # 切片推理：相邻图块的重叠比例，避免目标被图块边缘截断后漏检
+    tile_batch_size: int = 8  # 切片推理：每次合并推理的图块数量
+    tile_full_image: bool = True  # 切片推理：额外对整图推理一次，检测超过图块大小的目标
+    tile_merge_metric: str = "ios"  # 跨图块合并的重叠度量："ios"(交集/较小框面积)或"iou"
+    tile_merge_threshold: float = 0.5  # 跨图块合并的重叠阈值，超过则只保留置信度高的框
+    video_stride: int = 1  # 视频抽帧检测：每隔多少帧运行一次模型，中间帧由跟踪器传递检测框，1表示逐帧检测
+    video_max_stride: int = 1  # 检测间隔上限，大于video_stride时按跟踪一致程度在1到该值之间自适应调整
+    video_stride_low_disagreement: float = 0.15  # 轨迹与检测的不一致程度低于该值时检测间隔加1
+    video_stride_high_disagreement: float = 0.4  # 不一致程度高于该值时检测间隔减半
+    track_low_conf: float = 0.1  # 跟踪：低于请求阈值但高于该值的检测框只用于延续已有轨迹
+    track_iou_threshold: float = 0.3  # 跟踪：轨迹与检测框配对的最低IoU
+    track_max_age: int = 30  # 跟踪：轨迹连续多少帧没有匹配后删除
+    track_min_hits: int = 1  # 跟踪：轨迹至少匹配几次检测才计为一个独立目标
+    aspect_bucket_step: int = 128  # 纵横比分桶：推理尺寸短边的取整步长(32的倍数)，越小填充越少、分桶越多
+    video_motion_threshold: float = 0.0  # 运动门控：缩略图平均像素差(0-1)低于该值时复用上次检测结果，0表示不启用
+    video_motion_max_staleness: int = 30  # 运动门控：检测结果最多复用多少帧，超过后强制运行模型
+    video_motion_size: int = 64  # 运动门控：计算画面变化使用的灰度缩略图边长
+    video_segment_workers: int = 0  # 分段并行：长视频切分的片段数(每段一个工作进程)，0或1表示不分段
+    video_segment_min_frames: int = 250  # 分段并行：每段至少包含的帧数，较短的视频少分段或不分段
+    video_segment_threads: int = 0  # 分段并行：每个工作进程的torch线程数，0表示按CPU核心数平分
+    video_encoder: str = "auto"  # 输出视频编码后端："auto"(有ffmpeg时用ffmpeg)、"ffmpeg"或"opencv"
+    video_codec: str = ""  # 输出视频编码格式：h264/vp9/mp4v/mjpg，空表示ffmpeg用h264、OpenCV用mp4v
+    video_quality: int = 0  # 输出视频质量(1-100，映射为CRF/qscale)，0表示编码器默认值，仅ffmpeg生效
+    video_bitrate_kbps: int = 0  # 输出视频目标码率(kbps)，设置后优先于video_quality，仅ffmpeg生效
+    video_output_scale: float = 1.0  # 输出视频分辨率相对原视频的缩放比例
+    video_output_fps_divisor: int = 1  # 输出视频每N帧保留一帧，帧率降为原来的1/N
+    ffmpeg_path: str = ""  # ffmpeg可执行文件路径，空表示从PATH中查找
+    video_stream_stall_timeout: float = 30.0  # 流式输出：客户端超过该秒数不读取帧时视为已断开，停止检测
+
+
+class DetectionCancelled(Exception):
+    """检测任务被取消时抛出"""
+
+
+@dataclass
+class VideoDetection:
+    """一次视频检测的结果"""
+
+    output_video_path: Optional[str] = None  # 标注后的视频路径，render=False时为None
+    frame_count: int = 0  # 实际处理的帧数
+    frames: Optional[List[dict]] = None  # render=False时每帧的检测结果
+    inferred_frames: int = 0  # 实际运行模型的帧数(其余帧由跟踪器传递检测框)
+    unique_objects: int = 0  # 跟踪得到的独立目标数量
+    reused_frames: int = 0  # 按检测间隔应检测、但画面静止而复用上次检测结果的帧数
+    encode_seconds: float = 0.0  # 输出视频的编码耗时(秒，写入线程中)
+    output_bytes: int = 0  # 输出视频文件的大小(字节)
+
+    @property
+    def skipped_frames(self) -> int:
+        """按检测间隔跳过、由跟踪器传递检测框的帧数"""
+        return self.frame_count - self.inferred_frames - self.reused_frames
+
+
+def _boxes_result(frame: np.ndarray, boxes: np.ndarray, names: dict):
+    """
+    把检测框或跟踪结果包装为ultralytics的Results(与model.predict/model.track的输出格式相同)，
+    绘制和序列化代码可以不区分检测结果与跟踪结果
+
+    Args:
+        frame (np.ndarray): 当前帧
+        boxes (np.ndarray): 检测框(N, 6)[x1, y1, x2, y2, conf, cls]
+            或跟踪结果(N, 7)[x1, y1, x2, y2, track_id, conf, cls]
+        names (dict): 类别名称
+    """
+    from ultralytics.engine.results import Results
+    import torch
+
+    boxes = torch.from_numpy(boxes.astype(np.float32))
+    return Results(frame, path="", names=names, boxes=boxes)
 
 
 # 自定义一个Dector类，用于目标检测
@@ -46,6 +172,7 @@ class Detector:
         self,
         model_path: str = "src/yolo/models/yolo11n.pt",
         config: Optional[DetectorCOnfig] = None,
+        lazy: bool = False,
     ):
         """
         初始化检测器，加载YOLO模型。
@@ -54,12 +181,28 @@ class Detector:
         - model_path: YOLO模型的路径，默认为"src/yolo/models/yolo11n.pt"
                       n表示nano，最小最快的版本
           config:配置对象，如果为None则使用默认配置
+          lazy:为True时不在构造时加载模型(也不导入torch/ultralytics)，
+               由调用方在合适的时机(如应用启动阶段)调用load_model
         """
         self.config = config or DetectorCOnfig()  # 如果没有提供配置对象，创建默认配置
-        self.model_path = model_path  # 保存模型路径
-        self.device = self._get_device()  # 确定使用GPU还是CPU
-        self.load_model()  # 加载模型
-        self.results = []  # 存储检测结果
+        self.model_path = model_path  # 保存默认模型路径(请求未指定模型时使用)
+        self._device = None  # 第一次使用时才确定GPU还是CPU(需要导入torch)
+        # 模型注册表：多个模型可以同时保持加载，请求按需选择模型
+        self.registry = ModelRegistry(
+            self._load_yolo, self.config.model_memory_budget_mb * 1024 * 1024
+        )
+        self.swaps = {}  # 模型切换句柄，按ID查询后台切换的状态
+        self._swap_lock = threading.Lock()
+        self._swap_generation = 0  # 切换代数，只有最新一次切换的结果会生效
+        if not lazy:
+            self.load_model()  # 加载模型
+
+    @property
+    def device(self) -> str:
+        """推理设备，第一次访问时确定"""
+        if self._device is None:
+            self._device = self._get_device()  # 确定使用GPU还是CPU
+        return self._device
 
     def _get_device(self) -> str:
         """
@@ -68,30 +211,241 @@ class Detector:
         返回:
         - "cuda" 如果有可用的GPU，否则返回 "cpu"
         """
+        import torch  # PyTorch深度学习框架，导入较慢，推迟到第一次使用时
+
         return "cuda" if torch.cuda.is_available() else "cpu"
 
-    def load_model(self):
+    def _load_yolo(self, model_path: str):
         """
-        从类构造函数定义的模型路径中加载YOLO模型
-        Return:
-           设置self.model为YOLO模型
+        注册表使用的加载函数：从模型文件创建YOLO实例
         """
-        if not os.path.exists(self.model_path):  # 检查文件存在
-            raise FileNotFoundError(f"Model file not found at {self.model_path}")
+        if self.config.inference_backend == "onnx" or model_path.endswith(".onnx"):
+            return self._load_onnx(model_path)
+
+        # Ultralytics YOLO模型 官方实现库，导入时会连带导入torch，推迟到加载模型时
+        from ultralytics import YOLO
 
-        print(f"正在加载模型: {self.model_path}")
+        print(f"正在加载模型: {model_path}")
         # 使用YOLO类加载模型文件
-        self.model = YOLO(model=self.model_path)
+        model = YOLO(model=model_path)
         # 上一行代码做了很多工作：
         # 1.读取.pt文件（Pytorch模型文件）
         # 2.解析模型结构和权重
         # 3.初始化神经网络
         # 4.加载训练好的参数
         # 5.准备模型用于推理
-        self.model_name = Path(
-            self.model_path
-        ).stem  # 提取模型名称（不含扩展名） stem()是提取单个文件的名称
-        print(f"模型名称: {self.model_name}加载成功！")
+        print(f"模型名称: {Path(model_path).stem}加载成功！")
+        return model
+
+    def _load_onnx(self, model_path: str):
+        """
+        ONNX Runtime后端的加载函数：.pt先导出为ONNX(导出结果会缓存)，再创建推理会话
+        """
+        from src.yolo.onnx_backend import load_onnx_model
+
+        print(f"正在加载模型(ONNX Runtime): {model_path}")
+        model = load_onnx_model(
+            model_path,
+            self.config.onnx_cache_dir,
+            imgsz=self.config.default_imgsz,
+            intra_op_threads=self.config.onnx_intra_op_threads,
+            inter_op_threads=self.config.onnx_inter_op_threads,
+        )
+        print(f"模型名称: {Path(model_path).stem}加载成功！")
+        return model
+
+    def load_model(self):
+        """
+        从类构造函数定义的模型路径中加载YOLO模型
+        Return:
+           默认模型加载到注册表中
+        """
+        if not os.path.exists(self.model_path):  # 检查文件存在
+            raise FileNotFoundError(f"Model file not found at {self.model_path}")
+
+        with self.registry.lease(self.model_path):  # 预先加载默认模型
+            pass
+
+    def warmup(self, runs: Optional[int] = None) -> float:
+        """
+        用合成的全黑图像对默认模型做几次推理，
+        让权重搬运、算子初始化等一次性开销发生在启动阶段而不是第一个请求里
+
+        Args:
+            runs (int): 预热次数，默认使用配置中的warmup_runs
+        Returns:
+            float: 预热耗时(秒)
+        """
+        runs = self.config.warmup_runs if runs is None else runs
+        imgsz = self.config.default_imgsz
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        start = time.time()
+        for _ in range(runs):
+            self.predict_batch([dummy])
+        return time.time() - start
+
+    @property
+    def model_name(self) -> str:
+        """默认模型的名称（不含扩展名）"""
+        # 由model_path派生，切换模型时只需替换model_path这一个属性
+        return Path(self.model_path).stem  # stem()是提取单个文件的名称
+
+    @property
+    def model(self):
+        """当前默认模型的YOLO实例(未加载时会先加载)"""
+        with self.registry.lease(self.model_path) as entry:
+            return entry.model
+
+    def resolve_model(self, model: Optional[str] = None) -> str:
+        """
+        把请求中的模型文件名解析为模型路径
+
+        Args:
+            model (str): models_dir中的模型文件名(如'yolo11s.pt')，None表示默认模型
+        Returns:
+            str: 模型文件路径
+        Raises:
+            FileNotFoundError: 模型文件不存在
+        """
+        if not model:
+            return self.model_path
+        # 只取文件名部分，防止通过路径访问models_dir以外的文件
+        full_path = os.path.join(self.config.models_dir, os.path.basename(model))
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(f"Model file not found at {full_path}")
+        return full_path
+
+    def predict_batch(
+        self,
+        sources: list,
+        conf_threshold: float = None,
+        imgsz: int = None,
+        model_path: str = None,
+    ):
+        """
+        对一批输入执行合并推理
+        图像数组按纵横比分桶，每个桶以自己的矩形尺寸执行一次model.predict，
+        横竖图混合的批次不再统一填充为正方形；图像路径整批执行一次model.predict
+
+        Args:
+            sources (list): 图像路径或图像数组列表
+            conf_threshold (float): 置信度阈值，默认使用配置中的值
+            imgsz (int): 推理尺寸(长边)，默认使用配置中的值
+            model_path (str): 使用的模型路径，默认使用默认模型
+        Returns:
+            list: 与sources顺序一一对应的检测结果列表
+        """
+        conf_threshold = conf_threshold or self.config.default_conf_threshold
+        imgsz = imgsz or self.config.default_imgsz
+
+        # 租用模型期间它不会被注册表卸载；同一模型的推理串行，不同模型可以并行
+        with self.registry.lease(model_path or self.model_path) as entry, entry.lock:
+
+            def predict(batch: list, shape):
+                return entry.model.predict(
+                    source=batch,
+                    conf=conf_threshold,
+                    device=self.device,
+                    imgsz=shape,
+                    batch=len(batch),  # 路径输入默认batch=1，这里显式指定为整批一次前向
+                    verbose=False,
+                )
+
+            if not all(isinstance(s, np.ndarray) for s in sources):
+                return predict(sources, imgsz)
+
+            buckets = aspect_buckets(
+                [s.shape[:2] for s in sources], imgsz, self.config.aspect_bucket_step
+            )
+            results = [None] * len(sources)
+            for shape, indices in buckets.items():
+                batch = predict([sources[i] for i in indices], list(shape))
+                for i, result in zip(indices, batch):
+                    results[i] = result  # 按原顺序放回
+            return results
+
+    def detect_tiled(
+        self,
+        image: np.ndarray,
+        conf_threshold: float = None,
+        model_path: str = None,
+        imgsz: int = None,
+    ):
+        """
+        切片推理：把大图切成相互重叠的图块，按tile_batch_size整批推理，
+        检测框平移回原图坐标后做跨图块合并
+
+        Args:
+            image (np.ndarray): BGR图像
+            conf_threshold (float): 置信度阈值，默认使用配置中的值
+            model_path (str): 使用的模型路径，默认使用默认模型
+            imgsz (int): 整图推理(不切片或tile_full_image)使用的尺寸，默认使用配置中的值
+        Returns:
+            Results: 原图上的检测结果，与predict_batch返回的单个结果结构相同
+        """
+        from ultralytics.engine.results import Results
+        import torch
+
+        config = self.config
+        height, width = image.shape[:2]
+        grid = tile_grid(height, width, config.tile_size, config.tile_overlap)
+        if len(grid) == 1:  # 图像不超过一个图块，切片没有意义
+            return self.predict_batch([image], conf_threshold, imgsz, model_path)[0]
+
+        tiles = slice_tiles(image, grid)
+        boxes = []
+        names = None
+        for start in range(0, len(tiles), config.tile_batch_size):
+            results = self.predict_batch(
+                tiles[start : start + config.tile_batch_size],
+                conf_threshold,
+                imgsz=config.tile_size,  # 图块不缩放，保留小目标的细节
+                model_path=model_path,
+            )
+            boxes.extend(boxes_array(result) for result in results)
+            names = results[0].names
+        merged = offset_boxes(boxes, grid)
+
+        if config.tile_full_image:
+            full = self.predict_batch([image], conf_threshold, imgsz, model_path)[0]
+            merged = np.concatenate([merged, boxes_array(full).astype(np.float32)])
+
+        merged = merge_detections(
+            merged, config.tile_merge_threshold, config.tile_merge_metric
+        )
+        return Results(image, path="", names=names, boxes=torch.from_numpy(merged))
+
+    def predict_stream(
+        self,
+        sources: list,
+        conf_threshold: float = None,
+        imgsz: int = None,
+        model_path: str = None,
+    ) -> Iterator:
+        """
+        流式推理(model.predict(stream=True))：逐个产出检测结果
+        调用方处理完一个结果后不再持有它，结果连同原图数组即可释放，
+        峰值内存与输入数量无关；迭代期间持有模型租约和模型锁
+
+        Args:
+            sources (list): 图像路径或图像数组列表
+            conf_threshold (float): 置信度阈值，默认使用配置中的值
+            imgsz (int): 推理尺寸，默认使用配置中的值
+            model_path (str): 使用的模型路径，默认使用默认模型
+        Yields:
+            与sources顺序一致的检测结果
+        """
+        conf_threshold = conf_threshold or self.config.default_conf_threshold
+        imgsz = imgsz or self.config.default_imgsz
+        with self.registry.lease(model_path or self.model_path) as entry, entry.lock:
+            yield from entry.model.predict(
+                source=sources,
+                conf=conf_threshold,
+                device=self.device,
+                imgsz=imgsz,
+                stream=True,
+                verbose=False,
+            )
 
     def detect_picture(
         self,
@@ -100,7 +454,8 @@ class Detector:
         output_dir: str = "src/yolo/output/images",
     ):
         """
-        对输入图像进行目标检测 - 支持进度回调
+        对输入图像进行目标检测
+        结果逐张产出、绘制、保存后即释放，不在检测器上保留，内存占用与图片数量无关
 
         参数:
         - image_path: 图像文件路径列表
@@ -122,40 +477,74 @@ class Detector:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        self.results = self.model.predict(
-            source=image_path,  # 输入图像路径
-            conf=conf_threshold,  # 置信度阈值
-            save=False,  # 保存检测结果图像
-            device=self.device,  # 使用的设备
-            show=False,  # 不显示检测窗口
-            imgsz=self.config.default_imgsz,  # 将图片缩放到640x640
+        # 边推理边保存：每个结果绘制并写入文件后就被丢弃
+        count = self.save_picture_result(
+            output_dir, self.predict_stream(image_path, conf_threshold)
         )
-
-        print("检测完成，正在保存结果...")
-        self.save_picture_result(output_dir)  # 保存检测结果图像
-        print(f"结果已保存到:{output_dir}")
+        print(f"检测完成，{count}张结果已保存到:{output_dir}")
         return output_dir
 
     def detect_video(
-        self, video_path: str, conf_threshold: float = None, output_dir: str = None
-    ):
+        self,
+        video_path: str,
+        conf_threshold: float = None,
+        output_dir: str = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        model: Optional[str] = None,
+        render: bool = True,
+        save_video: bool = True,
+        frame_callback: Optional[Callable[[np.ndarray], None]] = None,
+        stride: Optional[int] = None,
+        max_stride: Optional[int] = None,
+        motion_threshold: Optional[float] = None,
+        segments: Optional[int] = None,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None,
+        source_name: Optional[str] = None,
+    ) -> VideoDetection:
         """
-        逐帧处理视频目标检测
+        流水线处理视频目标检测
         1.打开视频文件
-        2.逐帧读取视频内容
-        3.对每一帧进行物体检测
-        4.在帧上绘制检测结果
+        2.解码线程逐帧读取视频内容，放入有界帧队列
+        3.当前线程从帧队列逐帧取帧，每次合并video_batch_size个检测帧推理
+        4.每stride帧运行一次模型，跟踪器把检测框传递到中间帧并分配轨迹ID，
+          检测间隔按轨迹与检测结果的一致程度在1到max_stride之间自适应调整；
+          stride为1且不自适应时逐帧检测，输出模型的检测框(不含轨迹ID)；
+          启用运动门控时，应检测的帧与上一次推理的帧几乎没有变化则复用上次的检测结果；
+          segments大于1时长视频按帧序号分段，交给多个工作进程并行处理后按顺序拼接；
+        5.编码线程在帧上绘制检测结果并按原顺序写入输出视频；
+          render=False时不绘制也不编码，只按帧顺序收集检测框；
+          提供frame_callback时每绘制完一帧就交给它(用于边处理边推流)
 
         参数:
         - video_path(str): 视频文件路径
         - conf_threshold(float): 置信度阈值，默认为DetectorConfig里面的0.25
         - output_dir(str): 输出视频文件的目录，默认为DetectorConfig里面的'src/yolo/output/videos'
+        - progress_callback(Callable): 进度回调，每批推理后以(已处理帧数, 总帧数)调用
+        - cancel_event(threading.Event): 取消信号，被设置后在下一批之前停止并抛出DetectionCancelled
+        - model(str): models_dir中的模型文件名，默认使用默认模型
+        - render(bool): 是否输出标注后的视频，为False时只返回每帧的检测结果
+        - save_video(bool): 是否把标注后的视频写入文件，流式输出时可以不写文件
+        - frame_callback(Callable): 在编码线程中以绘制好的帧调用，按原始顺序
+        - stride(int): 初始检测间隔，默认使用配置中的video_stride
+        - max_stride(int): 检测间隔上限，默认使用配置中的video_max_stride
+        - motion_threshold(float): 运动门控阈值，默认使用配置中的video_motion_threshold，0表示不启用
+        - segments(int): 分段并行处理的片段数，默认使用配置中的video_segment_workers；
+          流式输出(frame_callback)时不分段
+        - start_frame(int): 只处理视频的一段时的起始帧(包含)
+        - end_frame(int): 只处理视频的一段时的结束帧(不包含)，None表示到视频结尾
+        - source_name(str): 原始文件名，video_path不是文件路径(如边上传边检测的管道)时
+          用于命名输出视频，默认取video_path的文件名
         返回:
-        - output_video_path(str): 保存检测结果视频的完整路径
+        - VideoDetection: 输出视频路径(render=True)或每帧检测结果(render=False)，
+          处理帧数、运行检测/复用检测结果/跳过的帧数和独立目标数量
         """
         # 参数处理：使用配置默认值
         conf_threshold = conf_threshold or self.config.default_conf_threshold
         output_dir = output_dir or self.config.output_video_dir
+        model_path = self.resolve_model(model)
+        model_name = Path(model_path).stem
 
         print(f"开始处理视频: {video_path}")
         print(f"置信度阈值: {conf_threshold}")
@@ -172,132 +561,434 @@ class Detector:
         if not cap.isOpened():
             error_msg = f"无法打开视频文件:{video_path}"
             print(error_msg)
-            return ValueError(error_msg)
+            raise ValueError(error_msg)
 
         # 获取视频属性信息
         fps = int(cap.get(cv2.CAP_PROP_FPS))  # 帧率(每秒帧数) 每秒播放多少帧
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))  # 视频宽度(px)
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))  # 视频高度(px)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # 总帧数(部分格式只是估计值)
 
         print(f"视频信息: {width}x{height} @ {fps}FPS")
 
-        # 设置视频编码格式
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # 使用mp4编码 兼容性较好
+        segments = segments or self.config.video_segment_workers
+        if segments > 1 and save_video and frame_callback is None and end_frame is None:
+            ranges = segment_ranges(
+                total_frames, segments, self.config.video_segment_min_frames
+            )
+            if len(ranges) > 1:
+                cap.release()
+                return self._detect_video_segments(
+                    video_path,
+                    ranges,
+                    fps,
+                    conf_threshold,
+                    output_dir,
+                    model_path,
+                    render,
+                    progress_callback,
+                    cancel_event,
+                    stride=stride,
+                    max_stride=max_stride,
+                    motion_threshold=motion_threshold,
+                )
 
-        # 生成输出视频文件名
-        video_name = Path(video_path).stem
-        output_video_path = os.path.join(
-            output_dir, f"{video_name}_{self.model_name}_detected.mp4"
-        )
-        print(f"输出视频路径:{output_video_path}")
+        max_frames = None  # 只处理视频的一段时最多读取的帧数
+        if end_frame is not None:
+            max_frames = max(min(end_frame, total_frames) - start_frame, 0)
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)  # 从片段的起始帧开始解码
+        if max_frames is not None:
+            total_frames = max_frames
+        else:
+            total_frames = max(total_frames - start_frame, 0)
 
-        # 创建视频写入对象
-        out = cv2.VideoWriter(output_video_path, fourcc, fps, {width, height})
+        frames_detections = []  # render=False时按帧顺序收集的检测结果
+        sink = None  # 输出视频的写入阶段
 
-        # 检查视频写入对象是否创建成功
-        if not out.isOpened():
-            raise RuntimeError(f"无法创建输出视频文件:{output_video_path}")
+        def encode_frame(frame, result):
+            # 绘制线程：在帧上绘制检测结果，交给写入线程编码
+            if not render:
+                frames_detections.append(
+                    {
+                        "frame": start_frame + len(frames_detections),
+                        "detections": detections_from_result(result),
+                    }
+                )
+                return
+            draw_detections(frame, result, conf_threshold)
+            if sink is not None:
+                sink.put(frame)
+            if frame_callback is not None:
+                frame_callback(frame)
 
-        # 颜色字典：为不同类别的物体分配不同颜色
-        colors = {}
+        batch_size = self.config.video_batch_size
+        queue_size = self.config.video_queue_size
+        stop_event = threading.Event()
+        decoder = FrameDecoder(cap, queue_size, stop_event, max_frames)
+        encoder = FrameEncoder(encode_frame, queue_size, stop_event)
+        if render and save_video:
+            # 写入线程按配置的编码格式、质量、缩放和抽帧编码输出视频，扩展名由编码格式决定
+            video_name = Path(source_name or video_path).stem
+            try:
+                sink = VideoSink(
+                    os.path.join(output_dir, f"{video_name}_{model_name}_detected"),
+                    VideoEncodeOptions.from_config(self.config),
+                    fps,
+                    (width, height),
+                    queue_size,
+                    stop_event,
+                )
+            except Exception:
+                cap.release()
+                raise
+            print(f"输出视频路径:{sink.path}")
 
         frame_count = 0  # 帧计数器，在处理过程中统计处理了多少帧
+        inferred_frames = 0  # 运行检测的帧数
+        reused_frames = 0  # 画面静止、复用上次检测结果的帧数
+
+        config = self.config
+        stride = AdaptiveStride(
+            stride or config.video_stride,
+            max_stride or config.video_max_stride,
+            config.video_stride_low_disagreement,
+            config.video_stride_high_disagreement,
+        )
+        # 只有抽帧检测(固定间隔大于1或自适应间隔)时才用跟踪结果作为输出；
+        # 逐帧检测时输出模型的检测框，跟踪器只用来统计独立目标数量
+        tracking = stride.stride > 1 or stride.adaptive
+        tracker = ByteTracker(
+            conf_threshold,
+            config.track_iou_threshold,
+            config.track_max_age,
+            config.track_min_hits,
+        )
+        detect_conf = conf_threshold
+        if tracking:
+            # 低于请求阈值的检测框也要取出来，只用于关联被遮挡的已有轨迹
+            detect_conf = min(conf_threshold, config.track_low_conf)
+        next_detect = 0  # 下一个运行检测的帧序号
+        if motion_threshold is None:
+            motion_threshold = config.video_motion_threshold
+        gate = MotionGate(
+            motion_threshold, config.video_motion_max_staleness, config.video_motion_size
+        )
+        last_detections = np.zeros((0, 6), dtype=np.float32)  # 最近一次检测的结果
 
-        # 开始逐帧处理视频
-        print("开始逐帧处理..")
-        while cap.isOpened():
-            # 读取下一帧
-            ret, frame = cap.read()  # ret表示是否读取帧成功， frame是图像每帧具体数据
+        # 开始流水线处理：解码线程读帧，当前线程按批推理，编码线程绘制并写入
+        print(
+            f"开始流水线处理.. 批大小:{batch_size} 队列长度:{queue_size} "
+            f"检测间隔:{stride.stride}-{stride.max_stride}"
+        )
+        # 整段视频期间持有模型租约，避免处理途中模型被注册表卸载
+        model_entry = self.registry.acquire(model_path)
+        names = model_entry.model.names
+        decoder.start()
+        encoder.start()
+        if sink is not None:
+            sink.start()
+        try:
+            # 逐帧从解码队列取帧：检测帧攒够batch_size帧再合并推理；检测帧之后的中间帧
+            # 要等它的检测结果，一起缓存，缓存的帧数不超过max(batch_size, 队列长度)；
+            # 没有等待结果的检测帧时，中间帧直接经过跟踪器交给编码线程
+            buffer_limit = max(batch_size, queue_size)
+            pending = []  # 等待处理的帧
+            picks = []  # pending中运行检测的帧的下标
+            reused = set()  # pending中应检测、但画面静止而复用检测结果的帧的下标
+            frames = decoder.iter_frames()
+            while True:
+                frame = next(frames, None)
+                if frame is not None:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise DetectionCancelled(f"视频处理已取消:{video_path}")
+                    if frame_count + len(pending) == next_detect:
+                        if gate.should_infer(next_detect, frame):
+                            picks.append(len(pending))
+                        else:
+                            reused.add(len(pending))
+                        next_detect += stride.stride
+                    pending.append(frame)
+                    waiting = picks and len(picks) < batch_size
+                    if waiting and len(pending) < buffer_limit:
+                        continue  # 继续等待后续的检测帧
+                if not pending:
+                    break
 
-            # 检查是否成功读取帧
-            if not ret:
-                print("视频处理完成")
-                break
+                results = []
+                if picks:
+                    with model_entry.lock:
+                        results = model_entry.model.predict(
+                            [pending[i] for i in picks],
+                            device=self.device,
+                            conf=detect_conf,
+                            imgsz=config.default_imgsz,
+                            verbose=False,
+                        )
+                detections = {i: boxes_array(r) for i, r in zip(picks, results)}
+                inferred_frames += len(picks)
+                reused_frames += len(reused)
 
-            frame_count += 1  #
+                for i, buffered in enumerate(pending):
+                    tracker.predict()
+                    if i in detections or i in reused:
+                        # 复用的帧按顺序取最近一次检测的结果，轨迹照常更新
+                        last_detections = detections.get(i, last_detections)
+                        tracks, disagreement = tracker.update(last_detections)
+                        stride.update(disagreement)
+                    elif tracking:
+                        tracks = tracker.tracks()  # 中间帧使用轨迹的预测位置
+                    if not tracking:
+                        tracks = last_detections  # 逐帧检测：本帧(或复用的)检测框
+                    encoder.put(buffered, _boxes_result(buffered, tracks, names))
 
-            # 每处理100帧显示一次进度
-            if frame_count % 100 == 0:
-                print(f"已处理{frame_count}帧...")
+                # 每处理100帧显示一次进度
+                previous = frame_count
+                frame_count += len(pending)
+                if frame_count // 100 > previous // 100:
+                    print(f"已处理{frame_count}帧...")
+                if progress_callback is not None:
+                    progress_callback(frame_count, total_frames)
+                pending, picks, reused = [], [], set()
 
-            results = self.model.predict(
-                frame,
-                device=self.device,
-                conf=conf_threshold,
-                imgsz=self.config.default_imgsz,
+            encoder.close()  # 等待剩余帧全部绘制
+            if sink is not None:
+                sink.close()  # 等待剩余帧全部编码写入
+        except DetectionCancelled:
+            stop_event.set()
+            encoder.join()
+            if sink is not None:
+                sink.abort()  # 取消的任务不保留不完整的输出
+            raise
+        finally:
+            stop_event.set()  # 出错时让解码/编码线程尽快退出
+            decoder.join()
+            encoder.join()
+            self.registry.release(model_entry)
+            cap.release()  # 释放视频捕获对象
+            if sink is not None:
+                sink.release()  # 释放视频写入对象
+
+        skipped_frames = frame_count - inferred_frames - reused_frames
+        print(
+            f"视频处理完成，共处理{frame_count}帧，其中{inferred_frames}帧运行检测，"
+            f"{reused_frames}帧画面静止复用检测结果，{skipped_frames}帧由跟踪器传递，"
+            f"独立目标{tracker.unique_objects}个"
+        )
+        if sink is not None:
+            print(
+                f"输出视频编码耗时{sink.encode_seconds:.2f}秒，"
+                f"写入{sink.frames_written}帧，大小{sink.output_bytes}字节"
             )
+        return VideoDetection(
+            output_video_path=sink.path if sink is not None else None,
+            frame_count=frame_count,
+            frames=None if render else frames_detections,
+            inferred_frames=inferred_frames,
+            unique_objects=tracker.unique_objects,
+            reused_frames=reused_frames,
+            encode_seconds=sink.encode_seconds if sink is not None else 0.0,
+            output_bytes=sink.output_bytes if sink is not None else 0,
+        )
+
+    def _detect_video_segments(
+        self,
+        video_path: str,
+        ranges: List[tuple],
+        fps: int,
+        conf_threshold: float,
+        output_dir: str,
+        model_path: str,
+        render: bool,
+        progress_callback: Optional[Callable[[int, int], None]],
+        cancel_event: Optional[threading.Event],
+        **options,
+    ) -> VideoDetection:
+        """
+        分段并行处理视频：每段在独立的工作进程中检测，结果按片段顺序合并
+        跟踪在片段之间不延续，跨越片段边界的目标会在独立目标数量中重复计数
+
+        参数:
+        - video_path(str): 视频文件路径
+        - ranges(List[tuple]): 各片段的[起始帧, 结束帧)
+        - fps(int): 视频帧率
+        - conf_threshold(float): 置信度阈值
+        - output_dir(str): 输出视频文件的目录
+        - model_path(str): 模型路径
+        - render(bool): 是否输出标注后的视频
+        - progress_callback(Callable): 进度回调，以(各片段已处理帧数之和, 总帧数)调用
+        - cancel_event(threading.Event): 取消信号，被设置后通知所有工作进程停止
+        - **options: 透传给各片段detect_video的参数(检测间隔、运动门控等)
+        返回:
+        - VideoDetection: 合并后的检测结果
+        """
+        workers = len(ranges)
+        threads = self.config.video_segment_threads or worker_threads(workers)
+        total_frames = ranges[-1][1]
+        print(f"分段并行处理.. 片段数:{workers} 每个进程的线程数:{threads}")
+
+        # spawn启动的工作进程不继承父进程的线程、模型和CUDA上下文
+        context = multiprocessing.get_context("spawn")
+        worker_cancel = context.Event()
+        progress = context.Array("q", workers)  # 每个片段已处理的帧数
+        segment_dir = tempfile.mkdtemp(prefix=".segments_", dir=output_dir)
+        try:
+            with ProcessPoolExecutor(
+                workers,
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(model_path, self.config, threads, worker_cancel, progress),
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        run_segment,
+                        index,
+                        video_path,
+                        start,
+                        # 总帧数可能只是估计值，最后一段一直读到视频结尾
+                        end if index < workers - 1 else None,
+                        conf_threshold=conf_threshold,
+                        output_dir=os.path.join(segment_dir, str(index)),
+                        render=render,
+                        segments=1,
+                        **options,
+                    )
+                    for index, (start, end) in enumerate(ranges)
+                ]
+                pending = futures
+                while pending:
+                    done, pending = wait(
+                        pending, timeout=0.5, return_when=FIRST_EXCEPTION
+                    )
+                    # 请求被取消或某一段失败时，其余片段在下一批帧前停止
+                    failed = any(f.exception() is not None for f in done)
+                    if failed or (cancel_event is not None and cancel_event.is_set()):
+                        worker_cancel.set()
+                    if progress_callback is not None:
+                        progress_callback(sum(progress[:]), total_frames)
+                parts = [f.result() for f in futures]  # 按片段顺序，失败时抛出异常
+
+            output_video_path = None
+            concat_seconds = 0.0
+            if render:
+                video_name = Path(video_path).stem
+                model_name = Path(model_path).stem
+                output_video_path, concat_seconds = concat_videos(
+                    [part.output_video_path for part in parts],
+                    os.path.join(output_dir, f"{video_name}_{model_name}_detected"),
+                    VideoEncodeOptions.from_config(self.config),
+                    fps,
+                )
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+        detection = VideoDetection(
+            output_video_path=output_video_path,
+            frame_count=sum(part.frame_count for part in parts),
+            frames=None if render else [f for part in parts for f in part.frames],
+            inferred_frames=sum(part.inferred_frames for part in parts),
+            unique_objects=sum(part.unique_objects for part in parts),
+            reused_frames=sum(part.reused_frames for part in parts),
+            encode_seconds=sum(part.encode_seconds for part in parts) + concat_seconds,
+            output_bytes=os.path.getsize(output_video_path) if output_video_path else 0,
+        )
+        print(
+            f"分段并行处理完成，共处理{detection.frame_count}帧，"
+            f"其中{detection.inferred_frames}帧运行检测"
+        )
+        return detection
+
+    def change_model(self, new_model_path: str) -> ModelSwap:
+        """
+        切换一个新的YOLO模型(非阻塞)
+        新模型在后台线程中加载，加载完成后原子地替换默认模型；
+        正在使用旧模型的请求持有注册表租约，会在旧模型上完成，之后旧模型被卸载
 
-            for result in results:  # 针对所有处理帧里面的每一帧
-                if result.boxes is not None:  # 添加安全检查
-                    for box in result.boxes:  # 针对每一帧里面的每一个检测框
-                        x1, y1, x2, y2 = map(
-                            int, box.xyxy[0]
-                        )  # 提取边界框坐标并转换为整数
-                        conf = box.conf[0].item()  # 从box的conf属性中提取置信度
-                        class_id = int(
-                            box.cls[0].item()
-                        )  # 从box的cls属性中提取类别ID并转换为整数
-                        class_name = result.names[
-                            class_id
-                        ]  # 从result的names属性中提取类别名称
-
-                        if conf >= conf_threshold:  # 只处理置信度高于阈值的检测结果
-                            # 为每个类别分配随机颜色
-                            if class_id not in colors:
-                                colors[class_id] = (
-                                    random.randint(0, 255),
-                                    random.randint(0, 255),
-                                    random.randint(0, 255),
-                                )  # 生成随机颜色
-
-                            color = colors[class_id]
-                            label = f"{class_name} {conf:.2f}"  # 标签文本 包含类别名称和置信度
-                            # 在帧上绘制边界框和标签
-                            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                            cv2.putText(
-                                frame,
-                                label,
-                                (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX,
-                                0.5,
-                                color,
-                                2,
-                            )
-
-            # 将处理后的帧写入输出视频
-            out.write(frame)
-
-        cap.release()  # 释放视频捕获对象
-        out.release()  # 释放视频写入对象
-
-        print(f"视频处理完成，共处理{frame_count}帧")
-        return output_video_path
-
-    def change_model(self, new_model_path: str):
-        """
-        切换一个新的YOLO模型
         Args:
             new_model_path (str): 新模型的文件名（如 'valorant.pt'）
+        Returns:
+            ModelSwap: 切换状态句柄，可通过self.swaps[swap.id]查询进度
+        Raises:
+            FileNotFoundError: 模型文件不存在
         """
-        # 正确拼接模型路径
-        full_path = os.path.join(self.config.models_dir, new_model_path)
-        if not os.path.exists(full_path):
-            raise FileNotFoundError(f"Model file not found at {full_path}")
+        # 正确拼接模型路径，不存在时抛出FileNotFoundError
+        full_path = self.resolve_model(new_model_path)
 
-        self.model_path = full_path
-        self.load_model()
+        swap = ModelSwap(id=uuid.uuid4().hex, model=os.path.basename(full_path))
+        with self._swap_lock:
+            self._swap_generation += 1
+            generation = self._swap_generation
+            self.swaps[swap.id] = swap
+            # 只保留最近的20个切换句柄
+            for old_id in list(self.swaps)[:-20]:
+                del self.swaps[old_id]
+
+        threading.Thread(
+            target=self._swap_model,
+            args=(swap, full_path, generation),
+            name="yolo-model-swap",
+            daemon=True,
+        ).start()
+        return swap
+
+    def _swap_model(self, swap: ModelSwap, full_path: str, generation: int):
+        """
+        后台线程：加载新模型并在就绪后替换默认模型
+        """
+        try:
+            # 持有新模型的租约直到切换完成，防止它在切换前被LRU淘汰
+            with self.registry.lease(full_path):
+                with self._swap_lock:
+                    if generation != self._swap_generation:
+                        swap.status = SwapStatus.SUPERSEDED
+                        return
+                    old_path = self.model_path
+                    self.model_path = full_path  # 原子替换，之后的新请求使用新模型
+                    swap.status = SwapStatus.READY
+            print(f"默认模型已切换为: {swap.model}")
+            if old_path != full_path:
+                # 旧模型上还在进行的推理完成后再卸载
+                self.registry.discard(old_path)
+        except Exception as e:
+            swap.status = SwapStatus.FAILED
+            swap.error = str(e)
+            print(f"模型切换失败: {e}")
+        finally:
+            swap.finished_at = time.time()
+
+    def encode_picture_result(
+        self, result, ext: str = ".jpg", quality: Optional[int] = None
+    ) -> bytes:
+        """
+        在内存中绘制并编码单张图片的检测结果
+        Args:
+            result: 单张图片的检测结果
+            ext (str): 输出格式扩展名(".jpg"或".webp")
+            quality (int): 编码质量(1-100)，默认使用配置中的output_image_quality
+        Returns:
+            bytes: 编码后的标注图片
+        """
+        img_with_boxes = render_result(result)  # 在原图副本上绘制检测框
+        quality = quality or self.config.output_image_quality
+        return encode_image(img_with_boxes, ext, quality)
 
-    def save_picture_result(self, output_dir: str = "src/core/yolo/output/images"):
+    def save_picture_result(self, output_dir: str, results: Iterable) -> int:
         """
         保存检测结果为图片
         Args:
             output_dir (str): 输出目录
+            results (Iterable): 要保存的检测结果，可以是predict_stream返回的生成器
+        Returns:
+            int: 保存的图片数量
         """
+        count = 0
         for i, r in enumerate(
-            self.results
+            results
         ):  # 遍历所有检测结果 返回第一个值是索引，第二个值是真正的每个结果
-            img_with_boxes = r.plot(labels=True, line_width=2)  # 在图像上绘制检测框
+            img_with_boxes = render_result(r)  # 在原图副本上绘制检测框
             cv2.imwrite(output_dir + f"/detected_{i}.jpg", img_with_boxes)  # 保存图像
+            count += 1
+        return count
 
 
 # 简单测试代码，测试图像可以传入yolo/test_image文件夹里
@@ -0,0 +1,121 @@
+# 推理专用线程池：把阻塞的模型推理移出事件循环，并通过有界队列实现背压
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+
+class QueueFullError(RuntimeError):
+    """推理队列已满时抛出，路由层据此返回503"""
+
+
+class InferenceExecutor:
+    """
+    有界推理执行器
+    1.固定数量的工作线程执行推理任务，事件循环只负责等待结果
+    2.排队+执行中的任务总数不超过 max_workers + max_queue_size
+    3.队列满时立即拒绝(QueueFullError)，而不是无限堆积导致延迟失控
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue_size: int = 16,
+        name: str = "yolo-inference",
+    ):
+        """
+        Args:
+            max_workers (int): 工作线程数量
+            max_queue_size (int): 允许排队等待的任务数量
+            name (str): 工作线程名称前缀
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.capacity = max_workers + max_queue_size  # 同时容纳的任务上限
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._inflight = 0  # 已提交但未完成的任务数(排队+执行中)
+        self._running = 0  # 正在执行的任务数
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+
+    @property
+    def running(self) -> int:
+        """正在执行的任务数"""
+        return self._running
+
+    @property
+    def pending(self) -> int:
+        """排队等待执行的任务数"""
+        return max(self._inflight - self._running, 0)
+
+    @property
+    def depth(self) -> int:
+        """队列深度：排队+执行中的任务总数"""
+        return self._inflight
+
+    def stats(self) -> dict:
+        """返回当前队列状态，供接口上报"""
+        return {
+            "running": self.running,
+            "pending": self.pending,
+            "depth": self.depth,
+            "capacity": self.capacity,
+            "workers": self.max_workers,
+        }
+
+    def submit(self, fn: Callable, *args, block: bool = False, **kwargs) -> Future:
+        """
+        提交一个推理任务
+
+        Args:
+            fn (Callable): 要在工作线程中执行的函数
+            block (bool): 队列已满时是否阻塞等待空位，默认False即立即拒绝
+        Returns:
+            Future: 任务结果
+        Raises:
+            QueueFullError: block为False且队列已满
+        """
+        if not self._slots.acquire(blocking=block):
+            raise QueueFullError(
+                f"Inference queue is full ({self.depth}/{self.capacity})"
+            )
+        with self._lock:
+            self._inflight += 1
+
+        def task():
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        try:
+            future = self._pool.submit(task)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        异步接口：提交任务并在事件循环中等待结果
+
+        Raises:
+            QueueFullError: 队列已满
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池"""
+        self._pool.shutdown(wait=wait)
+
+    def _release(self):
+        """任务结束后归还队列名额"""
+        with self._lock:
+            self._inflight -= 1
+        self._slots.release()
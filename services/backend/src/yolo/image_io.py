@@ -0,0 +1,48 @@
+# 内存中的图像编解码：上传的字节直接解码为数组，检测结果直接编码为字节，不经过磁盘
+import cv2
+import numpy as np
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """
+    把上传文件的字节解码为BGR图像数组
+
+    Args:
+        data (bytes): 图像文件的原始字节(jpg/png/bmp等)
+    Returns:
+        np.ndarray: BGR格式的图像数组，形状为(H, W, 3)
+    Raises:
+        ValueError: 字节内容不是可识别的图像
+    """
+    if not data:
+        raise ValueError("图像数据为空")  # 空缓冲区会让cv2.imdecode抛出cv2.error
+    try:
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except cv2.error as e:
+        raise ValueError(f"无法解码图像数据: {e}") from e
+    if image is None:
+        raise ValueError("无法解码图像数据")
+    return image
+
+
+def encode_image(image: np.ndarray, ext: str = ".jpg", quality: int = 90) -> bytes:
+    """
+    把BGR图像数组编码为图像文件字节
+
+    Args:
+        image (np.ndarray): BGR格式的图像数组
+        ext (str): 输出格式的扩展名，如".jpg"、".png"、".webp"
+        quality (int): jpg/webp的压缩质量(1-100)
+    Returns:
+        bytes: 编码后的图像字节
+    """
+    params = []
+    if ext in (".jpg", ".jpeg"):
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    elif ext == ".webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise ValueError(f"无法编码图像为{ext}格式")
+    return buffer.tobytes()
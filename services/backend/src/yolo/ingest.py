@@ -0,0 +1,85 @@
+# 边上传边检测：请求体按块写入管道，cv2.VideoCapture通过ffmpeg的pipe:协议从管道另一端读取，
+# 第一批数据到达后解码和推理就开始，不必等待整个文件上传完成
+# 1.管道容量有限，解码和推理跟不上时写入等待，上传随之减速(背压)，内存占用不随文件大小增长
+# 2.可选写穿：同时把数据写入上传目录，保留原始文件，也用于无法边传边解码时的回退
+# 3.管道不能回退读取，moov在文件末尾的MP4无法边传边解码，
+#   需要faststart/分片MP4、MKV/WebM或MPEG-TS等可流式读取的格式
+import fcntl
+import os
+import select
+import threading
+from typing import Optional
+
+PIPE_SIZE = 1024 * 1024  # 管道缓冲区大小，减少上传和解码之间的来回切换
+
+
+class StreamingUpload:
+    """
+    上传数据到解码器的管道
+    事件循环(通过线程池)调用write和finish，检测线程从source读取视频
+    """
+
+    def __init__(self, copy_path: Optional[str] = None):
+        """
+        Args:
+            copy_path (str): 写穿副本的路径，None表示不保留上传内容
+        """
+        self._read_fd, self._write_fd = os.pipe()
+        if hasattr(fcntl, "F_SETPIPE_SZ"):  # 仅Linux支持调整管道大小
+            try:
+                fcntl.fcntl(self._write_fd, fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+            except OSError:
+                pass
+        os.set_blocking(self._write_fd, False)  # 写入时等待可写，期间检查读取端是否已结束
+        self.source = f"pipe:{self._read_fd}"  # 检测线程传给cv2.VideoCapture的地址
+        self.copy_path = copy_path
+        self._copy = open(copy_path, "wb") if copy_path else None
+        self.reader_closed = threading.Event()  # 检测线程已结束，不再读取管道
+        self.bytes_received = 0
+
+    def write(self, data: bytes) -> bool:
+        """
+        写入一块上传数据，管道满时等待检测线程读取
+
+        Returns:
+            bool: 后续数据是否仍然需要(检测线程已结束且没有写穿副本时返回False)
+        """
+        self.bytes_received += len(data)
+        if self._copy is not None:
+            self._copy.write(data)
+        view = memoryview(data)
+        while view and self._write_fd is not None:
+            if self.reader_closed.is_set():
+                self._close_pipe()  # 读取端已结束，之后的数据只写入副本
+                break
+            _, writable, _ = select.select([], [self._write_fd], [], 0.1)
+            if not writable:
+                continue
+            try:
+                view = view[os.write(self._write_fd, view) :]
+            except BlockingIOError:
+                continue
+        return self._write_fd is not None or self._copy is not None
+
+    def finish(self):
+        """上传结束(或中断)：关闭写入端，检测线程读完管道中剩余的数据后遇到文件结尾"""
+        self._close_pipe()
+        if self._copy is not None:
+            self._copy.close()
+            self._copy = None
+
+    def reader_done(self):
+        """检测线程结束时调用"""
+        self.reader_closed.set()
+
+    def cleanup(self):
+        """检测线程结束后关闭管道的读取端"""
+        self.finish()
+        if self._read_fd is not None:
+            os.close(self._read_fd)
+            self._read_fd = None
+
+    def _close_pipe(self):
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+            self._write_fd = None
@@ -0,0 +1,285 @@
+# 异步视频检测任务：提交后立即返回任务ID，由推理线程池在后台处理
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from src.yolo.detector import DetectionCancelled
+from src.yolo.executor import InferenceExecutor
+from src.yolo.storage import RequestStorage
+
+
+class JobStatus(str, Enum):
+    """视频任务状态枚举"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class VideoJob:
+    """单个视频检测任务的状态"""
+
+    id: str
+    user_id: int
+    file_name: str  # 用户上传时的原始文件名
+    file_path: str  # 上传文件在本地保存的路径
+    conf_threshold: float
+    model_used: str  # 使用的模型文件名
+    model: Optional[str] = None  # 请求指定的模型，None表示默认模型
+    render: bool = True  # 是否输出标注视频，为False时只保留每帧的检测结果
+    output_dir: Optional[str] = None  # 输出视频的目录，None表示使用配置中的默认目录
+    stride: Optional[int] = None  # 初始检测间隔，None表示使用配置中的值
+    max_stride: Optional[int] = None  # 检测间隔上限，None表示使用配置中的值
+    motion_threshold: Optional[float] = None  # 运动门控阈值，None表示使用配置中的值
+    segments: Optional[int] = None  # 分段并行处理的片段数，None表示使用配置中的值
+    status: JobStatus = JobStatus.QUEUED
+    frames_processed: int = 0
+    total_frames: int = 0  # 来自CAP_PROP_FRAME_COUNT，部分格式只是估计值
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    output_video_path: Optional[str] = None
+    frames: Optional[List[dict]] = None  # render=False时每帧的检测结果
+    inferred_frames: int = 0  # 实际运行检测的帧数(其余帧由跟踪器传递检测框)
+    unique_objects: int = 0  # 跟踪得到的独立目标数量
+    reused_frames: int = 0  # 画面静止、复用上次检测结果的帧数
+    encode_seconds: float = 0.0  # 输出视频的编码耗时(秒)
+    output_bytes: int = 0  # 输出视频文件的大小(字节)
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束(无论成功、失败还是取消)"""
+        return self.status in (
+            JobStatus.COMPLETED,
+            JobStatus.FAILED,
+            JobStatus.CANCELLED,
+        )
+
+    @property
+    def processing_time(self) -> float:
+        """实际处理耗时(秒)，不含排队时间"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def progress(self) -> dict:
+        """
+        计算任务进度
+        Returns:
+            dict: 已处理帧数、总帧数、百分比、处理速度(fps)和预计剩余时间(秒)
+        """
+        elapsed = self.processing_time
+        fps = self.frames_processed / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if fps > 0 and self.total_frames > 0 and not self.finished:
+            eta = max(self.total_frames - self.frames_processed, 0) / fps
+        percent = None
+        if self.total_frames > 0:
+            percent = min(self.frames_processed / self.total_frames * 100, 100.0)
+        return {
+            "frames_processed": self.frames_processed,
+            "total_frames": self.total_frames,
+            "percent": percent,
+            "fps": fps,
+            "eta_seconds": eta,
+        }
+
+
+class VideoJobManager:
+    """
+    视频任务管理器
+    1.submit把任务交给推理线程池，立即返回任务对象
+    2.工作线程调用Detector.detect_video，并通过回调更新进度
+    3.任务成功后在事件循环中执行on_complete(写入检测历史)
+    4.cancel可以取消排队中或处理中的任务
+    5.任务从提交到结束期间固定其上传和输出目录，存储清理线程不会删除正在使用的文件
+    """
+
+    def __init__(
+        self,
+        detector,
+        executor: InferenceExecutor,
+        on_complete: Optional[Callable[[VideoJob], Awaitable]] = None,
+        max_finished_jobs: int = 200,
+        storages: Sequence[RequestStorage] = (),
+    ):
+        """
+        Args:
+            detector: 共享的Detector实例
+            executor (InferenceExecutor): 执行任务的推理线程池
+            on_complete (Callable): 任务成功后在事件循环中执行的协程函数
+            max_finished_jobs (int): 内存中最多保留的已结束任务数量
+            storages (Sequence[RequestStorage]): 任务的上传和输出文件所在的存储
+        """
+        self.detector = detector
+        self.executor = executor
+        self.on_complete = on_complete
+        self.max_finished_jobs = max_finished_jobs
+        self.storages = storages
+        self._jobs: "OrderedDict[str, VideoJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def submit(
+        self,
+        user_id: int,
+        file_path: str,
+        file_name: str,
+        conf_threshold: float,
+        model: Optional[str] = None,
+        render: bool = True,
+        output_dir: Optional[str] = None,
+        stride: Optional[int] = None,
+        max_stride: Optional[int] = None,
+        motion_threshold: Optional[float] = None,
+        segments: Optional[int] = None,
+    ) -> VideoJob:
+        """
+        提交视频任务
+
+        Args:
+            user_id (int): 提交任务的用户ID
+            file_path (str): 已保存的视频文件路径
+            file_name (str): 原始文件名
+            conf_threshold (float): 置信度阈值
+            model (str): 使用的模型文件名，None表示默认模型
+            render (bool): 是否输出标注视频，为False时只收集每帧的检测结果
+            output_dir (str): 输出视频的目录(每个任务独立的目录)
+            stride (int): 初始检测间隔，每stride帧运行一次模型
+            max_stride (int): 检测间隔上限，大于stride时间隔自适应调整
+            motion_threshold (float): 运动门控阈值，画面变化低于它时复用上次检测结果
+            segments (int): 分段并行处理的片段数，长视频切分后由多个工作进程同时处理
+        Returns:
+            VideoJob: 新建的任务
+        Raises:
+            QueueFullError: 推理队列已满
+            FileNotFoundError: 指定的模型不存在
+        """
+        loop = asyncio.get_running_loop()  # on_complete需要回到事件循环中执行
+        job = VideoJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            file_name=file_name,
+            file_path=file_path,
+            conf_threshold=conf_threshold,
+            model_used=os.path.basename(self.detector.resolve_model(model)),
+            model=model,
+            render=render,
+            output_dir=output_dir,
+            stride=stride,
+            max_stride=max_stride,
+            motion_threshold=motion_threshold,
+            segments=segments,
+        )
+        self._pin(job)
+        try:
+            job.future = self.executor.submit(self._run, job, loop)
+        except Exception:
+            self._unpin(job)
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id: str, user_id: Optional[int] = None) -> Optional[VideoJob]:
+        """
+        按ID获取任务，提供user_id时只返回该用户自己的任务
+        """
+        job = self._jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def cancel(self, job: VideoJob) -> bool:
+        """
+        取消任务：排队中的任务直接从线程池撤销，处理中的任务在下一批帧前停止
+
+        Returns:
+            bool: 任务尚未结束、取消请求已生效时返回True
+        """
+        if job.finished:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.status = JobStatus.CANCELLED
+            job.finished_at = time.time()
+            self._unpin(job)  # 任务不会再执行，_run中的释放不会发生
+        return True
+
+    def _run(self, job: VideoJob, loop: asyncio.AbstractEventLoop):
+        """工作线程中执行的任务主体"""
+        if job.cancel_event.is_set():
+            job.status = JobStatus.CANCELLED
+            job.finished_at = time.time()
+            self._unpin(job)
+            return
+
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+
+        def on_progress(frames_processed: int, total_frames: int):
+            job.frames_processed = frames_processed
+            job.total_frames = total_frames
+
+        try:
+            detection = self.detector.detect_video(
+                job.file_path,
+                job.conf_threshold,
+                output_dir=job.output_dir,
+                progress_callback=on_progress,
+                cancel_event=job.cancel_event,
+                model=job.model,
+                render=job.render,
+                stride=job.stride,
+                max_stride=job.max_stride,
+                motion_threshold=job.motion_threshold,
+                segments=job.segments,
+            )
+            job.output_video_path = detection.output_video_path
+            job.frames = detection.frames
+            job.inferred_frames = detection.inferred_frames
+            job.unique_objects = detection.unique_objects
+            job.reused_frames = detection.reused_frames
+            job.encode_seconds = detection.encode_seconds
+            job.output_bytes = detection.output_bytes
+            job.finished_at = time.time()
+            if self.on_complete is not None:
+                # 检测历史通过ORM写入，必须在事件循环中执行
+                asyncio.run_coroutine_threadsafe(self.on_complete(job), loop).result()
+            job.status = JobStatus.COMPLETED
+        except DetectionCancelled:
+            job.status = JobStatus.CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = job.finished_at or time.time()
+            self._unpin(job)
+
+    def _pin(self, job: VideoJob):
+        """固定任务的上传和输出目录"""
+        for storage in self.storages:
+            storage.pin(job.file_path, job.output_dir)
+
+    def _unpin(self, job: VideoJob):
+        for storage in self.storages:
+            storage.unpin(job.file_path, job.output_dir)
+
+    def _prune(self):
+        """超过保留数量时，丢弃最早结束的任务记录"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.max_finished_jobs, 0)]:
+            del self._jobs[job_id]
@@ -0,0 +1,101 @@
+# 实时检测(WebSocket)的帧调度和统计
+# 客户端推帧的速度可能超过推理速度，此时只保留最新的一帧，旧帧直接丢弃，
+# 每个连接最多只有一帧在等待推理，延迟有上界，不会随排队无限增长
+import asyncio
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+
+class LatestFrame:
+    """
+    单槽位的帧缓冲：新帧覆盖尚未被取走的旧帧
+    接收协程调用put，推理协程调用get
+    """
+
+    def __init__(self):
+        self._frame: Optional[Tuple[int, bytes, float]] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._seq = 0
+        self.dropped = 0  # 被新帧覆盖、未经推理的帧数
+
+    def put(self, data: bytes) -> int:
+        """
+        放入一帧，覆盖尚未被取走的旧帧
+
+        Args:
+            data (bytes): 编码后的帧(JPEG/PNG等)
+        Returns:
+            int: 该帧的序号(从0开始，按接收顺序递增)
+        """
+        if self._frame is not None:
+            self.dropped += 1
+        seq = self._seq
+        self._seq += 1
+        self._frame = (seq, data, time.perf_counter())
+        self._ready.set()
+        return seq
+
+    def close(self):
+        """接收端结束(客户端已断开)，未取走的帧不再处理，get返回None"""
+        self._closed = True
+        self._frame = None
+        self._ready.set()
+
+    async def get(self) -> Optional[Tuple[int, bytes, float]]:
+        """
+        等待并取走最新的一帧
+
+        Returns:
+            tuple: (帧序号, 帧数据, 接收时间perf_counter)，接收端已结束时返回None
+        """
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+class LiveStats:
+    """单个连接的处理统计：最近window帧的fps和端到端延迟"""
+
+    def __init__(self, window: int = 30):
+        """
+        Args:
+            window (int): 计算fps和平均延迟使用的最近帧数
+        """
+        self.processed = 0
+        self._done_at = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+
+    def record(self, latency_ms: float, now: Optional[float] = None):
+        """记录一帧处理完成，latency_ms为从收到帧到发出结果的时间"""
+        self.processed += 1
+        self._done_at.append(time.perf_counter() if now is None else now)
+        self._latencies.append(latency_ms)
+
+    @property
+    def fps(self) -> float:
+        """最近window帧的处理帧率"""
+        if len(self._done_at) < 2:
+            return 0.0
+        elapsed = self._done_at[-1] - self._done_at[0]
+        return (len(self._done_at) - 1) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def latency_ms(self) -> float:
+        """最近window帧的平均端到端延迟(毫秒)"""
+        if not self._latencies:
+            return 0.0
+        return sum(self._latencies) / len(self._latencies)
+
+    def to_dict(self, dropped: int = 0) -> dict:
+        return {
+            "processed": self.processed,
+            "dropped": dropped,
+            "fps": round(self.fps, 2),
+            "avg_latency_ms": round(self.latency_ms, 2),
+        }
@@ -0,0 +1,72 @@
+# 运动门控：固定机位的视频中大段画面没有变化，这些帧直接复用上一次的检测结果，不再运行模型
+# 每帧缩小为小尺寸灰度图后与上一次运行模型的帧比较，平均像素差低于阈值视为静止画面；
+# 与上一次推理的帧(而不是相邻帧)比较，缓慢的累积变化最终也会触发推理
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+def motion_thumbnail(frame: np.ndarray, size: int = 64) -> np.ndarray:
+    """
+    把帧缩小为size x size的灰度图，用于计算帧间变化
+
+    Args:
+        frame (np.ndarray): BGR或灰度帧
+        size (int): 缩略图边长
+    Returns:
+        np.ndarray: (size, size) float32灰度图，取值0-1
+    """
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # INTER_AREA按区域取平均，缩小的同时抑制了传感器噪声
+    thumb = cv2.resize(frame, (size, size), interpolation=cv2.INTER_AREA)
+    return thumb.astype(np.float32) / 255.0
+
+
+def motion_score(a: np.ndarray, b: np.ndarray) -> float:
+    """两张缩略图的平均绝对像素差(0-1)"""
+    return float(np.abs(a - b).mean())
+
+
+class MotionGate:
+    """
+    决定某一帧是否需要运行模型
+    画面变化低于阈值且距上次推理不超过max_staleness帧时跳过推理，复用上次的检测结果
+    """
+
+    def __init__(self, threshold: float, max_staleness: int = 30, size: int = 64):
+        """
+        Args:
+            threshold (float): 平均像素差(0-1)低于该值视为静止画面，0表示不启用门控
+            max_staleness (int): 检测结果最多复用多少帧，超过后强制运行一次模型
+            size (int): 计算变化时使用的缩略图边长
+        """
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.size = size
+        self._reference: Optional[np.ndarray] = None  # 上一次运行模型的帧的缩略图
+        self._reference_index = 0  # 上一次运行模型的帧序号
+
+    def should_infer(self, index: int, frame: np.ndarray) -> bool:
+        """
+        判断第index帧是否需要运行模型，需要时把该帧记为新的参照帧
+
+        Args:
+            index (int): 帧序号(递增)
+            frame (np.ndarray): 当前帧
+        Returns:
+            bool: True表示运行模型，False表示复用上一次的检测结果
+        """
+        if self.threshold <= 0:
+            return True
+        thumb = motion_thumbnail(frame, self.size)
+        if (
+            self._reference is not None
+            and index - self._reference_index < self.max_staleness
+            and motion_score(thumb, self._reference) < self.threshold
+        ):
+            return False
+        self._reference = thumb
+        self._reference_index = index
+        return True
@@ -0,0 +1,167 @@
+# ONNX Runtime推理后端：把.pt模型导出为ONNX并缓存，在CPU上用onnxruntime推理
+# 对外提供与ultralytics.YOLO.predict相同的调用方式和返回结构(Results列表)，
+# Detector.predict_batch、视频流水线和路由都不需要区分后端
+import ast
+import os
+import shutil
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+
+def export_onnx(pt_path: str, cache_dir: str, imgsz: int = 640) -> str:
+    """
+    把.pt模型导出为ONNX文件，已导出且不比.pt旧时直接复用缓存
+
+    Args:
+        pt_path (str): .pt模型文件路径
+        cache_dir (str): 导出文件的缓存目录
+        imgsz (int): 导出时的参考输入尺寸(动态输入，推理时可使用其他尺寸)
+    Returns:
+        str: ONNX文件路径
+    """
+    onnx_path = os.path.join(cache_dir, f"{Path(pt_path).stem}.onnx")
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(
+        pt_path
+    ):
+        return onnx_path
+
+    from ultralytics import YOLO
+
+    print(f"正在导出ONNX模型: {pt_path}")
+    # dynamic=True：批大小和输入宽高可变，与PyTorch路径一样按最小矩形letterbox
+    # simplify=False：不依赖onnxslim
+    exported = YOLO(pt_path).export(
+        format="onnx", imgsz=imgsz, dynamic=True, simplify=False, verbose=False
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    # ultralytics导出到.pt同目录，移动到缓存目录，避免与models_dir中的模型混在一起
+    shutil.move(str(exported), onnx_path)
+    print(f"ONNX模型已缓存: {onnx_path}")
+    return onnx_path
+
+
+class OnnxYOLO:
+    """
+    基于onnxruntime的YOLO检测模型
+    预处理(letterbox)和后处理(NMS、坐标还原)与ultralytics的PyTorch路径一致，
+    predict返回ultralytics的Results对象列表
+    """
+
+    stride = 32  # YOLO检测模型的最大下采样倍数，letterbox后的宽高需是它的整数倍
+
+    def __init__(self, onnx_path: str, intra_op_threads: int = 0, inter_op_threads: int = 0):
+        """
+        Args:
+            onnx_path (str): ONNX模型文件路径
+            intra_op_threads (int): 单个算子内部的并行线程数，0表示由onnxruntime决定
+            inter_op_threads (int): 算子之间的并行线程数，0表示由onnxruntime决定
+        """
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        self.path = onnx_path
+        self.session = onnxruntime.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        # ultralytics导出时把类别名称写在模型元数据中
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        if "stride" in metadata:
+            self.stride = int(metadata["stride"])
+
+    def predict(
+        self,
+        source,
+        conf: float = 0.25,
+        imgsz: int = 640,
+        iou: float = 0.7,
+        max_det: int = 300,
+        stream: bool = False,
+        **kwargs,
+    ):
+        """
+        与YOLO.predict相同的调用方式，device/batch/verbose等参数被忽略(固定为CPU，整批一次前向)
+
+        Args:
+            source: 单张图像(路径或BGR数组)或图像列表
+            conf (float): 置信度阈值
+            imgsz (int): 推理尺寸
+            iou (float): NMS的IoU阈值(与ultralytics默认值一致)
+            max_det (int): 每张图像最多保留的检测框数量
+            stream (bool): 为True时逐张推理并返回生成器，与YOLO.predict(stream=True)一致
+        Returns:
+            list: 每张图像对应一个ultralytics.engine.results.Results
+        """
+        if stream:
+            sources = source if isinstance(source, list) else [source]
+            return (self.predict(s, conf, imgsz, iou, max_det)[0] for s in sources)
+
+        import torch
+        from ultralytics.engine.results import Results
+        from ultralytics.utils import ops
+
+        try:
+            from ultralytics.utils.nms import non_max_suppression
+        except ImportError:  # 较早的8.3.x版本中NMS位于ultralytics.utils.ops
+            non_max_suppression = ops.non_max_suppression
+
+        sources = source if isinstance(source, list) else [source]
+        paths = [s if isinstance(s, str) else "" for s in sources]
+        images = [cv2.imread(s) if isinstance(s, str) else s for s in sources]
+
+        batch = self.preprocess(images, imgsz)
+        preds = self.session.run(None, {self.input_name: batch})[0]
+        preds = non_max_suppression(
+            torch.from_numpy(preds), conf, iou, max_det=max_det
+        )
+
+        results = []
+        for pred, image, path in zip(preds, images, paths):
+            pred[:, :4] = ops.scale_boxes(batch.shape[2:], pred[:, :4], image.shape)
+            results.append(Results(image, path=path, names=self.names, boxes=pred))
+        return results
+
+    def preprocess(self, images: List[np.ndarray], imgsz: int) -> np.ndarray:
+        """letterbox缩放、BGR转RGB、HWC转CHW并归一化，得到(N, 3, H, W)的float32数组"""
+        from ultralytics.data.augment import LetterBox
+
+        # 与PyTorch路径相同：同尺寸的一批图像按最小矩形填充，否则填充为正方形
+        same_shapes = len({image.shape for image in images}) == 1
+        letterbox = LetterBox(imgsz, auto=same_shapes, stride=self.stride)
+        batch = np.stack([letterbox(image=image) for image in images])
+        batch = batch[..., ::-1].transpose((0, 3, 1, 2))  # BGR转RGB，BHWC转BCHW
+        return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def load_onnx_model(
+    model_path: str,
+    cache_dir: str,
+    imgsz: int = 640,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+) -> OnnxYOLO:
+    """
+    加载ONNX模型，传入.pt时先导出(或复用已缓存的导出文件)
+
+    Args:
+        model_path (str): .pt或.onnx模型文件路径
+        cache_dir (str): .pt导出为ONNX时的缓存目录
+        imgsz (int): 导出时的参考输入尺寸
+        intra_op_threads (int): onnxruntime算子内部并行线程数
+        inter_op_threads (int): onnxruntime算子之间并行线程数
+    Returns:
+        OnnxYOLO: 可直接用于Detector.predict_batch的模型
+    """
+    onnx_path = model_path
+    if not model_path.endswith(".onnx"):
+        onnx_path = export_onnx(model_path, cache_dir, imgsz)
+    return OnnxYOLO(onnx_path, intra_op_threads, inter_op_threads)
@@ -0,0 +1,383 @@
+# INT8量化工具：把models_dir中的模型量化为CPU上运行的INT8 ONNX变体，
+# 在本地验证集上对比FP32原模型的mAP和单张延迟，精度下降超过阈值的变体会被拒绝
+#
+# 用法(在services/backend目录下):
+#   python -m src.yolo.quantize yolo11n.pt --mode dynamic --val-dir data/val
+#   python -m src.yolo.quantize yolo11n.pt --mode static --calib-dir data/calib --val-dir data/val
+#
+# 验证集目录结构与YOLO数据集一致：images/下是图片，labels/下是同名的.txt标注
+# (每行"类别 cx cy w h"，坐标为0-1归一化值)；没有labels/时以FP32模型的检测结果作为参考标注
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from src.yolo.detector import DetectorCOnfig
+from src.yolo.onnx_backend import OnnxYOLO, export_onnx
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def list_images(folder: str) -> List[str]:
+    """列出目录中的图片文件(按文件名排序)"""
+    return sorted(
+        os.path.join(folder, f)
+        for f in os.listdir(folder)
+        if f.lower().endswith(IMAGE_SUFFIXES)
+    )
+
+
+def variant_path(models_dir: str, model_path: str, mode: str) -> str:
+    """量化变体的保存路径，如 yolo11n.pt -> models_dir/yolo11n-int8-dynamic.onnx"""
+    return os.path.join(models_dir, f"{Path(model_path).stem}-int8-{mode}.onnx")
+
+
+def report_path(onnx_path: str) -> str:
+    """量化报告与变体同名，扩展名为.json"""
+    return os.path.splitext(onnx_path)[0] + ".json"
+
+
+class ImageCalibrationReader:
+    """
+    静态量化的校准数据：逐张读取本地图片，按推理时的方式预处理后交给onnxruntime统计激活值范围
+    """
+
+    def __init__(self, model: OnnxYOLO, folder: str, imgsz: int, limit: int = 100):
+        """
+        Args:
+            model (OnnxYOLO): FP32模型，用于取得输入名称和预处理方式
+            folder (str): 校准图片目录
+            imgsz (int): 推理尺寸
+            limit (int): 最多使用的图片数量
+        """
+        self.model = model
+        self.imgsz = imgsz
+        self.paths = iter(list_images(folder)[:limit])
+
+    def get_next(self) -> Optional[dict]:
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            return {self.model.input_name: self.model.preprocess([image], self.imgsz)}
+        return None
+
+    def rewind(self):
+        pass
+
+
+def quantize_model(
+    model_path: str,
+    output_path: str,
+    mode: str = "dynamic",
+    calib_dir: Optional[str] = None,
+    config: Optional[DetectorCOnfig] = None,
+) -> str:
+    """
+    生成INT8量化变体
+    只量化卷积层，检测头的框解码(DFL、坐标换算)保持FP32，避免坐标精度损失
+
+    Args:
+        model_path (str): .pt或FP32 .onnx模型路径
+        output_path (str): 量化模型的保存路径
+        mode (str): "dynamic"(运行时计算激活值范围，无需校准数据)或"static"(用校准图片预先统计)
+        calib_dir (str): 静态量化的校准图片目录
+        config (DetectorCOnfig): 检测器配置(ONNX缓存目录、推理尺寸)
+    Returns:
+        str: 量化模型路径
+    """
+    from onnxruntime.quantization import (
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+
+    config = config or DetectorCOnfig()
+    fp32_path = model_path
+    if not model_path.endswith(".onnx"):
+        fp32_path = export_onnx(model_path, config.onnx_cache_dir, config.default_imgsz)
+
+    print(f"正在量化模型({mode}): {fp32_path} -> {output_path}")
+    if mode == "dynamic":
+        quantize_dynamic(
+            fp32_path,
+            output_path,
+            op_types_to_quantize=["Conv"],
+            weight_type=QuantType.QUInt8,
+        )
+    elif mode == "static":
+        if not calib_dir or not list_images(calib_dir):
+            raise ValueError("Static quantization needs a folder of calibration images")
+        reader = ImageCalibrationReader(
+            OnnxYOLO(fp32_path), calib_dir, config.default_imgsz
+        )
+        quantize_static(
+            fp32_path,
+            output_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            op_types_to_quantize=["Conv"],
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    return output_path
+
+
+def load_labels(label_path: str, width: int, height: int) -> np.ndarray:
+    """
+    读取YOLO格式标注并转换为像素坐标
+
+    Returns:
+        np.ndarray: (N, 5)，每行为 类别, x1, y1, x2, y2
+    """
+    if not os.path.exists(label_path):
+        return np.zeros((0, 5))
+    rows = np.loadtxt(label_path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros((0, 5))
+    cls, cx, cy, w, h = rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    return np.stack(
+        [
+            cls,
+            (cx - w / 2) * width,
+            (cy - h / 2) * height,
+            (cx + w / 2) * width,
+            (cy + h / 2) * height,
+        ],
+        axis=1,
+    )
+
+
+def match_predictions(preds: np.ndarray, labels: np.ndarray, iouv: np.ndarray) -> np.ndarray:
+    """
+    按IoU阈值把预测框与标注框一一匹配(与ultralytics验证器的贪心匹配一致)
+
+    Args:
+        preds (np.ndarray): (D, 6) 预测框 x1, y1, x2, y2, 置信度, 类别
+        labels (np.ndarray): (L, 5) 标注框 类别, x1, y1, x2, y2
+        iouv (np.ndarray): IoU阈值列表
+    Returns:
+        np.ndarray: (D, len(iouv)) 每个预测框在各IoU阈值下是否正确
+    """
+    import torch
+    from ultralytics.utils.metrics import box_iou
+
+    correct = np.zeros((len(preds), len(iouv)), dtype=bool)
+    if len(preds) == 0 or len(labels) == 0:
+        return correct
+    iou = box_iou(
+        torch.from_numpy(labels[:, 1:]).float(), torch.from_numpy(preds[:, :4]).float()
+    ).numpy()
+    iou = iou * (labels[:, 0:1] == preds[:, 5])  # 类别不同的框不能匹配
+    for i, threshold in enumerate(iouv):
+        matches = np.array(np.nonzero(iou >= threshold)).T
+        if matches.shape[0]:
+            if matches.shape[0] > 1:
+                matches = matches[iou[matches[:, 0], matches[:, 1]].argsort()[::-1]]
+                matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+                matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+            correct[matches[:, 1].astype(int), i] = True
+    return correct
+
+
+def evaluate(
+    model: OnnxYOLO,
+    val_dir: str,
+    imgsz: int = 640,
+    reference: Optional[OnnxYOLO] = None,
+) -> dict:
+    """
+    在本地验证集上计算mAP和单张推理延迟
+
+    Args:
+        model (OnnxYOLO): 待评估的模型
+        val_dir (str): 验证集目录(images/和可选的labels/)
+        imgsz (int): 推理尺寸
+        reference (OnnxYOLO): 没有labels/时用它的检测结果(置信度>=0.25)作为参考标注
+    Returns:
+        dict: map50、map50_95、单张平均延迟latency_ms和图片数量
+    """
+    from ultralytics.utils.metrics import ap_per_class
+
+    image_dir = os.path.join(val_dir, "images")
+    label_dir = os.path.join(val_dir, "labels")
+    use_labels = os.path.isdir(label_dir) or reference is None
+    iouv = np.linspace(0.5, 0.95, 10)
+    stats = {"tp": [], "conf": [], "pred_cls": [], "target_cls": []}
+    latencies = []
+
+    for path in list_images(image_dir):
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        if not latencies:
+            model.predict(image, conf=0.001, imgsz=imgsz)  # 预热，不计入延迟
+        start = time.perf_counter()
+        result = model.predict(image, conf=0.001, imgsz=imgsz)[0]
+        latencies.append(time.perf_counter() - start)
+
+        if use_labels:
+            label_path = os.path.join(label_dir, f"{Path(path).stem}.txt")
+            labels = load_labels(label_path, image.shape[1], image.shape[0])
+        else:
+            ref = reference.predict(image, conf=0.25, imgsz=imgsz)[0].boxes.data.numpy()
+            labels = np.concatenate([ref[:, 5:6], ref[:, :4]], axis=1)
+
+        preds = result.boxes.data.numpy()
+        stats["tp"].append(match_predictions(preds, labels, iouv))
+        stats["conf"].append(preds[:, 4])
+        stats["pred_cls"].append(preds[:, 5])
+        stats["target_cls"].append(labels[:, 0])
+
+    if not latencies:
+        raise ValueError(f"No validation images found in {image_dir}")
+    stats = {k: np.concatenate(v, axis=0) for k, v in stats.items()}
+    map50 = map50_95 = 0.0
+    if len(stats["target_cls"]):
+        ap = ap_per_class(
+            stats["tp"], stats["conf"], stats["pred_cls"], stats["target_cls"]
+        )[5]
+        map50, map50_95 = float(ap[:, 0].mean()), float(ap.mean())
+    return {
+        "map50": round(map50, 4),
+        "map50_95": round(map50_95, 4),
+        "latency_ms": round(float(np.mean(latencies)) * 1000, 2),
+        "images": len(latencies),
+        "reference": "labels" if use_labels else "fp32",
+    }
+
+
+def build_variant(
+    model_name: str,
+    mode: str = "dynamic",
+    val_dir: Optional[str] = None,
+    calib_dir: Optional[str] = None,
+    max_map_drop: Optional[float] = None,
+    config: Optional[DetectorCOnfig] = None,
+    min_speedup: Optional[float] = None,
+) -> dict:
+    """
+    量化 -> 评估 -> 精度和速度门禁
+    通过门禁的变体保存在models_dir中(/yolo/available_models会列出它，可按文件名选择或切换)，
+    未通过的变体会被删除
+
+    Args:
+        model_name (str): models_dir中的模型文件名(如'yolo11n.pt')
+        mode (str): "dynamic"或"static"
+        val_dir (str): 验证集目录
+        calib_dir (str): 静态量化的校准图片目录
+        max_map_drop (float): 允许的mAP50-95最大下降值，默认使用配置中的值
+        config (DetectorCOnfig): 检测器配置
+        min_speedup (float): INT8相对FP32的最低加速比(FP32延迟/INT8延迟)，默认使用配置中的值
+    Returns:
+        dict: 量化报告(同时保存为变体同名的.json文件)
+    """
+    config = config or DetectorCOnfig()
+    if max_map_drop is None:
+        max_map_drop = config.quantization_max_map_drop
+    if min_speedup is None:
+        min_speedup = config.quantization_min_speedup
+    source_path = os.path.join(config.models_dir, os.path.basename(model_name))
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Model file not found at {source_path}")
+
+    output_path = variant_path(config.models_dir, source_path, mode)
+    quantize_model(source_path, output_path, mode, calib_dir, config)
+
+    fp32_path = source_path
+    if not source_path.endswith(".onnx"):
+        fp32_path = export_onnx(source_path, config.onnx_cache_dir, config.default_imgsz)
+    fp32 = OnnxYOLO(fp32_path, config.onnx_intra_op_threads, config.onnx_inter_op_threads)
+    int8 = OnnxYOLO(output_path, config.onnx_intra_op_threads, config.onnx_inter_op_threads)
+
+    report = {
+        "model": os.path.basename(output_path),
+        "source": os.path.basename(source_path),
+        "mode": mode,
+        "max_map_drop": max_map_drop,
+        "min_speedup": min_speedup,
+        "size_mb": round(os.path.getsize(output_path) / 1024 / 1024, 2),
+        "fp32_size_mb": round(os.path.getsize(fp32_path) / 1024 / 1024, 2),
+    }
+    if val_dir:
+        # 没有标注时两者都以FP32的检测结果为参考，map_drop即为INT8相对FP32的一致性损失
+        report["fp32"] = evaluate(fp32, val_dir, config.default_imgsz, reference=fp32)
+        report["int8"] = evaluate(int8, val_dir, config.default_imgsz, reference=fp32)
+        report["map_drop"] = round(
+            report["fp32"]["map50_95"] - report["int8"]["map50_95"], 4
+        )
+        report["speedup"] = round(
+            report["fp32"]["latency_ms"] / report["int8"]["latency_ms"], 2
+        )
+        # 精度损失过大或没有变快的变体都没有意义，记录拒绝原因
+        reasons = []
+        if report["map_drop"] > max_map_drop:
+            reasons.append(
+                f"mAP50-95 drop {report['map_drop']} exceeds {max_map_drop}"
+            )
+        fp32_latency = report["fp32"]["latency_ms"]
+        if report["int8"]["latency_ms"] > fp32_latency / min_speedup:
+            reasons.append(
+                f"speedup {report['speedup']}x is below {min_speedup}x"
+            )
+        report["accepted"] = not reasons
+        report["rejected_reasons"] = reasons
+    else:
+        # 没有验证集无法评估精度，不登记该变体
+        report["accepted"] = False
+        report["error"] = "No validation set given"
+        report["rejected_reasons"] = [report["error"]]
+
+    if report["accepted"]:
+        with open(report_path(output_path), "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"量化变体已登记: {output_path}")
+    else:
+        os.remove(output_path)
+        print(
+            f"量化变体未通过门禁，已删除: {output_path} "
+            f"({'; '.join(report['rejected_reasons'])})"
+        )
+    return report
+
+
+def load_reports(models_dir: str) -> List[dict]:
+    """读取models_dir中已登记的量化变体报告"""
+    reports = []
+    for f in sorted(os.listdir(models_dir)):
+        path = os.path.join(models_dir, f)
+        if f.endswith(".json") and os.path.exists(os.path.splitext(path)[0] + ".onnx"):
+            with open(path) as fp:
+                reports.append(json.load(fp))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="构建INT8量化模型变体")
+    parser.add_argument("model", help="models_dir中的模型文件名，如yolo11n.pt")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="dynamic")
+    parser.add_argument("--val-dir", help="验证集目录(images/和可选的labels/)")
+    parser.add_argument("--calib-dir", help="静态量化的校准图片目录")
+    parser.add_argument("--max-map-drop", type=float, help="允许的mAP50-95最大下降值")
+    parser.add_argument("--min-speedup", type=float, help="相对FP32的最低加速比")
+    args = parser.parse_args()
+
+    result = build_variant(
+        args.model,
+        args.mode,
+        args.val_dir,
+        args.calib_dir,
+        args.max_map_drop,
+        min_speedup=args.min_speedup,
+    )
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    raise SystemExit(0 if result["accepted"] else 1)
@@ -0,0 +1,80 @@
+# 检测器就绪状态：区分"进程已启动"和"模型已就绪"，并记录冷启动耗时
+import threading
+import time
+from typing import Optional
+
+# 本模块在应用导入早期被导入，以此近似进程开始提供服务前的起点
+PROCESS_STARTED_AT = time.time()
+
+
+class DetectorReadiness:
+    """
+    在后台线程中加载默认模型并预热，记录各阶段耗时
+    状态: starting(尚未开始) -> loading(加载/预热中) -> ready 或 failed
+    """
+
+    def __init__(self, started_at: float = PROCESS_STARTED_AT):
+        """
+        Args:
+            started_at (float): 冷启动计时起点(时间戳)
+        """
+        self.started_at = started_at
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None  # 模型加载耗时
+        self.warmup_seconds: Optional[float] = None  # 预热推理耗时
+        self.cold_start_seconds: Optional[float] = None  # 从进程启动到模型就绪的总耗时
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self, detector) -> threading.Thread:
+        """
+        启动后台加载线程，立即返回，应用可以先处理不需要模型的请求
+
+        Args:
+            detector: 以lazy=True创建的Detector实例
+        Returns:
+            threading.Thread: 后台加载线程
+        """
+        if self._thread is None:
+            self.status = "loading"
+            self._thread = threading.Thread(
+                target=self._load, args=(detector,), name="yolo-startup", daemon=True
+            )
+            self._thread.start()
+        return self._thread
+
+    def _load(self, detector):
+        try:
+            load_start = time.time()
+            detector.load_model()
+            self.load_seconds = time.time() - load_start
+            self.warmup_seconds = detector.warmup()
+            self.cold_start_seconds = time.time() - self.started_at
+            self.status = "ready"
+            print(
+                f"模型已就绪: 加载{self.load_seconds:.2f}s, 预热{self.warmup_seconds:.2f}s, "
+                f"冷启动共{self.cold_start_seconds:.2f}s"
+            )
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            print(f"模型加载失败: {e}")
+
+    def to_dict(self) -> dict:
+        """转换为接口返回的字典"""
+
+        def rounded(value):
+            return None if value is None else round(value, 3)
+
+        return {
+            "status": self.status,
+            "error": self.error,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "load_seconds": rounded(self.load_seconds),
+            "warmup_seconds": rounded(self.warmup_seconds),
+            "cold_start_seconds": rounded(self.cold_start_seconds),
+        }
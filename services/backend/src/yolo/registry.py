@@ -0,0 +1,207 @@
+# 模型注册表：按需加载多个YOLO模型，按内存预算进行LRU淘汰
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class LoadedModel:
+    """注册表中的一个已加载模型"""
+
+    path: str  # 模型文件路径，作为注册表的键
+    model: Any  # 模型实例(例如ultralytics.YOLO)
+    size_bytes: int  # 估算的内存占用
+    lock: threading.Lock = field(default_factory=threading.Lock)  # 同一模型的推理需串行
+    refs: int = 0  # 正在使用该模型的请求数，大于0时不会被淘汰
+    discard: bool = False  # 标记为待卸载：最后一个使用者归还后立即卸载
+
+    @property
+    def name(self) -> str:
+        """模型名称(不含扩展名)"""
+        return Path(self.path).stem
+
+
+class ModelRegistry:
+    """
+    多模型注册表
+    1.第一次使用某个模型时才加载(懒加载)，同一模型的并发首次请求只加载一次
+    2.使用中的模型通过引用计数保护，不会被淘汰
+    3.已加载模型的总内存超过预算时，淘汰最久未使用且空闲的模型
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        memory_budget_bytes: int,
+        size_of: Optional[Callable[[str, Any], int]] = None,
+    ):
+        """
+        Args:
+            loader (Callable): 根据模型路径加载模型实例的函数
+            memory_budget_bytes (int): 已加载模型的总内存预算(字节)
+            size_of (Callable): 估算模型内存占用的函数，默认使用模型文件大小
+        """
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.size_of = size_of or (lambda path, model: os.path.getsize(path))
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}  # 正在加载中的模型
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        """已加载模型的估算总内存"""
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def is_loaded(self, path: str) -> bool:
+        return path in self._models
+
+    def loaded(self) -> List[dict]:
+        """
+        列出当前已加载的模型，按最近使用时间从旧到新排列
+        """
+        with self._lock:
+            return [
+                {
+                    "name": os.path.basename(entry.path),
+                    "size_mb": round(entry.size_bytes / 1024 / 1024, 1),
+                    "in_use": entry.refs,
+                }
+                for entry in self._models.values()
+            ]
+
+    def acquire(self, path: str) -> LoadedModel:
+        """
+        获取模型并增加引用计数，模型未加载时在当前线程中加载
+        使用完毕后必须调用release(推荐使用lease上下文管理器)
+
+        Args:
+            path (str): 模型文件路径
+        Returns:
+            LoadedModel: 已加载的模型
+        """
+        while True:
+            with self._lock:
+                entry = self._models.get(path)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.discard = False  # 又有请求使用，取消待卸载标记
+                    self._models.move_to_end(path)  # 标记为最近使用
+                    return entry
+                loading = self._loading.get(path)
+                if loading is None:
+                    loading = self._loading[path] = threading.Event()
+                    break  # 由当前线程负责加载
+            # 其他线程正在加载同一个模型，等待其完成后重新查找
+            loading.wait()
+
+        try:
+            model = self.loader(path)
+            entry = LoadedModel(
+                path=path, model=model, size_bytes=self.size_of(path, model), refs=1
+            )
+            with self._lock:
+                self._models[path] = entry
+                self._evict()
+            return entry
+        finally:
+            with self._lock:
+                self._loading.pop(path, None)
+            loading.set()
+
+    def release(self, entry: LoadedModel):
+        """
+        归还模型，引用计数归零后该模型可以被淘汰
+        """
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs == 0 and entry.discard:
+                self._remove(entry)
+            self._evict()
+
+    def discard(self, path: str):
+        """
+        卸载模型：空闲时立即卸载，仍在使用时等最后一个使用者归还后卸载
+
+        Args:
+            path (str): 模型文件路径
+        """
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is None:
+                return
+            if entry.refs == 0:
+                self._remove(entry)
+            else:
+                entry.discard = True
+
+    def _remove(self, entry: LoadedModel):
+        """从注册表中移除模型(调用方需持有锁)"""
+        if self._models.get(entry.path) is entry:
+            del self._models[entry.path]
+            print(f"卸载模型: {entry.name}")
+
+    @contextmanager
+    def lease(self, path: str):
+        """
+        上下文管理器形式的acquire/release
+
+        Yields:
+            LoadedModel: 已加载的模型
+        """
+        entry = self.acquire(path)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def _evict(self):
+        """超出内存预算时，从最久未使用的一端淘汰空闲模型(调用方需持有锁)"""
+        for path in list(self._models):
+            if self.total_bytes <= self.memory_budget_bytes:
+                break
+            entry = self._models[path]
+            if entry.refs > 0:
+                continue  # 正在使用中，跳过
+            print(f"模型内存超出预算，按LRU淘汰: {entry.name}")
+            self._remove(entry)
+
+
+class SwapStatus(str, Enum):
+    """默认模型切换状态枚举"""
+
+    LOADING = "loading"
+    READY = "ready"  # 已加载并切换为默认模型
+    FAILED = "failed"
+    SUPERSEDED = "superseded"  # 加载期间又发起了新的切换，本次结果被放弃
+
+
+@dataclass
+class ModelSwap:
+    """一次后台模型切换的状态句柄"""
+
+    id: str
+    model: str  # 目标模型文件名
+    status: SwapStatus = SwapStatus.LOADING
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """转换为接口返回的字典"""
+        load_seconds = None
+        if self.finished_at is not None:
+            load_seconds = round(self.finished_at - self.started_at, 3)
+        return {
+            "swap_id": self.id,
+            "model": self.model,
+            "status": self.status.value,
+            "error": self.error,
+            "load_seconds": load_seconds,
+        }
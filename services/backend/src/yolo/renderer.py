@@ -0,0 +1,130 @@
+# 检测结果绘制：图片和视频共用的标注渲染器
+# 1.每帧的检测框、置信度、类别一次性转换为NumPy数组，不再逐框访问张量
+# 2.类别颜色来自固定调色板，同一类别在所有图片/视频、所有进程中颜色一致
+# 3.标签文字尺寸按文本缓存，拥挤场景中不再为相同的标签反复测量
+from functools import lru_cache
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from src.yolo.detections import boxes_array, track_ids
+
+# 固定的类别调色板(BGR)，类别ID按调色板长度取模
+PALETTE = (
+    (56, 56, 255),
+    (151, 157, 255),
+    (31, 112, 255),
+    (29, 178, 255),
+    (49, 210, 207),
+    (10, 249, 72),
+    (23, 204, 146),
+    (134, 219, 61),
+    (52, 147, 26),
+    (187, 212, 0),
+    (168, 153, 44),
+    (255, 194, 0),
+    (147, 69, 52),
+    (255, 115, 100),
+    (236, 24, 0),
+    (255, 56, 132),
+    (133, 0, 82),
+    (255, 56, 203),
+    (200, 149, 255),
+    (199, 55, 255),
+)
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.5
+TEXT_COLOR = (255, 255, 255)  # 标签文字颜色(白色，画在类别颜色的底色上)
+
+
+def class_color(class_id: int) -> Tuple[int, int, int]:
+    """类别ID对应的固定颜色(BGR)"""
+    return PALETTE[class_id % len(PALETTE)]
+
+
+@lru_cache(maxsize=4096)
+def text_size(text: str, thickness: int = 1) -> Tuple[int, int, int]:
+    """
+    测量标签文字尺寸(带缓存)
+
+    Returns:
+        tuple: 宽度、高度、基线偏移
+    """
+    (w, h), baseline = cv2.getTextSize(text, FONT, FONT_SCALE, thickness)
+    return w, h, baseline
+
+
+def draw_detections(
+    image: np.ndarray,
+    result,
+    conf_threshold: float = 0.0,
+    line_width: int = 2,
+    labels: bool = True,
+) -> np.ndarray:
+    """
+    在图像上原地绘制检测框和标签
+
+    Args:
+        image (np.ndarray): BGR图像(会被原地修改)
+        result: 该图像的检测结果
+        conf_threshold (float): 只绘制置信度不低于该值的检测框
+        line_width (int): 检测框线宽
+        labels (bool): 是否绘制"类别 置信度"标签(跟踪结果前面加"#轨迹ID")
+    Returns:
+        np.ndarray: 绘制后的图像(与传入的image是同一个对象)
+    """
+    data = boxes_array(result)
+    keep = data[:, 4] >= conf_threshold
+    data = data[keep]
+    if len(data) == 0:
+        return image
+    ids = track_ids(result)
+    prefixes = [""] * len(data) if ids is None else [f"#{i} " for i in ids[keep]]
+
+    height, width = image.shape[:2]
+    xyxy = data[:, :4].round().astype(np.int32)
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width - 1)
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height - 1)
+    confs = data[:, 4].tolist()
+    class_ids = data[:, 5].astype(np.int32).tolist()
+    names = result.names
+    text_thickness = max(line_width - 1, 1)
+
+    for (x1, y1, x2, y2), conf, class_id, prefix in zip(
+        xyxy.tolist(), confs, class_ids, prefixes
+    ):
+        color = class_color(class_id)
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, line_width)
+        if not labels:
+            continue
+        label = f"{prefix}{names[class_id]} {conf:.2f}"
+        w, h, baseline = text_size(label, text_thickness)
+        # 标签放在框的上方，靠近图像顶部时放到框内
+        top = y1 - h - baseline - 2 if y1 - h - baseline - 2 >= 0 else y1
+        cv2.rectangle(image, (x1, top), (x1 + w, top + h + baseline + 2), color, -1)
+        cv2.putText(
+            image,
+            label,
+            (x1, top + h + 1),
+            FONT,
+            FONT_SCALE,
+            TEXT_COLOR,
+            text_thickness,
+            cv2.LINE_AA,
+        )
+    return image
+
+
+def render_result(result, conf_threshold: float = 0.0) -> np.ndarray:
+    """
+    在原图的副本上绘制检测结果，替代result.plot()
+
+    Args:
+        result: 检测结果(orig_img为原图)
+        conf_threshold (float): 只绘制置信度不低于该值的检测框
+    Returns:
+        np.ndarray: 绘制后的图像
+    """
+    return draw_detections(result.orig_img.copy(), result, conf_threshold)
@@ -0,0 +1,245 @@
+# 推理微批调度器：把并发到达的图片请求合并成一次批量推理
+import asyncio
+import queue  # 线程安全的队列
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from src.yolo.executor import InferenceExecutor, QueueFullError
+
+
+@dataclass
+class _BatchItem:
+    """调度队列中的单个待推理条目"""
+
+    source: Any  # 图像路径或图像数组
+    conf_threshold: float
+    model_path: Optional[str]  # 使用的模型路径，None表示默认模型
+    imgsz: Optional[int] = None  # 推理尺寸(长边)
+    future: Future = field(default_factory=Future)  # 推理完成后由调度线程写入结果
+
+
+class BatchScheduler:
+    """
+    微批调度器
+    所有请求共享同一个Detector，调度线程在max_wait_ms内(或凑满max_batch_size张)
+    收集并发到达的图片，合并为一次model.predict调用，再把结果分发回各自的调用方。
+    如果提供了executor，合并后的批次交给推理线程池执行，等待中的图片数量受
+    max_queue_size限制，超出时直接拒绝(QueueFullError)。
+    """
+
+    def __init__(
+        self,
+        detector,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        executor: Optional[InferenceExecutor] = None,
+        max_queue_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            detector: 共享的Detector实例
+            max_batch_size (int): 单批最大图片数，默认使用detector配置
+            max_wait_ms (float): 收集请求的最长等待时间(毫秒)，默认使用detector配置
+            executor (InferenceExecutor): 执行批量推理的线程池，None表示在调度线程内直接推理
+            max_queue_size (int): 允许等待调度的图片数量上限，默认使用detector配置
+        """
+        self.detector = detector
+        self.max_batch_size = max_batch_size or detector.config.batch_max_size
+        self.max_wait = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else detector.config.batch_max_wait_ms
+        ) / 1000.0
+        self.executor = executor
+        self.max_queue_size = max_queue_size or detector.config.batch_max_queue_size
+        self._queue: "queue.Queue[Optional[_BatchItem]]" = queue.Queue()
+        self._admit_lock = threading.Lock()  # 保证"检查余量+入队"是原子的
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """等待调度的图片数量"""
+        return self._queue.qsize()
+
+    def start(self):
+        """启动调度线程(重复调用无副作用)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="yolo-batch-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """停止调度线程，已入队的请求会先处理完"""
+        if self._thread is None:
+            return
+        self._queue.put(None)  # None作为停止信号
+        self._thread.join()
+        self._thread = None
+
+    def submit(
+        self,
+        source: Any,
+        conf_threshold: float = None,
+        model_path: str = None,
+        imgsz: int = None,
+    ) -> Future:
+        """
+        提交单张图片，返回一个Future，推理完成后可从中取出该图片的检测结果
+
+        Args:
+            source: 图像路径或图像数组
+            conf_threshold (float): 置信度阈值
+            model_path (str): 使用的模型路径，默认使用默认模型
+            imgsz (int): 推理尺寸，默认使用配置中的值
+        Returns:
+            Future: 结果为该图片对应的检测结果
+        Raises:
+            QueueFullError: 等待调度的图片已达上限
+        """
+        return self.submit_many([source], conf_threshold, model_path, imgsz)[0]
+
+    def submit_many(
+        self,
+        sources: List[Any],
+        conf_threshold: float = None,
+        model_path: str = None,
+        imgsz: int = None,
+    ) -> list:
+        """
+        一次性提交多张图片：要么全部入队，要么全部拒绝，避免请求只被处理一半
+
+        Returns:
+            list: 与sources顺序一致的Future列表
+        Raises:
+            QueueFullError: 剩余队列空间不足以容纳全部图片
+        """
+        self.start()
+        conf_threshold = conf_threshold or self.detector.config.default_conf_threshold
+        imgsz = imgsz or self.detector.config.default_imgsz
+        items = [
+            _BatchItem(
+                source=s,
+                conf_threshold=conf_threshold,
+                model_path=model_path,
+                imgsz=imgsz,
+            )
+            for s in sources
+        ]
+        with self._admit_lock:
+            if self.pending + len(items) > self.max_queue_size:
+                raise QueueFullError(
+                    f"Batch queue is full ({self.pending}/{self.max_queue_size})"
+                )
+            for item in items:
+                self._queue.put(item)
+        return [item.future for item in items]
+
+    async def detect(
+        self,
+        sources: List[Any],
+        conf_threshold: float = None,
+        model_path: str = None,
+        imgsz: int = None,
+    ) -> list:
+        """
+        异步接口：提交多张图片并等待全部结果，不阻塞事件循环
+
+        Args:
+            sources (list): 图像路径或图像数组列表
+            conf_threshold (float): 置信度阈值
+            model_path (str): 使用的模型路径，默认使用默认模型
+            imgsz (int): 推理尺寸，默认使用配置中的值
+        Returns:
+            list: 与sources顺序一致的检测结果列表
+        Raises:
+            QueueFullError: 队列已满
+        """
+        futures = self.submit_many(sources, conf_threshold, model_path, imgsz)
+        return await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+    def _collect(self, first: _BatchItem) -> tuple:
+        """
+        以first为起点，在等待窗口内继续收集请求，直到凑满一批或超时
+
+        Returns:
+            tuple: (本批条目列表, 是否收到了停止信号)
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        """调度线程主循环"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch, stopping = self._collect(first)
+
+            # 模型、置信度阈值或推理尺寸不同的请求不能共用一次predict，按三者分组；
+            # 组内尺寸不同的图片由predict_batch再按纵横比分桶
+            groups = {}
+            for item in batch:
+                key = (item.model_path, item.conf_threshold, item.imgsz)
+                groups.setdefault(key, []).append(item)
+
+            for (model_path, conf_threshold, imgsz), items in groups.items():
+                if self.executor is None:
+                    self._run_group(items, conf_threshold, model_path, imgsz)
+                else:
+                    # 图片已在入队时通过准入检查，这里阻塞等待线程池空位，
+                    # 线程池繁忙时调度队列会逐渐积压，最终由submit_many拒绝新请求
+                    self.executor.submit(
+                        self._run_group,
+                        items,
+                        conf_threshold,
+                        model_path,
+                        imgsz,
+                        block=True,
+                    )
+
+            if stopping:
+                break
+
+    def _run_group(
+        self,
+        items: List[_BatchItem],
+        conf_threshold: float,
+        model_path: str,
+        imgsz: Optional[int] = None,
+    ):
+        """对同一分组执行一次批量推理并分发结果"""
+        # 调用方可能已经取消，跳过这些条目
+        items = [item for item in items if item.future.set_running_or_notify_cancel()]
+        if not items:
+            return
+        try:
+            results = self.detector.predict_batch(
+                [item.source for item in items],
+                conf_threshold,
+                imgsz=imgsz,
+                model_path=model_path,
+            )
+        except Exception as e:
+            for item in items:
+                item.future.set_exception(e)
+            return
+        for item, result in zip(items, results):
+            item.future.set_result(result)
@@ -0,0 +1,157 @@
+# 长视频分段并行处理：按帧序号把视频切成若干连续片段，每段在独立的工作进程中
+# 用各自的模型实例检测并编码，最后按顺序拼接为完整的输出视频
+# 单个detect_video只用一个解码循环和一份模型，多核机器上大部分核心处于空闲；
+# 各工作进程的torch线程数按核心数平分，避免多个进程争抢同一批核心
+import os
+import subprocess
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+
+from src.yolo.video_writer import OpenCVWriter, VideoEncodeOptions
+
+_detector = None  # 工作进程中的检测器(每个进程一份模型)
+_cancel_event = None  # 父进程设置后，各工作进程在下一批帧前停止
+_progress = None  # 每个片段已处理的帧数，父进程汇总后上报进度
+
+
+def segment_ranges(
+    total_frames: int, segments: int, min_frames: int = 1
+) -> List[Tuple[int, int]]:
+    """
+    把视频按帧序号均分为若干连续片段
+
+    Args:
+        total_frames (int): 视频总帧数
+        segments (int): 期望的片段数
+        min_frames (int): 每段至少包含的帧数，视频较短时相应减少片段数
+    Returns:
+        list: 每段的[起始帧, 结束帧)，按顺序排列
+    """
+    if total_frames <= 0:
+        return []
+    count = max(min(segments, total_frames // max(min_frames, 1)), 1)
+    bounds = [total_frames * i // count for i in range(count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def worker_threads(workers: int, cpu_count: Optional[int] = None) -> int:
+    """每个工作进程可用的torch线程数：核心数按进程平分，至少为1"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(cpu_count // max(workers, 1), 1)
+
+
+def init_worker(model_path: str, config, threads: int, cancel_event, progress):
+    """
+    工作进程初始化：限制线程数并加载模型
+
+    Args:
+        model_path (str): 模型路径
+        config (DetectorCOnfig): 检测器配置
+        threads (int): 该进程的torch线程数
+        cancel_event: multiprocessing.Event，取消信号
+        progress: multiprocessing.Array，每个片段已处理的帧数
+    """
+    global _detector, _cancel_event, _progress
+    import torch
+
+    from src.yolo.detector import Detector
+
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(1)  # 解码和绘制在各进程内单线程进行，并行度来自进程数
+    _cancel_event = cancel_event
+    _progress = progress
+    _detector = Detector(model_path, config)
+
+
+def run_segment(
+    index: int, video_path: str, start: int, end: Optional[int], **options
+):
+    """
+    在工作进程中检测视频的一段
+
+    Args:
+        index (int): 片段序号，用于上报进度
+        video_path (str): 视频文件路径
+        start (int): 起始帧(包含)
+        end (int): 结束帧(不包含)，None表示到视频结尾
+        **options: 透传给Detector.detect_video的参数
+    Returns:
+        VideoDetection: 该片段的检测结果
+    """
+
+    def on_progress(frames_processed: int, total_frames: int):
+        _progress[index] = frames_processed
+
+    return _detector.detect_video(
+        video_path,
+        start_frame=start,
+        end_frame=end,
+        progress_callback=on_progress,
+        cancel_event=_cancel_event,
+        **options,
+    )
+
+
+def concat_videos(
+    paths: Sequence[str], output_stem: str, options: VideoEncodeOptions, fps: float
+) -> Tuple[str, float]:
+    """
+    按顺序把各片段的输出视频拼接为一个文件
+    使用ffmpeg时各片段的编码参数相同，直接复制码流拼接，不重新编码；
+    使用OpenCV时逐帧读出后重新编码(片段已经过缩放和抽帧)
+
+    Args:
+        paths (Sequence[str]): 片段视频路径，按播放顺序
+        output_stem (str): 输出视频路径(不含扩展名)
+        options (VideoEncodeOptions): 各片段使用的编码设置
+        fps (float): 原视频帧率
+    Returns:
+        tuple: (输出视频路径, 拼接耗时秒数)
+    """
+    start = time.perf_counter()
+    ffmpeg = options.ffmpeg()
+    spec = options.codec_spec(ffmpeg is not None)
+    output_path = output_stem + spec.ext
+    if ffmpeg is not None:
+        list_path = output_stem + ".concat.txt"
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        command = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy",
+        ]
+        if spec.ext == ".mp4":
+            command += ["-movflags", "+faststart"]
+        try:
+            result = subprocess.run(command + [output_path], capture_output=True)
+        finally:
+            os.remove(list_path)
+        if result.returncode != 0:
+            error = result.stderr.decode(errors="replace").strip()
+            raise RuntimeError(f"拼接输出视频失败:{output_path} {error}")
+        return output_path, time.perf_counter() - start
+
+    writer = None
+    try:
+        for path in paths:
+            cap = cv2.VideoCapture(path)
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if writer is None:
+                        size = (frame.shape[1], frame.shape[0])
+                        output_fps = max(fps, 1) / max(options.fps_divisor, 1)
+                        writer = OpenCVWriter(output_path, spec, output_fps, size)
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        if writer is not None:
+            writer.close()
+    return output_path, time.perf_counter() - start
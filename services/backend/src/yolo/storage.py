@@ -0,0 +1,234 @@
+# 按请求隔离的文件存储和后台清理
+# 每个请求的上传文件和输出文件写入独立的子目录(<root>/<request_id>/)，并发请求不会互相覆盖；
+# 清理线程按过期时间(TTL)和总容量配额删除最旧的请求目录，磁盘占用保持有界；
+# 正在处理的请求固定(pin)其目录，清理线程跳过这些目录
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class StoredRequest:
+    """存储中的一个请求目录"""
+
+    path: str
+    size_bytes: int
+    modified_at: float  # 目录内最新文件的修改时间
+    pinned: bool = False  # 是否有请求正在使用该目录
+
+
+class RequestStorage:
+    """
+    请求级文件存储：每个请求分配一个唯一子目录，文件先写临时文件再原子重命名，
+    静态文件服务不会读到写了一半的文件，也不会读到其他请求的结果
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): 存储根目录(如src/yolo/output/images)
+        """
+        self.root = root
+        self._pins = Counter()  # 请求ID -> 固定次数
+        self._lock = threading.Lock()
+
+    def allocate(self) -> Tuple[str, str]:
+        """
+        为一个请求分配独立的子目录
+
+        Returns:
+            tuple: (请求ID, 子目录路径)
+        """
+        # 时间前缀让目录按创建顺序排列，随机后缀保证唯一
+        request_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12]}"
+        directory = os.path.join(self.root, request_id)
+        os.makedirs(directory, exist_ok=True)
+        return request_id, directory
+
+    def write(self, request_id: str, name: str, data: bytes) -> str:
+        """
+        把文件原子地写入请求目录
+
+        Args:
+            request_id (str): allocate返回的请求ID
+            name (str): 文件名(只取文件名部分，防止写到请求目录以外)
+            data (bytes): 文件内容
+        Returns:
+            str: 相对于根目录的路径，如"<request_id>/detected_0.jpg"
+        """
+        name = os.path.basename(name)
+        path = os.path.join(self.root, request_id, name)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return self.relative(path)
+
+    def relative(self, path: str) -> str:
+        """把存储中的文件路径转换为相对于根目录的路径(用于静态文件URL和检测历史)"""
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def request_id(self, path: Optional[str]) -> Optional[str]:
+        """存储中的文件或请求目录所属的请求ID，不在该存储中时返回None"""
+        if not path:
+            return None
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root))
+        if relative == "." or relative.startswith(".."):
+            return None
+        return relative.split(os.sep)[0]
+
+    def pin(self, *paths: Optional[str]):
+        """
+        固定路径所属的请求目录，直到unpin之前清理线程不会删除它
+        可以重复固定，需要调用同样次数的unpin；不在该存储中的路径(或None)被忽略
+
+        Args:
+            *paths (str): 请求目录或其中的文件路径
+        """
+        with self._lock:
+            for path in paths:
+                request_id = self.request_id(path)
+                if request_id is not None:
+                    self._pins[request_id] += 1
+
+    def unpin(self, *paths: Optional[str]):
+        """取消pin的固定"""
+        with self._lock:
+            for path in paths:
+                request_id = self.request_id(path)
+                if request_id is not None and self._pins[request_id] > 0:
+                    self._pins[request_id] -= 1
+                    if not self._pins[request_id]:
+                        del self._pins[request_id]
+
+    @contextmanager
+    def pinned(self, *paths: Optional[str]):
+        """在with块内固定路径所属的请求目录"""
+        self.pin(*paths)
+        try:
+            yield
+        finally:
+            self.unpin(*paths)
+
+    def is_pinned(self, request_id: str) -> bool:
+        with self._lock:
+            return request_id in self._pins
+
+    def requests(self) -> List[StoredRequest]:
+        """列出所有请求目录及其大小和最近修改时间(根目录下的散落文件不在管理范围内)"""
+        if not os.path.isdir(self.root):
+            return []
+        stored = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            size, modified_at = 0, entry.stat().st_mtime
+            for dirpath, _, filenames in os.walk(entry.path):
+                for filename in filenames:
+                    try:
+                        stat = os.stat(os.path.join(dirpath, filename))
+                    except FileNotFoundError:
+                        continue  # 清理或写入过程中被移除的临时文件
+                    size += stat.st_size
+                    modified_at = max(modified_at, stat.st_mtime)
+            stored.append(
+                StoredRequest(
+                    entry.path, size, modified_at, self.is_pinned(entry.name)
+                )
+            )
+        return stored
+
+
+class StorageJanitor:
+    """
+    后台清理线程，定期对多个RequestStorage执行:
+    1.删除最近修改时间超过TTL的请求目录
+    2.总大小仍超过配额时，从最旧的请求目录开始删除
+    被固定(pin)的目录(例如排队或处理中的视频任务)和最近grace_seconds内仍有写入的目录不会被删除
+    """
+
+    def __init__(
+        self,
+        storages: List[RequestStorage],
+        ttl_seconds: float,
+        max_bytes: int,
+        interval_seconds: float = 300.0,
+        grace_seconds: float = 300.0,
+    ):
+        """
+        Args:
+            storages (List[RequestStorage]): 需要清理的存储
+            ttl_seconds (float): 请求目录的保留时间(秒)
+            max_bytes (int): 所有存储的总容量配额(字节)
+            interval_seconds (float): 清理间隔(秒)
+            grace_seconds (float): 最近仍有写入的目录的保护时间(秒)
+        """
+        self.storages = storages
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep(self, now: Optional[float] = None) -> dict:
+        """
+        执行一次清理
+
+        Args:
+            now (float): 当前时间戳，默认为time.time()
+        Returns:
+            dict: 删除的目录数、释放的字节数和清理后的总字节数
+        """
+        now = time.time() if now is None else now
+        stored = sorted(
+            (item for storage in self.storages for item in storage.requests()),
+            key=lambda item: item.modified_at,
+        )
+        total_bytes = sum(item.size_bytes for item in stored)
+        removed, freed = 0, 0
+        for item in stored:
+            if item.pinned:
+                continue  # 正在使用的目录，仍计入总大小
+            age = now - item.modified_at
+            if age < self.grace_seconds:
+                break  # 按修改时间排序，之后的目录都更新
+            if age <= self.ttl_seconds and total_bytes <= self.max_bytes:
+                break  # 未过期且已在配额内
+            shutil.rmtree(item.path, ignore_errors=True)
+            removed += 1
+            freed += item.size_bytes
+            total_bytes -= item.size_bytes
+        if removed:
+            print(f"存储清理: 删除{removed}个请求目录，释放{freed / 1024 / 1024:.1f}MB")
+        return {"removed": removed, "freed_bytes": freed, "total_bytes": total_bytes}
+
+    def start(self):
+        """启动后台清理线程"""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="storage-janitor", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """停止后台清理线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"存储清理失败: {e}")
+            self._stop_event.wait(self.interval_seconds)
@@ -0,0 +1,114 @@
+# 大图切片推理：把高分辨率图像切成相互重叠的图块，整批送入模型，
+# 检测框映射回原图坐标后做跨图块的NMS合并
+# 每个图块以原始分辨率推理，小目标不会因为整图缩放到default_imgsz而丢失
+from typing import List
+
+import numpy as np
+
+
+def tile_starts(length: int, tile_size: int, stride: int) -> np.ndarray:
+    """
+    单个方向上各图块的起始坐标，最后一块贴齐图像边缘，所有图块大小相同
+
+    Args:
+        length (int): 图像在该方向上的长度
+        tile_size (int): 图块边长
+        stride (int): 相邻图块的步长(图块边长减去重叠)
+    Returns:
+        np.ndarray: 起始坐标数组
+    """
+    if length <= tile_size:
+        return np.zeros(1, dtype=np.int64)
+    starts = np.arange(0, length - tile_size, stride)
+    return np.append(starts, length - tile_size)
+
+
+def tile_grid(height: int, width: int, tile_size: int, overlap: float) -> np.ndarray:
+    """
+    计算覆盖整张图像的图块网格
+
+    Args:
+        height (int): 图像高度
+        width (int): 图像宽度
+        tile_size (int): 图块边长
+        overlap (float): 相邻图块的重叠比例(0-1)
+    Returns:
+        np.ndarray: (N, 4)，每行是图块在原图中的[x1, y1, x2, y2]
+    """
+    stride = max(int(tile_size * (1 - overlap)), 1)
+    ys, xs = np.meshgrid(
+        tile_starts(height, tile_size, stride),
+        tile_starts(width, tile_size, stride),
+        indexing="ij",
+    )
+    x1, y1 = xs.ravel(), ys.ravel()
+    return np.stack(
+        [x1, y1, np.minimum(x1 + tile_size, width), np.minimum(y1 + tile_size, height)],
+        axis=1,
+    )
+
+
+def slice_tiles(image: np.ndarray, grid: np.ndarray) -> List[np.ndarray]:
+    """按网格切出图块(原图的视图，不复制像素)"""
+    return [image[y1:y2, x1:x2] for x1, y1, x2, y2 in grid.tolist()]
+
+
+def offset_boxes(boxes: List[np.ndarray], grid: np.ndarray) -> np.ndarray:
+    """
+    把各图块中的检测框平移回原图坐标并合并为一个数组
+
+    Args:
+        boxes (List[np.ndarray]): 每个图块的(N_i, 6)检测框[x1, y1, x2, y2, conf, cls]
+        grid (np.ndarray): tile_grid返回的图块网格
+    Returns:
+        np.ndarray: (sum(N_i), 6)
+    """
+    counts = [len(b) for b in boxes]
+    if not sum(counts):
+        return np.zeros((0, 6), dtype=np.float32)
+    merged = np.concatenate(boxes).astype(np.float32)
+    # 每个框按所属图块的左上角平移，x1/x2加x偏移，y1/y2加y偏移
+    offsets = np.repeat(grid[:, :2], counts, axis=0).astype(np.float32)
+    merged[:, [0, 2]] += offsets[:, [0]]
+    merged[:, [1, 3]] += offsets[:, [1]]
+    return merged
+
+
+def merge_detections(
+    boxes: np.ndarray, threshold: float = 0.5, metric: str = "ios"
+) -> np.ndarray:
+    """
+    跨图块的类别相关NMS：按置信度从高到低保留检测框，抑制与其重叠超过阈值的同类框
+
+    Args:
+        boxes (np.ndarray): (N, 6)检测框[x1, y1, x2, y2, conf, cls]
+        threshold (float): 重叠阈值
+        metric (str): "iou"为交并比；"ios"为交集与较小框面积之比，
+            图块边缘被截断的半个目标与完整目标的IoU较低，IoS能把它们正确合并
+    Returns:
+        np.ndarray: 保留的检测框，按置信度降序
+    """
+    if len(boxes) == 0:
+        return boxes
+    boxes = boxes[np.argsort(-boxes[:, 4], kind="stable")]
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    classes = boxes[:, 5]
+    keep = np.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if not keep[i]:
+            continue
+        rest = np.nonzero(keep[i + 1 :])[0] + i + 1
+        if len(rest) == 0:
+            break
+        # 当前框与其余所有未被抑制的框一次性计算重叠
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        if metric == "ios":
+            denom = np.minimum(areas[i], areas[rest])
+        else:
+            denom = areas[i] + areas[rest] - inter
+        overlap = inter / np.maximum(denom, 1e-9)
+        keep[rest[(overlap > threshold) & (classes[rest] == classes[i])]] = False
+    return boxes[keep]
@@ -0,0 +1,264 @@
+# 轻量多目标跟踪：视频按间隔抽帧检测时，用跟踪器把检测框传递到中间帧，并为目标分配稳定的ID
+# 1.卡尔曼滤波(匀速模型，状态为中心点、宽高及其速度)，所有轨迹的预测/更新一次性用数组完成
+# 2.ByteTrack式的两阶段关联：先用高置信度检测框匹配轨迹，剩余轨迹再尝试匹配低置信度检测框，
+#   被遮挡、置信度暂时下降的目标不会丢失ID；低置信度检测框只用于关联，不会新建轨迹，
+#   也不会出现在输出结果中
+# 3.每次检测时统计轨迹预测与检测结果的不一致程度，据此自适应调整检测间隔
+from typing import Tuple
+
+import numpy as np
+
+STD_POSITION = 1.0 / 20  # 位置观测噪声(相对于框的宽高)
+STD_VELOCITY = 1.0 / 160  # 速度过程噪声(相对于框的宽高)
+
+# 匀速模型的状态转移矩阵(每次预测前进一帧)
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+
+# ByteTracker中按轨迹存储的数组，增删轨迹时一起处理
+_TRACK_ARRAYS = ("mean", "cov", "ids", "cls", "conf", "hits", "since_update", "matched")
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    wh = boxes[:, 2:4] - boxes[:, :2]
+    return np.concatenate([boxes[:, :2] + wh / 2, wh], axis=1)
+
+
+def cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    half = boxes[:, 2:4] / 2
+    return np.concatenate([boxes[:, :2] - half, boxes[:, :2] + half], axis=1)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    两组框的两两IoU
+
+    Args:
+        a (np.ndarray): (N, 4) xyxy
+        b (np.ndarray): (M, 4) xyxy
+    Returns:
+        np.ndarray: (N, M)
+    """
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2:4] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:4] - b[:, :2]).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def greedy_match(
+    scores: np.ndarray, threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    贪心匹配：反复选取得分最高的一对，直到没有超过阈值的配对
+
+    Args:
+        scores (np.ndarray): (N, M)得分矩阵(如IoU)
+        threshold (float): 配对的最低得分
+    Returns:
+        tuple: (行下标数组, 列下标数组)
+    """
+    rows, cols = [], []
+    scores = scores.copy()
+    while scores.size:
+        r, c = np.unravel_index(np.argmax(scores), scores.shape)
+        if scores[r, c] < threshold:
+            break
+        rows.append(r)
+        cols.append(c)
+        scores[r, :] = -1
+        scores[:, c] = -1
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+class ByteTracker:
+    """
+    多目标跟踪器
+    每帧调用一次predict推进所有轨迹；有检测结果的帧再调用update
+    """
+
+    def __init__(
+        self,
+        high_conf: float = 0.25,
+        iou_threshold: float = 0.3,
+        max_age: int = 30,
+        min_hits: int = 1,
+    ):
+        """
+        Args:
+            high_conf (float): 高置信度检测框的阈值(即请求的置信度阈值)，低于它的只用于延续已有轨迹
+            iou_threshold (float): 轨迹与检测框配对的最低IoU
+            max_age (int): 轨迹连续多少帧没有匹配后被删除
+            min_hits (int): 轨迹至少匹配多少次检测才计为一个独立目标
+        """
+        self.high_conf = high_conf
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.mean = np.zeros((0, 8))  # 卡尔曼状态[cx, cy, w, h, vcx, vcy, vw, vh]
+        self.cov = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, dtype=int)
+        self.cls = np.zeros(0)
+        self.conf = np.zeros(0)
+        self.hits = np.zeros(0, dtype=int)  # 累计匹配次数
+        self.since_update = np.zeros(0, dtype=int)  # 距上次匹配的帧数
+        self.matched = np.zeros(0, dtype=bool)  # 最近一次检测时是否匹配到高置信度检测框
+        self.unique_objects = 0  # 达到min_hits的轨迹数量，即视频中出现过的独立目标数
+        self._next_id = 1
+
+    def predict(self):
+        """所有轨迹按匀速模型前进一帧"""
+        if not len(self.ids):
+            return
+        wh = np.repeat(self.mean[:, 2:4], 2, axis=1)  # [w, h, w, h]
+        std = np.concatenate([STD_POSITION * wh, STD_VELOCITY * wh], axis=1)
+        q = np.einsum("ni,ij->nij", std**2, np.eye(8))  # 每条轨迹的对角过程噪声
+        self.mean = self.mean @ _F.T
+        self.cov = _F @ self.cov @ _F.T + q
+        self.since_update += 1
+
+    def tracks(self) -> np.ndarray:
+        """
+        最近一次检测时匹配到高置信度检测框的轨迹在当前帧的位置(预测值)，用于没有检测的中间帧
+
+        Returns:
+            np.ndarray: (N, 7)，每行是[x1, y1, x2, y2, track_id, conf, cls]
+        """
+        keep = self.matched
+        return self._rows(cxcywh_to_xyxy(self.mean[keep, :4]), keep)
+
+    def update(self, detections: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        用当前帧的检测结果更新轨迹(调用前需先调用predict)
+
+        Args:
+            detections (np.ndarray): (N, 6)检测框[x1, y1, x2, y2, conf, cls]，
+                可包含低于high_conf的检测框
+        Returns:
+            tuple: (当前帧的跟踪结果(M, 7)[x1, y1, x2, y2, track_id, conf, cls]，
+                    只包含匹配到高置信度检测框的轨迹和新建的轨迹,
+                    轨迹预测与高置信度检测的不一致程度0-1)
+        """
+        high = detections[detections[:, 4] >= self.high_conf]
+        low = detections[detections[:, 4] < self.high_conf]
+        predicted = cxcywh_to_xyxy(self.mean[:, :4])
+        boxes = predicted.copy()
+        matched = np.zeros(len(self.ids), dtype=bool)
+
+        # 第一阶段：高置信度检测框与全部轨迹配对(不同类别不配对)
+        same_class = self.cls[:, None] == high[None, :, 5]
+        iou = box_iou(predicted, high[:, :4]) * same_class
+        rows, cols = greedy_match(iou, self.iou_threshold)
+        self._correct(rows, high[cols])
+        boxes[rows], matched[rows] = high[cols, :4], True
+        # 不一致程度：1 - 配对IoU之和/(配对数+未配对的轨迹数+未配对的检测框数)
+        total = len(self.ids) + len(high) - len(rows)
+        disagreement = 1.0 - iou[rows, cols].sum() / total if total else 0.0
+
+        # 第二阶段：剩余轨迹与低置信度检测框配对，只修正轨迹状态、让轨迹继续存活，
+        # 低于请求阈值的检测框不输出
+        rest = np.nonzero(~matched)[0]
+        if len(rest) and len(low):
+            same_class = self.cls[rest, None] == low[None, :, 5]
+            iou = box_iou(predicted[rest], low[:, :4]) * same_class
+            r, c = greedy_match(iou, self.iou_threshold)
+            self._correct(rest[r], low[c])
+
+        self.matched = matched
+        result = self._rows(boxes[matched], matched)
+
+        # 未配对的高置信度检测框新建轨迹
+        new = np.setdiff1d(np.arange(len(high)), cols)
+        if len(new):
+            result = np.concatenate([result, self._initiate(high[new])])
+
+        # 删除长时间没有匹配的轨迹
+        alive = self.since_update <= self.max_age
+        if not alive.all():
+            self._select(alive)
+        return result, float(disagreement)
+
+    def _rows(self, xyxy: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        columns = [self.ids[mask, None], self.conf[mask, None], self.cls[mask, None]]
+        return np.concatenate([xyxy, *columns], axis=1).reshape(-1, 7)
+
+    def _correct(self, index: np.ndarray, detections: np.ndarray):
+        """卡尔曼更新：用配对的检测框修正对应轨迹的状态"""
+        if not len(index):
+            return
+        mean, cov = self.mean[index], self.cov[index]
+        wh = np.repeat(mean[:, 2:4], 2, axis=1)
+        r = np.einsum("ni,ij->nij", (STD_POSITION * wh) ** 2, np.eye(4))
+        s = cov[:, :4, :4] + r  # 观测矩阵只取前4维
+        gain = np.linalg.solve(s, cov[:, :4, :]).transpose(0, 2, 1)  # (n, 8, 4)
+        innovation = xyxy_to_cxcywh(detections[:, :4]) - mean[:, :4]
+        self.mean[index] = mean + np.einsum("nij,nj->ni", gain, innovation)
+        self.cov[index] = cov - gain @ s @ gain.transpose(0, 2, 1)
+        self.conf[index] = detections[:, 4]
+        self.since_update[index] = 0
+        self.hits[index] += 1
+        # 刚达到min_hits的轨迹计为一个新的独立目标
+        self.unique_objects += int((self.hits[index] == self.min_hits).sum())
+
+    def _initiate(self, detections: np.ndarray) -> np.ndarray:
+        """为未配对的检测框新建轨迹，返回这些轨迹的跟踪结果"""
+        n = len(detections)
+        z = xyxy_to_cxcywh(detections[:, :4])
+        wh = np.repeat(z[:, 2:4], 2, axis=1)
+        std = np.concatenate([2 * STD_POSITION * wh, 10 * STD_VELOCITY * wh], axis=1)
+        ids = np.arange(self._next_id, self._next_id + n)
+        self._next_id += n
+        mean = np.concatenate([z, np.zeros((n, 4))], axis=1)
+        cov = np.einsum("ni,ij->nij", std**2, np.eye(8))
+        self.mean = np.concatenate([self.mean, mean])
+        self.cov = np.concatenate([self.cov, cov])
+        self.ids = np.concatenate([self.ids, ids])
+        self.cls = np.concatenate([self.cls, detections[:, 5]])
+        self.conf = np.concatenate([self.conf, detections[:, 4]])
+        self.hits = np.concatenate([self.hits, np.ones(n, dtype=int)])
+        self.since_update = np.concatenate(
+            [self.since_update, np.zeros(n, dtype=int)]
+        )
+        self.matched = np.concatenate([self.matched, np.ones(n, dtype=bool)])
+        if self.min_hits <= 1:
+            self.unique_objects += n
+        return np.concatenate(
+            [detections[:, :4], ids[:, None], detections[:, 4:6]], axis=1
+        )
+
+    def _select(self, keep: np.ndarray):
+        for name in _TRACK_ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+
+
+class AdaptiveStride:
+    """
+    自适应检测间隔：轨迹预测与检测结果不一致(目标快速运动、出现或消失)时缩短间隔，
+    连续一致(画面稳定)时逐步拉长间隔
+    """
+
+    def __init__(
+        self, stride: int = 1, max_stride: int = 1, low: float = 0.15, high: float = 0.4
+    ):
+        """
+        Args:
+            stride (int): 初始检测间隔(每stride帧检测一次)
+            max_stride (int): 检测间隔上限，不大于stride时间隔固定不变
+            low (float): 不一致程度低于该值时间隔加1
+            high (float): 不一致程度高于该值时间隔减半
+        """
+        self.stride = max(stride, 1)
+        self.max_stride = max(max_stride, self.stride)
+        self.adaptive = max_stride > stride
+        self.low = low
+        self.high = high
+
+    def update(self, disagreement: float) -> int:
+        """根据最近一次检测的不一致程度调整间隔，返回新的间隔"""
+        if self.adaptive:
+            if disagreement > self.high:
+                self.stride = max(self.stride // 2, 1)
+            elif disagreement < self.low:
+                self.stride = min(self.stride + 1, self.max_stride)
+        return self.stride
@@ -0,0 +1,235 @@
+# 视频三段式流水线：解码线程 -> 批量推理(调用方线程) -> 绘制与编码线程
+# 三个阶段通过有界队列衔接，解码、推理、编码可以同时进行；
+# 每个阶段都是单线程 + 先进先出队列，因此输出帧顺序与输入完全一致
+# FrameStream把编码阶段的输出交给异步消费者，用于边处理边推送的流式响应
+import asyncio
+import queue
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+_END = object()  # 队列结束标记
+
+
+def _put(
+    q: queue.Queue,
+    item,
+    stop_event: threading.Event,
+    timeout: Optional[float] = None,
+) -> bool:
+    """
+    向有界队列放入元素，队列满时阻塞等待，但会定期检查停止信号
+
+    Args:
+        timeout (float): 最长等待秒数，None表示一直等到放入成功或流水线停止
+    Returns:
+        bool: 放入成功返回True，流水线被停止或等待超时返回False
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+    return False
+
+
+class FrameDecoder(threading.Thread):
+    """解码线程：从VideoCapture中读取帧并填入有界帧队列"""
+
+    def __init__(
+        self,
+        cap,
+        queue_size: int,
+        stop_event: threading.Event,
+        max_frames: Optional[int] = None,
+    ):
+        """
+        Args:
+            cap: 已打开的cv2.VideoCapture对象
+            queue_size (int): 帧队列长度，限制解码领先推理的帧数(也就限制了内存)
+            stop_event (threading.Event): 流水线停止信号
+            max_frames (int): 最多读取的帧数(只处理视频中的一段时使用)，None表示读到结尾
+        """
+        super().__init__(name="yolo-video-decoder", daemon=True)
+        self.cap = cap
+        self.stop_event = stop_event
+        self.max_frames = max_frames
+        self.frames: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        try:
+            count = 0
+            while not self.stop_event.is_set():
+                if self.max_frames is not None and count >= self.max_frames:
+                    break
+                count += 1
+                ret, frame = self.cap.read()  # ret表示是否读取帧成功， frame是图像每帧具体数据
+                if not ret:
+                    break
+                if not _put(self.frames, frame, self.stop_event):
+                    break
+        except BaseException as e:  # 记录异常，由消费方重新抛出
+            self.error = e
+        finally:
+            _put(self.frames, _END, self.stop_event)
+
+    def iter_frames(self) -> Iterator:
+        """
+        逐帧取出已解码的帧
+
+        Yields:
+            按原始顺序的帧
+        """
+        while True:
+            try:
+                frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    return
+                continue
+            if frame is _END:
+                break
+            yield frame
+        if self.error is not None:
+            raise self.error
+
+    def batches(self, batch_size: int) -> Iterator[List]:
+        """
+        按批次取出已解码的帧，最后一批可能不足batch_size
+
+        Args:
+            batch_size (int): 每批帧数
+        Yields:
+            list: 按原始顺序排列的一批帧
+        """
+        batch = []
+        for frame in self.iter_frames():
+            batch.append(frame)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class FrameEncoder(threading.Thread):
+    """编码线程：对推理结果做绘制并写入输出，与推理阶段并行"""
+
+    def __init__(
+        self,
+        handle: Callable,
+        queue_size: int,
+        stop_event: threading.Event,
+        name: str = "yolo-video-encoder",
+    ):
+        """
+        Args:
+            handle (Callable): 处理单帧的函数，参数为(frame, result)
+            queue_size (int): 待编码队列长度
+            stop_event (threading.Event): 流水线停止信号
+            name (str): 线程名称
+        """
+        super().__init__(name=name, daemon=True)
+        self.handle = handle
+        self.stop_event = stop_event
+        self.items: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    item = self.items.get(timeout=0.1)
+                except queue.Empty:
+                    if self.stop_event.is_set():
+                        return
+                    continue
+                if item is _END:
+                    return
+                self.handle(*item)
+        except BaseException as e:
+            self.error = e
+            self.stop_event.set()  # 编码失败时通知其他阶段尽快退出
+
+    def put(self, frame, result):
+        """
+        提交一帧及其检测结果，编码阶段出错时立即抛出
+        """
+        if self.error is not None:
+            raise self.error
+        _put(self.items, (frame, result), self.stop_event)
+
+    def close(self):
+        """
+        通知编码线程处理完剩余帧后退出，并等待其结束
+        """
+        _put(self.items, _END, self.stop_event)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+
+class FrameStream:
+    """
+    编码线程与异步消费者(如HTTP流式响应)之间的有界通道
+    消费者跟不上时编码线程阻塞，从而让整条流水线减速，不会无限缓存帧；
+    消费者断开时调用cancel，生产方下一次put返回False并通过cancel_event停止检测；
+    消费者没能调用cancel(如响应开始前客户端就断开)时，put等待超过stall_timeout
+    也视为断开，生产方不会永远阻塞在满队列上
+    """
+
+    def __init__(self, queue_size: int, stall_timeout: Optional[float] = None):
+        """
+        Args:
+            queue_size (int): 最多缓存的已编码帧数
+            stall_timeout (float): 队列满时put最长等待的秒数，None表示不限
+        """
+        self.items: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stall_timeout = stall_timeout
+        self.cancel_event = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def put(self, data: bytes) -> bool:
+        """
+        生产方(工作线程)提交一帧
+
+        Returns:
+            bool: 消费者已断开或长时间不读取时返回False
+        """
+        if _put(self.items, data, self.cancel_event, self.stall_timeout):
+            return True
+        self.cancel()  # 等待超时：按断开处理，让检测在下一帧前停止
+        return False
+
+    def close(self, error: Optional[BaseException] = None):
+        """生产方结束，error不为None时消费者会在读完剩余帧后收到该异常"""
+        self.error = error
+        _put(self.items, _END, self.cancel_event)
+
+    def cancel(self):
+        """消费者断开，通知生产方停止"""
+        self.cancel_event.set()
+
+    def _get(self):
+        try:
+            return self.items.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    async def __aiter__(self):
+        """异步逐帧读取，直到生产方结束"""
+        while True:
+            item = await asyncio.to_thread(self._get)
+            if item is None:
+                if self.cancel_event.is_set():
+                    return
+                continue
+            if item is _END:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
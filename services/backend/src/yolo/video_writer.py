@@ -0,0 +1,298 @@
+# 视频输出编码：标注后的帧在独立的写入线程中抽帧、缩放并编码，与绘制和推理并行
+# 1.有ffmpeg时通过管道把原始帧交给ffmpeg编码，可以使用H.264/VP9等压缩率高、浏览器可直接播放的编码器，
+#   并按质量(CRF)或码率控制输出大小；编码本身在ffmpeg进程中进行，不占用Python的GIL
+# 2.没有ffmpeg时退回cv2.VideoWriter，只能选择编码器的FourCC，质量和码率设置不生效
+import os
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.yolo.video_pipeline import FrameEncoder
+
+
+@dataclass
+class CodecSpec:
+    """一种输出编码格式在两种后端中的参数"""
+
+    fourcc: str  # cv2.VideoWriter使用的FourCC
+    encoder: str  # ffmpeg编码器名称
+    ext: str  # 输出文件扩展名
+    quality_flag: str  # ffmpeg中控制质量的参数
+    worst: int  # 质量参数的最差取值(quality=1)
+    best: int  # 质量参数的最好取值(quality=100)
+    args: Tuple[str, ...] = ()  # 额外的ffmpeg参数
+
+
+CODECS = {
+    # yuv420p和faststart让浏览器可以边下载边播放
+    "h264": CodecSpec(
+        "avc1",
+        "libx264",
+        ".mp4",
+        "-crf",
+        51,
+        0,
+        ("-preset", "veryfast", "-pix_fmt", "yuv420p", "-movflags", "+faststart"),
+    ),
+    "vp9": CodecSpec(
+        "vp09",
+        "libvpx-vp9",
+        ".webm",
+        "-crf",
+        63,
+        0,
+        (
+            "-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1",
+            "-pix_fmt", "yuv420p",
+        ),
+    ),
+    "mp4v": CodecSpec("mp4v", "mpeg4", ".mp4", "-q:v", 31, 1, ("-pix_fmt", "yuv420p")),
+    "mjpg": CodecSpec("MJPG", "mjpeg", ".avi", "-q:v", 31, 2, ("-pix_fmt", "yuvj420p")),
+}
+
+
+@dataclass
+class VideoEncodeOptions:
+    """输出视频的编码设置"""
+
+    backend: str = "auto"  # "auto"(有ffmpeg时使用ffmpeg)、"ffmpeg"或"opencv"
+    codec: str = ""  # CODECS中的名称，空表示ffmpeg使用h264、OpenCV使用mp4v
+    quality: int = 0  # 1-100，越大质量越好、文件越大，0表示编码器默认值(仅ffmpeg)
+    bitrate_kbps: int = 0  # 目标码率，设置后优先于quality(仅ffmpeg)
+    scale: float = 1.0  # 输出分辨率相对原视频的缩放比例
+    fps_divisor: int = 1  # 每fps_divisor帧保留一帧，输出帧率相应降低
+    ffmpeg_path: str = ""  # ffmpeg可执行文件路径，空表示从PATH中查找
+
+    @classmethod
+    def from_config(cls, config) -> "VideoEncodeOptions":
+        """从DetectorCOnfig中读取编码设置"""
+        return cls(
+            backend=config.video_encoder,
+            codec=config.video_codec,
+            quality=config.video_quality,
+            bitrate_kbps=config.video_bitrate_kbps,
+            scale=config.video_output_scale,
+            fps_divisor=config.video_output_fps_divisor,
+            ffmpeg_path=config.ffmpeg_path,
+        )
+
+    def ffmpeg(self) -> Optional[str]:
+        """
+        按backend决定使用的ffmpeg，返回None表示使用OpenCV
+
+        Raises:
+            RuntimeError: backend为"ffmpeg"但找不到ffmpeg
+        """
+        if self.backend == "opencv":
+            return None
+        path = shutil.which(self.ffmpeg_path or "ffmpeg")
+        if path is None and self.backend == "ffmpeg":
+            raise RuntimeError("找不到ffmpeg，无法使用ffmpeg编码输出视频")
+        return path
+
+    def codec_spec(self, use_ffmpeg: bool) -> CodecSpec:
+        """
+        Raises:
+            ValueError: 未知的编码格式
+        """
+        name = self.codec or ("h264" if use_ffmpeg else "mp4v")
+        if name not in CODECS:
+            raise ValueError(f"不支持的视频编码格式:{name}，可选{sorted(CODECS)}")
+        return CODECS[name]
+
+
+def output_size(width: int, height: int, scale: float) -> Tuple[int, int]:
+    """缩放后的输出尺寸，宽高取偶数(yuv420p要求)"""
+    return (
+        max(int(width * scale) // 2 * 2, 2),
+        max(int(height * scale) // 2 * 2, 2),
+    )
+
+
+class OpenCVWriter:
+    """cv2.VideoWriter的包装"""
+
+    def __init__(self, path: str, spec: CodecSpec, fps: float, size: Tuple[int, int]):
+        self.writer = cv2.VideoWriter(
+            path, cv2.VideoWriter_fourcc(*spec.fourcc), fps, size
+        )
+        if not self.writer.isOpened():
+            raise RuntimeError(f"无法创建输出视频文件:{path}")
+
+    def write(self, frame: np.ndarray):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class FFmpegWriter:
+    """通过stdin把BGR原始帧写入ffmpeg进程"""
+
+    def __init__(
+        self,
+        path: str,
+        ffmpeg: str,
+        spec: CodecSpec,
+        fps: float,
+        size: Tuple[int, int],
+        quality: int = 0,
+        bitrate_kbps: int = 0,
+    ):
+        command = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{size[0]}x{size[1]}", "-r", f"{fps:g}", "-i", "-",
+            "-an", "-c:v", spec.encoder, *spec.args,
+        ]
+        if bitrate_kbps:
+            command += ["-b:v", f"{bitrate_kbps}k"]
+        elif quality:
+            # quality(1-100)线性映射到编码器的质量参数(CRF或qscale)
+            value = round(spec.worst + (spec.best - spec.worst) * (quality - 1) / 99)
+            command += [spec.quality_flag, str(value)]
+            if spec.encoder == "libvpx-vp9":
+                command += ["-b:v", "0"]  # VP9只有码率为0时才是恒定质量模式
+        command.append(path)
+        self.path = path
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    def write(self, frame: np.ndarray):
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            # ffmpeg提前退出，等待它结束以取得错误信息
+            self.close()
+            raise
+
+    def close(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        error = self.process.stderr.read().decode(errors="replace").strip()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg编码失败:{self.path} {error}")
+
+
+class VideoSink:
+    """
+    视频写入阶段：在独立线程中按fps_divisor抽帧、缩放并编码
+    统计写入线程的编码耗时和最终输出文件大小
+    """
+
+    def __init__(
+        self,
+        path_stem: str,
+        options: VideoEncodeOptions,
+        fps: float,
+        size: Tuple[int, int],
+        queue_size: int,
+        stop_event: threading.Event,
+    ):
+        """
+        Args:
+            path_stem (str): 输出文件路径(不含扩展名，扩展名由编码格式决定)
+            options (VideoEncodeOptions): 编码设置
+            fps (float): 原视频帧率
+            size (Tuple[int, int]): 原视频的(宽, 高)
+            queue_size (int): 待写入队列长度
+            stop_event (threading.Event): 流水线停止信号
+        Raises:
+            RuntimeError: 无法创建输出文件或找不到要求的ffmpeg
+            ValueError: 未知的编码格式
+        """
+        ffmpeg = options.ffmpeg()
+        spec = options.codec_spec(ffmpeg is not None)
+        self.path = path_stem + spec.ext
+        self.fps_divisor = max(options.fps_divisor, 1)
+        self.size = size
+        if options.scale != 1.0:
+            self.size = output_size(size[0], size[1], options.scale)
+        elif ffmpeg is not None:
+            self.size = output_size(size[0], size[1], 1.0)
+        fps = max(fps, 1) / self.fps_divisor
+        start = time.perf_counter()
+        if ffmpeg is not None:
+            self.writer = FFmpegWriter(
+                self.path,
+                ffmpeg,
+                spec,
+                fps,
+                self.size,
+                options.quality,
+                options.bitrate_kbps,
+            )
+        else:
+            self.writer = OpenCVWriter(self.path, spec, fps, self.size)
+        self.encode_seconds = time.perf_counter() - start  # 写入线程中编码所用的时间
+        self.frames_written = 0
+        self.output_bytes = 0
+        self._index = 0
+        self._closed = False
+        self._thread = FrameEncoder(
+            self._write, queue_size, stop_event, name="yolo-video-writer"
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, frame: np.ndarray):
+        """提交一帧(已绘制)，写入阶段出错时立即抛出"""
+        self._thread.put(frame, None)
+
+    def _write(self, frame: np.ndarray, _):
+        index = self._index
+        self._index += 1
+        if index % self.fps_divisor:
+            return
+        start = time.perf_counter()
+        if frame.shape[1::-1] != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.writer.write(frame)
+        self.encode_seconds += time.perf_counter() - start
+        self.frames_written += 1
+
+    def close(self):
+        """等待剩余帧写入完成并关闭输出文件"""
+        self._thread.close()
+        self._release()
+        self.output_bytes = os.path.getsize(self.path)
+
+    def abort(self):
+        """停止写入并删除不完整的输出文件(调用前需已设置停止信号)"""
+        self._thread.join()
+        try:
+            self._release()
+        except RuntimeError:
+            pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def release(self):
+        """出错退出时关闭输出(可重复调用)"""
+        if self._thread.is_alive():
+            self._thread.join()
+        try:
+            self._release()
+        except RuntimeError as e:
+            print(f"关闭输出视频失败: {e}")
+
+    def _release(self):
+        if self._closed:
+            return
+        self._closed = True
+        start = time.perf_counter()
+        try:
+            self.writer.close()  # ffmpeg在这里编码并写出最后几帧
+        finally:
+            self.encode_seconds += time.perf_counter() - start
@@ -4,6 +4,7 @@
 import os
 import uuid
 
+import pytest
 import pytest_asyncio
 from tortoise import Tortoise
 
@@ -40,3 +41,22 @@ async def user_factory():
         return await Users.create(**data)
 
     return create_user
+
+
+@pytest.fixture(scope="session")
+def yolo_model_path(tmp_path_factory):
+    """
+    不依赖下载的权重：从配置文件构建随机初始化的YOLO模型并保存为.pt，
+    调高类别0的分类偏置，让随机输入也能产生一批置信度各不相同的检测框
+    """
+    import torch
+    from ultralytics import YOLO
+
+    torch.manual_seed(0)  # 固定随机权重，各次运行得到相同的模型
+    yolo = YOLO("yolo11n.yaml")
+    head = yolo.model.model[-1]
+    for branch in head.cv3:
+        branch[-1].bias.data[0] = 1.0
+    path = tmp_path_factory.mktemp("models") / "parity.pt"
+    yolo.save(str(path))
+    return str(path)
@@ -0,0 +1,16 @@
+from src.yolo.buckets import aspect_buckets, inference_shapes
+
+
+def test_inference_shapes_keep_long_side_and_round_short_side():
+    shapes = inference_shapes(
+        [(1080, 1920), (1920, 1080), (640, 640), (100, 1000)], 640, 128
+    )
+    assert shapes.tolist() == [[384, 640], [640, 384], [640, 640], [128, 640]]
+    # imgsz不是32的倍数时与ultralytics一样向上取整，短边不超过长边
+    assert inference_shapes([(500, 500)], 600, 128).tolist() == [[608, 608]]
+
+
+def test_aspect_buckets_group_similar_shapes_in_original_order():
+    shapes = [(1080, 1920), (1920, 1080), (720, 1280), (1200, 1600), (2160, 3840)]
+    buckets = aspect_buckets(shapes, 640, 128)
+    assert buckets == {(384, 640): [0, 2, 4], (640, 384): [1], (512, 640): [3]}
@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import pytest
+
+from src.yolo.cache import CacheEntry, DetectionCache, DiskCacheTier, MemoryCacheTier
+
+
+def make_entry(n_bytes=10):
+    return CacheEntry(detections=[{"class_id": 0}], image=b"x" * n_bytes)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryCacheTier(max_entries=2)
+    tier.put("a", make_entry())
+    tier.put("b", make_entry())
+    tier.get("a")  # a变为最近使用
+    tier.put("c", make_entry())
+
+    assert tier.get("b") is None
+    assert tier.get("a") is not None and tier.get("c") is not None
+
+
+def test_memory_tier_respects_byte_budget():
+    tier = MemoryCacheTier(max_entries=100, max_bytes=250)
+    for key in "abc":
+        tier.put(key, make_entry(100))  # 每条约164字节
+
+    assert len(tier) == 1
+    assert tier.total_bytes <= 250
+
+
+def test_disk_tier_roundtrip_and_promotion(tmp_path):
+    memory = MemoryCacheTier()
+    cache = DetectionCache([memory, DiskCacheTier(str(tmp_path))])
+    key = DetectionCache.make_key(b"img", "yolo11n", 0.25, 640)
+    DiskCacheTier(str(tmp_path)).put(key, make_entry())
+
+    entry = cache.get(key)
+    assert entry.image == b"x" * 10
+    assert memory.get(key) is not None  # 磁盘命中后回填到内存层
+
+
+def test_disk_tier_hit_survives_concurrent_eviction(tmp_path, monkeypatch):
+    tier = DiskCacheTier(str(tmp_path))
+    tier.put("k", make_entry())
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)  # 读取之后、更新时间之前被其他请求淘汰
+
+    monkeypatch.setattr(os, "utime", evicted)
+    entry = tier.get("k")
+    assert entry is not None and entry.image == b"x" * 10
+
+
+def test_key_depends_on_inference_parameters():
+    base = DetectionCache.make_key(b"img", "yolo11n", 0.25, 640)
+    assert base != DetectionCache.make_key(b"img", "yolo11s", 0.25, 640)
+    assert base != DetectionCache.make_key(b"img", "yolo11n", 0.5, 640)
+    assert base != DetectionCache.make_key(b"img", "yolo11n", 0.25, 1280)
+    assert base != DetectionCache.make_key(b"img", "yolo11n", 0.25, 640, render=False)
+    assert base != DetectionCache.make_key(b"img", "yolo11n", 0.25, 640, encoding=".webp:80")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_compute_once():
+    cache = DetectionCache([MemoryCacheTier()])
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return make_entry()
+
+    outcomes = await asyncio.gather(
+        *(cache.get_or_compute("same", compute) for _ in range(5))
+    )
+    assert len(calls) == 1
+    assert [hit for _, hit in outcomes].count(False) == 1
+
+    _, hit = await cache.get_or_compute("same", compute)
+    assert hit and len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_waiting_requests():
+    cache = DetectionCache([MemoryCacheTier()])
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return make_entry()
+
+    leader = asyncio.create_task(cache.get_or_compute("same", compute))
+    await asyncio.sleep(0.01)
+    followers = [
+        asyncio.create_task(cache.get_or_compute("same", compute)) for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    leader.cancel()  # 进行计算的请求断开
+
+    outcomes = await asyncio.gather(*followers)
+    assert leader.cancelled()
+    assert len(calls) == 2  # 等待中的请求里只有一个重新计算
+    assert [hit for _, hit in outcomes].count(False) == 1
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.yolo.detections import detections_from_result, format_detections
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def test_detections_keep_float_coords_unless_int_requested():
+    result = SimpleNamespace(
+        boxes=FakeBoxes([[10.4, 20.6, 30.7, 40.2, 0.87654, 2]]), names={2: "car"}
+    )
+
+    detections = detections_from_result(result)
+    assert detections == [
+        {
+            "class_id": 2,
+            "class_name": "car",
+            "confidence": 0.8765,
+            "xyxy": [10.4, 20.6, 30.7, 40.2],
+        }
+    ]
+    assert format_detections(detections, int_coords=True)[0]["xyxy"] == [10, 21, 31, 40]
+    assert detections[0]["xyxy"] == [10.4, 20.6, 30.7, 40.2]  # 原列表不被修改
+
+
+def test_empty_result_has_no_detections():
+    assert detections_from_result(SimpleNamespace(boxes=None, names={})) == []
@@ -0,0 +1,95 @@
+import os
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from src.yolo.detector import Detector, DetectorCOnfig
+
+
+def test_detect_picture_streams_results_without_keeping_them(
+    yolo_model_path, tmp_path
+):
+    detector = Detector(yolo_model_path, DetectorCOnfig(warmup_runs=0))
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"{i}.jpg")
+        cv2.imwrite(path, rng.integers(0, 255, (240, 320, 3), dtype=np.uint8))
+        paths.append(path)
+
+    stream = detector.predict_stream(paths, conf_threshold=0.5)
+    assert isinstance(stream, types.GeneratorType)  # 结果逐个产出，不是一次性的列表
+    assert [r.orig_shape for r in stream] == [(240, 320)] * 3
+
+    output_dir = tmp_path / "out"
+    detector.detect_picture(paths, conf_threshold=0.5, output_dir=str(output_dir))
+    assert sorted(os.listdir(output_dir)) == [f"detected_{i}.jpg" for i in range(3)]
+    assert not hasattr(detector, "results")  # 结果不保留在共享的检测器上
+
+
+def write_noise_video(path, count=9, size=(160, 128)):
+    rng = np.random.default_rng(0)
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, size)
+    for _ in range(count):
+        out.write(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8))
+    out.release()
+
+
+def test_video_detections_respect_conf_threshold(yolo_model_path, tmp_path):
+    detector = Detector(yolo_model_path, DetectorCOnfig(warmup_runs=0))
+    video = tmp_path / "noise.avi"
+    write_noise_video(video)
+
+    # 逐帧检测：输出模型的检测框，不使用跟踪结果
+    single = detector.detect_video(str(video), 0.5, render=False, stride=1)
+    assert single.inferred_frames == single.frame_count == 9
+    boxes = [d for f in single.frames for d in f["detections"]]
+    assert boxes and all(d["confidence"] >= 0.5 for d in boxes)
+    assert all("track_id" not in d for d in boxes)
+
+    # 抽帧检测：低置信度检测框只用于关联，输出中的检测框都不低于阈值
+    strided = detector.detect_video(str(video), 0.5, render=False, stride=3)
+    assert strided.inferred_frames == 3
+    boxes = [d for f in strided.frames for d in f["detections"]]
+    assert boxes and all(d["confidence"] >= 0.5 for d in boxes)
+    assert all("track_id" in d for d in boxes)
+
+
+@pytest.mark.parametrize("stride, expected_peak", [(1, 4), (4, 6)])
+def test_strided_video_buffers_at_most_queue_size_frames(
+    yolo_model_path, tmp_path, monkeypatch, stride, expected_peak
+):
+    from src.yolo import detector as module
+
+    counts = {"pulled": 0, "put": 0, "peak": 0}
+
+    class CountingDecoder(module.FrameDecoder):
+        def iter_frames(self):
+            for frame in super().iter_frames():
+                counts["pulled"] += 1
+                buffered = counts["pulled"] - counts["put"]
+                counts["peak"] = max(counts["peak"], buffered)
+                yield frame
+
+    class CountingEncoder(module.FrameEncoder):
+        def put(self, frame, result):
+            counts["put"] += 1
+            super().put(frame, result)
+
+    monkeypatch.setattr(module, "FrameDecoder", CountingDecoder)
+    monkeypatch.setattr(module, "FrameEncoder", CountingEncoder)
+    config = DetectorCOnfig(warmup_runs=0, video_batch_size=4, video_queue_size=6)
+    detector = Detector(yolo_model_path, config)
+    video = tmp_path / "noise.avi"
+    write_noise_video(video, count=24)
+
+    result = detector.detect_video(str(video), 0.5, render=False, stride=stride)
+
+    assert result.frame_count == counts["put"] == 24
+    assert result.inferred_frames == 24 // stride
+    # 攒够batch_size个检测帧前，缓存的帧数不超过max(batch_size, 队列长度)
+    assert counts["peak"] == expected_peak
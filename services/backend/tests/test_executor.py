@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from src.yolo.executor import InferenceExecutor, QueueFullError
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_recovers():
+    executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    # 一个在执行，一个在排队，此时已满
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "queued")
+    assert executor.depth == 2
+
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: "rejected")
+
+    release.set()
+    running.result(timeout=5)
+    assert queued.result(timeout=5) == "queued"
+
+    # 名额归还后可以继续提交
+    assert await executor.run(lambda: 42) == 42
+    assert executor.depth == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_saturated_video_pool_does_not_block_image_pool():
+    images = InferenceExecutor(max_workers=1, max_queue_size=1)
+    videos = InferenceExecutor(max_workers=1, max_queue_size=1, name="yolo-video")
+    release = threading.Event()
+
+    # 视频线程池被长任务占满，图片任务在自己的线程池中照常执行
+    running = videos.submit(lambda: (release.wait(), threading.current_thread().name))
+    videos.submit(lambda: None)
+    with pytest.raises(QueueFullError):
+        videos.submit(lambda: None)
+    assert await images.run(lambda: 1) == 1
+
+    release.set()
+    assert running.result(timeout=5)[1].startswith("yolo-video")
+    images.shutdown()
+    videos.shutdown()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from src.yolo.image_io import decode_image, encode_image
+
+
+def gradient(height=48, width=64):
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    return np.dstack([np.tile(x, (height, 1))] * 3)
+
+
+@pytest.mark.parametrize("ext", [".png", ".jpg", ".webp"])
+def test_encode_decode_round_trip(ext):
+    image = gradient()
+    decoded = decode_image(encode_image(image, ext, quality=95))
+    assert decoded.shape == image.shape
+    # PNG无损，JPEG/WebP在高质量下只有很小的误差
+    assert np.abs(decoded.astype(int) - image).mean() < (0.01 if ext == ".png" else 3)
+
+
+def test_quality_controls_size():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    assert len(encode_image(image, ".jpg", 20)) < len(encode_image(image, ".jpg", 95))
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image", b"\xff\xd8\xff"])
+def test_invalid_bytes_raise_value_error(data):
+    with pytest.raises(ValueError):
+        decode_image(data)
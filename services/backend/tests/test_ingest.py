@@ -0,0 +1,59 @@
+import threading
+
+import cv2
+import numpy as np
+
+from src.yolo.ingest import StreamingUpload
+
+
+def make_video(path, count=12, size=(64, 48)):
+    # MKV容器不依赖文件末尾的索引，可以边写入边解码
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, size)
+    for i in range(count):
+        out.write(np.full((size[1], size[0], 3), i * 20, dtype=np.uint8))
+    out.release()
+    return path.read_bytes()
+
+
+def read_frames(source, result):
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    while True:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        result.append(1)
+    cap.release()
+
+
+def test_frames_decode_while_upload_arrives(tmp_path):
+    data = make_video(tmp_path / "in.mkv")
+    upload = StreamingUpload(str(tmp_path / "copy.mkv"))
+    frames = []
+    reader = threading.Thread(target=read_frames, args=(upload.source, frames))
+    reader.start()
+    for i in range(0, len(data), 1000):
+        assert upload.write(data[i : i + 1000])
+    upload.finish()
+    reader.join(timeout=30)
+    upload.reader_done()
+    upload.cleanup()
+
+    assert len(frames) == 12
+    assert upload.bytes_received == len(data)
+    assert (tmp_path / "copy.mkv").read_bytes() == data
+
+
+def test_write_stops_when_reader_is_done_without_copy():
+    upload = StreamingUpload()
+    upload.reader_done()
+    assert upload.write(b"x" * 10) is False
+    upload.cleanup()
+
+
+def test_copy_keeps_receiving_after_reader_is_done(tmp_path):
+    upload = StreamingUpload(str(tmp_path / "copy.bin"))
+    upload.reader_done()
+    assert upload.write(b"abc")
+    assert upload.write(b"def")
+    upload.cleanup()
+    assert (tmp_path / "copy.bin").read_bytes() == b"abcdef"
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from src.yolo.detector import DetectionCancelled, VideoDetection
+from src.yolo.executor import InferenceExecutor
+from src.yolo.jobs import JobStatus, VideoJobManager
+from src.yolo.storage import RequestStorage, StorageJanitor
+
+
+class FakeVideoDetector:
+    # 模拟detect_video：分10批"处理"，每批报告一次进度，并响应取消信号
+    def __init__(self):
+        self.gate = threading.Event()
+
+    def resolve_model(self, model=None):
+        return model or "models/fake.pt"
+
+    def detect_video(
+        self,
+        path,
+        conf,
+        output_dir=None,
+        progress_callback=None,
+        cancel_event=None,
+        model=None,
+        render=True,
+        stride=None,
+        max_stride=None,
+        motion_threshold=None,
+        segments=None,
+    ):
+        for done in range(1, 11):
+            self.gate.wait(timeout=5)
+            if cancel_event.is_set():
+                raise DetectionCancelled(path)
+            progress_callback(done * 10, 100)
+        if not render:
+            frames = [{"frame": i, "detections": []} for i in range(100)]
+            return VideoDetection(frame_count=100, frames=frames)
+        return VideoDetection(output_video_path=f"{path}.out.mp4", frame_count=100)
+
+
+async def wait_finished(job):
+    for _ in range(200):
+        if job.finished:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_job_completes_and_records_history():
+    detector = FakeVideoDetector()
+    detector.gate.set()
+    recorded = []
+
+    async def on_complete(job):
+        recorded.append(job.id)
+
+    manager = VideoJobManager(detector, InferenceExecutor(1, 1), on_complete)
+    job = await manager.submit(1, "video.mp4", "video.mp4", 0.25)
+    await wait_finished(job)
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.output_video_path == "video.mp4.out.mp4"
+    assert job.progress()["frames_processed"] == 100
+    assert recorded == [job.id]
+    # 其他用户看不到该任务
+    assert manager.get(job.id, user_id=2) is None
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_and_queued_jobs():
+    detector = FakeVideoDetector()
+    manager = VideoJobManager(detector, InferenceExecutor(1, 1))
+    running = await manager.submit(1, "a.mp4", "a.mp4", 0.25)
+    queued = await manager.submit(1, "b.mp4", "b.mp4", 0.25)
+
+    assert manager.cancel(queued)
+    assert manager.cancel(running)
+    detector.gate.set()
+    await wait_finished(running)
+    await wait_finished(queued)
+
+    assert running.status == JobStatus.CANCELLED
+    assert queued.status == JobStatus.CANCELLED
+    assert not manager.cancel(running)
+
+
+@pytest.mark.asyncio
+async def test_json_only_job_keeps_frame_detections():
+    detector = FakeVideoDetector()
+    detector.gate.set()
+    manager = VideoJobManager(detector, InferenceExecutor(1, 1))
+    job = await manager.submit(1, "video.mp4", "video.mp4", 0.25, render=False)
+    await wait_finished(job)
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.output_video_path is None
+    assert len(job.frames) == 100
+
+
+@pytest.mark.asyncio
+async def test_job_directories_are_pinned_until_finished(tmp_path):
+    uploads = RequestStorage(str(tmp_path / "uploads"))
+    outputs = RequestStorage(str(tmp_path / "outputs"))
+    upload_id, upload_dir = uploads.allocate()
+    output_id, output_dir = outputs.allocate()
+    detector = FakeVideoDetector()
+    manager = VideoJobManager(
+        detector, InferenceExecutor(1, 1), storages=[uploads, outputs]
+    )
+    running = await manager.submit(
+        1, f"{upload_dir}/a.mp4", "a.mp4", 0.25, output_dir=output_dir
+    )
+    queued = await manager.submit(1, f"{upload_dir}/b.mp4", "b.mp4", 0.25)
+
+    # 排队和处理中的任务：目录不会被清理线程删除
+    janitor = StorageJanitor([uploads, outputs], 0, 0, grace_seconds=0)
+    janitor.sweep(now=1e12)
+    assert os.path.isdir(upload_dir) and os.path.isdir(output_dir)
+
+    manager.cancel(queued)
+    assert uploads.is_pinned(upload_id)  # 仍被处理中的任务固定
+    detector.gate.set()
+    await wait_finished(running)
+    assert not uploads.is_pinned(upload_id)
+    assert not outputs.is_pinned(output_id)
+    janitor.sweep(now=1e12)
+    assert not os.path.exists(upload_dir) and not os.path.exists(output_dir)
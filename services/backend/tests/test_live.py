@@ -0,0 +1,36 @@
+import asyncio
+
+from src.yolo.live import LatestFrame, LiveStats
+
+
+def test_latest_frame_keeps_only_newest_frame():
+    async def run():
+        frames = LatestFrame()
+        for i in range(3):
+            frames.put(bytes([i]))
+        seq, data, _ = await frames.get()
+        assert (seq, data) == (2, b"\x02")
+        assert frames.dropped == 2
+
+        # get在新帧到达前等待
+        waiter = asyncio.create_task(frames.get())
+        await asyncio.sleep(0)
+        frames.put(b"x")
+        assert (await waiter)[:2] == (3, b"x")
+
+        # 断开后未处理的帧被丢弃
+        frames.put(b"y")
+        frames.close()
+        assert await frames.get() is None
+
+    asyncio.run(run())
+
+
+def test_live_stats_reports_fps_and_latency_over_window():
+    stats = LiveStats(window=3)
+    for i, latency in enumerate([100, 10, 20, 30]):
+        stats.record(latency, now=i * 0.5)
+    assert stats.processed == 4
+    assert stats.fps == 2.0  # 最近3帧跨1秒
+    assert stats.latency_ms == 20.0
+    assert stats.to_dict(dropped=5)["dropped"] == 5
@@ -0,0 +1,51 @@
+import types
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("ultralytics")
+
+from src.routes import yolo as routes
+from src.yolo.detector import Detector, DetectorCOnfig
+from src.yolo.scheduler import BatchScheduler
+
+
+def test_session_history_counts_unique_objects(yolo_model_path, monkeypatch):
+    detector = Detector(yolo_model_path, DetectorCOnfig(warmup_runs=0))
+    scheduler = BatchScheduler(detector)
+    scheduler.start()
+    records = []
+
+    async def authenticate(websocket):
+        return types.SimpleNamespace(id=1)
+
+    async def create_record(user_id, record):
+        records.append(record)
+
+    monkeypatch.setattr(routes, "detector", detector)
+    monkeypatch.setattr(routes, "scheduler", scheduler)
+    monkeypatch.setattr(routes, "readiness", types.SimpleNamespace(ready=True))
+    monkeypatch.setattr(routes, "authenticate_websocket", authenticate)
+    monkeypatch.setattr(routes, "create_detection_record", create_record)
+    app = FastAPI()
+    app.include_router(routes.router)
+
+    rng = np.random.default_rng(0)
+    frame = cv2.imencode(
+        ".jpg", rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    )[1].tobytes()
+    counts = []
+    client = TestClient(app)  # 不进入with，不触发启动时的模型加载
+    with client.websocket_connect("/yolo/ws/detect?conf_threshold=0.5") as ws:
+        for _ in range(3):
+            ws.send_bytes(frame)
+            counts.append(len(ws.receive_json()["detections"]))
+    scheduler.stop()
+
+    # 同一画面连续3帧：每个目标只计一次
+    assert counts[0] > 0 and counts == [counts[0]] * 3
+    assert len(records) == 1
+    assert records[0].detected_objects_count == counts[0]
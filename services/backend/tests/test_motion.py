@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.yolo.motion import MotionGate, motion_score, motion_thumbnail
+
+
+def frame(value, size=(120, 160)):
+    return np.full((*size, 3), value, dtype=np.uint8)
+
+
+def test_thumbnail_and_score():
+    a = motion_thumbnail(frame(0), size=16)
+    b = motion_thumbnail(frame(255), size=16)
+    assert a.shape == (16, 16)
+    assert motion_score(a, a) == 0.0
+    assert np.isclose(motion_score(a, b), 1.0)
+
+
+def test_static_frames_reuse_until_max_staleness():
+    gate = MotionGate(threshold=0.05, max_staleness=3)
+    decisions = [gate.should_infer(i, frame(100)) for i in range(7)]
+    assert decisions == [True, False, False, True, False, False, True]
+
+
+def test_change_is_measured_against_last_inferred_frame():
+    gate = MotionGate(threshold=0.05, max_staleness=100)
+    assert gate.should_infer(0, frame(100))
+    # 每帧只变化一点，但相对上一次推理的帧累积超过阈值后会触发推理
+    decisions = [gate.should_infer(i, frame(100 + 4 * i)) for i in range(1, 6)]
+    assert decisions == [False, False, False, True, False]
+
+
+def test_zero_threshold_disables_gate():
+    gate = MotionGate(threshold=0.0)
+    assert all(gate.should_infer(i, frame(100)) for i in range(5))
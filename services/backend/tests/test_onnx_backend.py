@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("ultralytics")
+
+from src.yolo.detector import Detector, DetectorCOnfig
+from src.yolo.tracker import box_iou, greedy_match
+
+
+def test_onnx_backend_matches_torch(yolo_model_path, tmp_path):
+    torch_detector = Detector(yolo_model_path, DetectorCOnfig())
+    onnx_detector = Detector(
+        yolo_model_path,
+        DetectorCOnfig(inference_backend="onnx", onnx_cache_dir=str(tmp_path)),
+    )
+    rng = np.random.default_rng(0)
+    images = [
+        rng.integers(0, 255, (480, 640, 3), dtype=np.uint8),
+        rng.integers(0, 255, (480, 640, 3), dtype=np.uint8),
+    ]
+
+    expected = torch_detector.predict_batch(images, conf_threshold=0.5)
+    actual = onnx_detector.predict_batch(images, conf_threshold=0.5)
+
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        assert len(e.boxes) > 0
+        assert a.names == e.names
+        assert a.orig_shape == e.orig_shape
+        # 数值误差可能让置信度接近阈值的框取舍不同、置信度相近的框顺序不同，
+        # 只比较置信度最高的一批框，并且按位置配对而不是按顺序比较
+        expected_boxes = e.boxes.data.numpy()[:10]
+        actual_boxes = a.boxes.data.numpy()
+        iou = box_iou(expected_boxes[:, :4], actual_boxes[:, :4])
+        iou *= expected_boxes[:, None, 5] == actual_boxes[None, :, 5]  # 类别相同才配对
+        rows, cols = greedy_match(iou, 0.9)
+        assert len(rows) == len(expected_boxes)
+        np.testing.assert_allclose(
+            actual_boxes[cols, 4], expected_boxes[rows, 4], atol=1e-2
+        )
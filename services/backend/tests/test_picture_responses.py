@@ -0,0 +1,169 @@
+import json
+import types
+
+import cv2
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+pytest.importorskip("ultralytics")
+
+from src.auth.jwthandler import get_current_user
+from src.routes import yolo as routes
+from src.yolo.cache import DetectionCache, MemoryCacheTier
+from src.yolo.detector import Detector, DetectorCOnfig
+from src.yolo.scheduler import BatchScheduler
+from src.yolo.storage import RequestStorage
+
+
+@pytest_asyncio.fixture()
+async def client(yolo_model_path, user_factory, monkeypatch):
+    # 路由使用测试模型、独立的缓存和调度器，结果不落盘
+    detector = Detector(
+        yolo_model_path,
+        DetectorCOnfig(warmup_runs=0, persist_uploads=False, persist_outputs=False),
+    )
+    scheduler = BatchScheduler(detector)
+    scheduler.start()
+    monkeypatch.setattr(routes, "detector", detector)
+    monkeypatch.setattr(routes, "scheduler", scheduler)
+    monkeypatch.setattr(routes, "image_cache", DetectionCache([MemoryCacheTier()]))
+
+    user = await user_factory()
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_current_user] = lambda: types.SimpleNamespace(
+        id=user.id
+    )
+    app.dependency_overrides[routes.require_detector_ready] = lambda: None
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+    scheduler.stop()
+
+
+def image_bytes(seed, ext=".jpg"):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    return cv2.imencode(ext, image)[1].tobytes()
+
+
+def decode(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def split_multipart(response):
+    boundary = response.headers["content-type"].split("boundary=")[1]
+    body = response.content
+    assert body.endswith(f"--{boundary}--\r\n".encode())
+    parts = []
+    for chunk in body.split(f"--{boundary}".encode())[1:-1]:
+        head, data = chunk.strip(b"\r\n").split(b"\r\n\r\n", 1)
+        headers = dict(
+            line.split(": ", 1) for line in head.decode().split("\r\n")
+        )
+        parts.append((headers, data))
+    return parts
+
+
+@pytest.mark.asyncio
+async def test_image_response_returns_annotated_image_with_headers(client):
+    files = {"files": ("a.png", image_bytes(0, ".png"), "image/png")}
+    data = {"response_format": "image", "image_format": "webp", "conf_threshold": "0.5"}
+
+    first = await client.post("/yolo/detect_picture", files=files, data=data)
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "image/webp"
+    assert decode(first.content).shape == (240, 320, 3)
+    assert int(first.headers["x-detected-objects"]) > 0
+    assert float(first.headers["x-processing-time"]) >= 0
+    assert first.headers["x-cache"] == "miss"
+
+    second = await client.post("/yolo/detect_picture", files=files, data=data)
+    assert second.headers["x-cache"] == "hit"
+    assert second.headers["x-detected-objects"] == first.headers["x-detected-objects"]
+    assert second.content == first.content
+
+
+@pytest.mark.asyncio
+async def test_multipart_response_has_summary_then_one_image_per_upload(client):
+    files = [
+        ("files", ("a.jpg", image_bytes(1), "image/jpeg")),
+        ("files", ("b.jpg", image_bytes(2), "image/jpeg")),
+    ]
+    response = await client.post(
+        "/yolo/detect_picture",
+        files=files,
+        data={"response_format": "multipart", "conf_threshold": "0.5"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("multipart/mixed; boundary=")
+    parts = split_multipart(response)
+    assert len(parts) == 3
+
+    headers, data = parts[0]
+    assert headers["Content-Type"] == "application/json; charset=utf-8"
+    summary = json.loads(data)
+    assert [d["file_name"] for d in summary["detections"]] == ["a.jpg", "b.jpg"]
+    assert summary["detected_objects"] == sum(
+        len(d["detections"]) for d in summary["detections"]
+    )
+    assert summary["output_images"] == []  # 内联返回的图片不落盘
+
+    for i, (headers, data) in enumerate(parts[1:]):
+        assert headers["Content-Type"] == "image/jpeg"
+        assert headers["Content-Disposition"] == f'inline; filename="detected_{i}.jpg"'
+        assert decode(data).shape == (240, 320, 3)
+
+
+@pytest.mark.asyncio
+async def test_inline_formats_reject_invalid_combinations(client):
+    two = [
+        ("files", ("a.jpg", image_bytes(1), "image/jpeg")),
+        ("files", ("b.jpg", image_bytes(2), "image/jpeg")),
+    ]
+    response = await client.post(
+        "/yolo/detect_picture", files=two, data={"response_format": "image"}
+    )
+    assert response.status_code == 400
+
+    response = await client.post(
+        "/yolo/detect_picture",
+        files=two[:1],
+        data={"response_format": "multipart", "render": "false"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data", [b"", b"not an image"])
+async def test_empty_or_undecodable_upload_is_bad_request(client, data):
+    files = {"files": ("a.jpg", data, "image/jpeg")}
+    response = await client.post("/yolo/detect_picture", files=files)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("persist", [True, False])
+async def test_persist_flags_control_disk_writes(
+    client, monkeypatch, tmp_path, persist
+):
+    monkeypatch.setattr(routes.detector.config, "persist_uploads", persist)
+    monkeypatch.setattr(routes.detector.config, "persist_outputs", persist)
+    uploads = RequestStorage(str(tmp_path / "uploads"))
+    outputs = RequestStorage(str(tmp_path / "outputs"))
+    monkeypatch.setattr(routes, "upload_images", uploads)
+    monkeypatch.setattr(routes, "output_images", outputs)
+
+    files = {"files": ("a.jpg", image_bytes(3), "image/jpeg")}
+    response = await client.post(
+        "/yolo/detect_picture", files=files, data={"conf_threshold": "0.5"}
+    )
+
+    assert response.status_code == 200
+    written = sorted(p.parent.parent.name for p in tmp_path.rglob("*.*"))
+    assert written == (["outputs", "uploads"] if persist else [])
+    assert len(response.json()["output_images"]) == (1 if persist else 0)
@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("ultralytics")
+
+from src.yolo.detector import DetectorCOnfig
+from src.yolo.quantize import build_variant, load_reports, match_predictions
+
+
+@pytest.fixture()
+def workspace(yolo_model_path, tmp_path):
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    shutil.copy(yolo_model_path, models_dir / "tiny.pt")
+    # 没有labels/目录：以FP32模型的检测结果作为参考标注
+    images_dir = tmp_path / "val" / "images"
+    images_dir.mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    for i in range(3):
+        image = rng.integers(0, 255, (320, 320, 3), dtype=np.uint8)
+        cv2.imwrite(str(images_dir / f"{i}.png"), image)
+    config = DetectorCOnfig(
+        models_dir=str(models_dir),
+        onnx_cache_dir=str(tmp_path / "onnx"),
+        default_imgsz=320,
+    )
+    return config, str(tmp_path / "val")
+
+
+@pytest.mark.parametrize("mode", ["dynamic", "static"])
+def test_accepted_variant_is_registered(workspace, mode):
+    config, val_dir = workspace
+    report = build_variant(
+        "tiny.pt",
+        mode,
+        val_dir=val_dir,
+        calib_dir=os.path.join(val_dir, "images"),
+        max_map_drop=1.0,
+        config=config,
+        min_speedup=0.01,  # 随机初始化的小模型上INT8不一定更快，这里只检查登记流程
+    )
+
+    assert report["accepted"]
+    assert report["rejected_reasons"] == []
+    assert report["model"] == f"tiny-int8-{mode}.onnx"
+    assert report["fp32"]["images"] == 3
+    assert report["int8"]["latency_ms"] > 0
+    assert os.path.exists(os.path.join(config.models_dir, report["model"]))
+    assert [r["model"] for r in load_reports(config.models_dir)] == [report["model"]]
+
+
+def test_variant_losing_too_much_accuracy_is_rejected(workspace):
+    config, val_dir = workspace
+    # 阈值为负数时任何变体都无法通过门禁
+    report = build_variant(
+        "tiny.pt",
+        "dynamic",
+        val_dir=val_dir,
+        max_map_drop=-1.0,
+        config=config,
+        min_speedup=0.01,
+    )
+
+    assert not report["accepted"]
+    assert [r.split()[0] for r in report["rejected_reasons"]] == ["mAP50-95"]
+    assert not os.path.exists(os.path.join(config.models_dir, report["model"]))
+    assert load_reports(config.models_dir) == []
+
+
+def test_variant_that_is_not_faster_is_rejected(workspace):
+    config, val_dir = workspace
+    report = build_variant(
+        "tiny.pt",
+        "dynamic",
+        val_dir=val_dir,
+        max_map_drop=1.0,
+        config=config,
+        min_speedup=1000.0,
+    )
+
+    assert not report["accepted"]
+    assert report["rejected_reasons"] == [
+        f"speedup {report['speedup']}x is below 1000.0x"
+    ]
+    assert not os.path.exists(os.path.join(config.models_dir, report["model"]))
+
+
+def test_match_predictions_requires_same_class_and_iou():
+    labels = np.array([[0, 0, 0, 10, 10]], dtype=float)
+    preds = np.array(
+        [
+            [0, 0, 10, 10, 0.9, 0],  # 完全重合
+            [0, 0, 10, 10, 0.8, 1],  # 类别不同
+            [0, 0, 10, 6, 0.7, 0],  # IoU=0.6，且标注已被第一个框匹配
+        ],
+        dtype=float,
+    )
+    correct = match_predictions(preds, labels, np.array([0.5, 0.95]))
+
+    assert correct.tolist() == [[True, True], [False, False], [False, False]]
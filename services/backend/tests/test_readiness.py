@@ -0,0 +1,38 @@
+from src.yolo.readiness import DetectorReadiness
+
+
+class FakeDetector:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def load_model(self):
+        self.calls.append("load")
+        if self.fail:
+            raise FileNotFoundError("missing.pt")
+
+    def warmup(self):
+        self.calls.append("warmup")
+        return 0.01
+
+
+def test_loads_then_warms_up_in_background():
+    readiness = DetectorReadiness()
+    detector = FakeDetector()
+    assert not readiness.ready
+
+    readiness.start(detector).join(timeout=5)
+
+    assert readiness.ready
+    assert detector.calls == ["load", "warmup"]
+    state = readiness.to_dict()
+    assert state["status"] == "ready"
+    assert state["cold_start_seconds"] is not None
+
+
+def test_load_failure_is_reported():
+    readiness = DetectorReadiness()
+    readiness.start(FakeDetector(fail=True)).join(timeout=5)
+
+    assert readiness.status == "failed"
+    assert "missing.pt" in readiness.error
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from src.yolo.registry import ModelRegistry
+
+
+def make_registry(budget=2):
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        time.sleep(0.02)
+        return f"model:{path}"
+
+    # 每个模型按1字节计，预算即为可同时加载的模型数量
+    registry = ModelRegistry(loader, budget, size_of=lambda path, model: 1)
+    return registry, loads
+
+
+def test_models_load_lazily_and_once_under_concurrency():
+    registry, loads = make_registry()
+
+    def use():
+        with registry.lease("a.pt") as entry:
+            assert entry.model == "model:a.pt"
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == ["a.pt"]
+
+
+def test_lru_eviction_skips_models_in_use():
+    registry, loads = make_registry(budget=2)
+
+    held = registry.acquire("a.pt")  # a一直被占用
+    with registry.lease("b.pt"):
+        pass
+    with registry.lease("c.pt"):  # 超出预算：a在使用中，淘汰b
+        pass
+
+    assert registry.is_loaded("a.pt")
+    assert not registry.is_loaded("b.pt")
+    assert registry.is_loaded("c.pt")
+
+    registry.release(held)
+    with registry.lease("c.pt"):  # 已加载的模型不会重新加载
+        pass
+    assert loads == ["a.pt", "b.pt", "c.pt"]
+
+
+def test_discard_waits_for_in_flight_users():
+    registry, _ = make_registry(budget=10)
+
+    held = registry.acquire("old.pt")
+    registry.discard("old.pt")
+    assert registry.is_loaded("old.pt")  # 仍在使用，暂不卸载
+
+    registry.release(held)
+    assert not registry.is_loaded("old.pt")
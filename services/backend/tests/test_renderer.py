@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.yolo.renderer import class_color, draw_detections, render_result, text_size
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def make_result(rows):
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    return SimpleNamespace(
+        orig_img=image, boxes=FakeBoxes(rows), names={0: "person", 1: "car"}
+    )
+
+
+def test_draws_only_boxes_above_threshold_with_fixed_colors():
+    result = make_result(
+        [
+            [10, 30, 40, 60, 0.9, 0],
+            [60, 60, 90, 90, 0.1, 1],  # 低于阈值，不绘制
+        ]
+    )
+    image = render_result(result, conf_threshold=0.25)
+
+    assert not result.orig_img.any()  # 原图不被修改
+    assert tuple(image[45, 10]) == class_color(0)  # 左边框
+    assert not image[75, 60:91].any()
+    assert class_color(0) == class_color(0 + 20)  # 调色板固定，按长度取模
+
+
+def test_label_sizes_are_cached():
+    text_size.cache_clear()
+    result = make_result([[10, 30, 40, 60, 0.5, 0], [50, 30, 80, 60, 0.5, 0]])
+    draw_detections(result.orig_img, result)
+
+    info = text_size.cache_info()
+    assert info.misses == 1 and info.hits == 1  # 两个框的标签相同，只测量一次
+
+
+def test_empty_result_returns_image_unchanged():
+    result = SimpleNamespace(orig_img=np.zeros((10, 10, 3), np.uint8), boxes=None, names={})
+    assert not render_result(result).any()
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from src.yolo.detector import DetectorCOnfig
+from src.yolo.scheduler import BatchScheduler
+
+
+class FakeDetector:
+    # 只记录每次批量推理的输入，用输入本身作为"检测结果"
+    def __init__(self, config=None):
+        self.config = config or DetectorCOnfig()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def predict_batch(self, sources, conf_threshold=None, imgsz=None, model_path=None):
+        with self.lock:
+            self.calls.append((list(sources), conf_threshold))
+        return [f"result:{s}" for s in sources]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_merged_into_one_batch():
+    detector = FakeDetector(DetectorCOnfig(batch_max_size=8, batch_max_wait_ms=50))
+    scheduler = BatchScheduler(detector)
+
+    results = await scheduler.detect(["a", "b", "c"], 0.25)
+    scheduler.stop()
+
+    # 每个调用方拿回自己的结果，且只发生了一次predict
+    assert results == ["result:a", "result:b", "result:c"]
+    assert detector.calls == [(["a", "b", "c"], 0.25)]
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_size_and_conf_groups():
+    detector = FakeDetector(DetectorCOnfig(batch_max_size=2, batch_max_wait_ms=50))
+    scheduler = BatchScheduler(detector)
+
+    low = scheduler.submit("x", 0.25)
+    high = scheduler.submit("y", 0.5)
+    rest = await scheduler.detect(["z1", "z2", "z3"], 0.25)
+    scheduler.stop()
+
+    assert low.result() == "result:x"
+    assert high.result() == "result:y"
+    assert rest == ["result:z1", "result:z2", "result:z3"]
+    assert all(len(sources) <= 2 for sources, _ in detector.calls)
+    # 不同阈值的请求不会出现在同一次predict中
+    for sources, conf in detector.calls:
+        assert ("y" in sources) == (conf == 0.5)
+
+
+@pytest.mark.asyncio
+async def test_requests_with_different_imgsz_are_not_merged():
+    detector = FakeDetector(DetectorCOnfig(batch_max_size=8, batch_max_wait_ms=50))
+    sizes = []
+    predict_batch = detector.predict_batch
+
+    def record(sources, conf_threshold=None, imgsz=None, model_path=None):
+        sizes.append((list(sources), imgsz))
+        return predict_batch(sources, conf_threshold, imgsz, model_path)
+
+    detector.predict_batch = record
+    scheduler = BatchScheduler(detector)
+
+    small = scheduler.submit("s", 0.25, imgsz=320)
+    rest = await scheduler.detect(["a", "b"], 0.25)
+    scheduler.stop()
+
+    assert small.result() == "result:s"
+    assert rest == ["result:a", "result:b"]
+    # 未指定尺寸的请求使用配置中的默认值
+    assert sorted(sizes, key=lambda call: call[1]) == [(["s"], 320), (["a", "b"], 640)]
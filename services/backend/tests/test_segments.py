@@ -0,0 +1,85 @@
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from src.yolo.segments import concat_videos, segment_ranges, worker_threads
+from src.yolo.video_writer import VideoEncodeOptions
+
+
+def test_segment_ranges_cover_video_in_order():
+    assert segment_ranges(100, 3) == [(0, 33), (33, 66), (66, 100)]
+    assert segment_ranges(100, 4, min_frames=30) == [(0, 33), (33, 66), (66, 100)]
+    assert segment_ranges(50, 8, min_frames=100) == [(0, 50)]
+    assert segment_ranges(0, 4) == []
+
+
+def test_worker_threads_split_cores():
+    assert worker_threads(4, cpu_count=32) == 8
+    assert worker_threads(3, cpu_count=32) == 10
+    assert worker_threads(8, cpu_count=4) == 1
+
+
+def write_video(path, values, size=(64, 48)):
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, size)
+    for value in values:
+        out.write(np.full((size[1], size[0], 3), value, dtype=np.uint8))
+    out.release()
+
+
+@pytest.mark.parametrize("backend", ["opencv", "ffmpeg"])
+def test_concat_videos_keeps_segment_order(tmp_path, backend):
+    if backend == "ffmpeg" and shutil.which("ffmpeg") is None:
+        pytest.skip("ffmpeg not installed")
+    options = VideoEncodeOptions(backend=backend, codec="mp4v")
+    parts = [tmp_path / "0.mp4", tmp_path / "1.mp4"]
+    write_video(parts[0], [0] * 5)
+    write_video(parts[1], [255] * 3)
+
+    paths = [str(p) for p in parts]
+    output, _ = concat_videos(paths, str(tmp_path / "out"), options, 10)
+
+    assert output == str(tmp_path / "out.mp4")
+    cap = cv2.VideoCapture(output)
+    means = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        means.append(frame.mean())
+    cap.release()
+    assert len(means) == 8
+    assert all(m < 30 for m in means[:5]) and all(m > 225 for m in means[5:])
+
+
+def test_segmented_detection_matches_single_process(yolo_model_path, tmp_path):
+    pytest.importorskip("ultralytics")
+    from src.yolo.detector import Detector, DetectorCOnfig
+
+    # MJPG的每一帧独立编码，按帧序号定位是精确的
+    rng = np.random.default_rng(0)
+    video = str(tmp_path / "clip.avi")
+    out = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"MJPG"), 10, (160, 128))
+    for _ in range(12):
+        out.write(rng.integers(0, 255, (128, 160, 3), dtype=np.uint8))
+    out.release()
+
+    config = DetectorCOnfig(warmup_runs=0, video_segment_min_frames=1)
+    detector = Detector(yolo_model_path, config)
+    options = dict(output_dir=str(tmp_path / "out"), render=False, stride=1)
+    single = detector.detect_video(video, 0.5, segments=1, **options)
+    split = detector.detect_video(video, 0.5, segments=3, **options)
+
+    assert split.frame_count == single.frame_count == 12
+    assert split.inferred_frames == single.inferred_frames
+    assert [f["frame"] for f in split.frames] == list(range(12))
+    assert sum(len(f["detections"]) for f in single.frames) > 0
+    for a, b in zip(split.frames, single.frames):
+        # 各进程的批次划分不同，只允许浮点误差
+        assert [d["class_id"] for d in a["detections"]] == [
+            d["class_id"] for d in b["detections"]
+        ]
+        for da, db in zip(a["detections"], b["detections"]):
+            assert da["confidence"] == pytest.approx(db["confidence"], abs=1e-3)
+            assert da["xyxy"] == pytest.approx(db["xyxy"], abs=0.1)
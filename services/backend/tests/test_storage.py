@@ -0,0 +1,60 @@
+import os
+
+from src.yolo.storage import RequestStorage, StorageJanitor
+
+
+def make_request(storage, name, size, modified_at):
+    request_id, directory = storage.allocate()
+    relative = storage.write(request_id, name, b"x" * size)
+    os.utime(os.path.join(directory, name), (modified_at, modified_at))
+    os.utime(directory, (modified_at, modified_at))
+    return relative, directory
+
+
+def test_requests_are_isolated(tmp_path):
+    storage = RequestStorage(str(tmp_path))
+    first, _ = make_request(storage, "detected_0.jpg", 3, 0)
+    second, _ = make_request(storage, "detected_0.jpg", 5, 0)
+
+    assert first != second
+    assert first.endswith("/detected_0.jpg")
+    assert os.path.getsize(tmp_path / first) == 3
+    assert os.path.getsize(tmp_path / second) == 5
+    assert not [f for f in os.listdir(tmp_path / first.split("/")[0]) if f.endswith(".tmp")]
+
+
+def test_janitor_evicts_expired_then_oldest_over_quota(tmp_path):
+    images = RequestStorage(str(tmp_path / "images"))
+    videos = RequestStorage(str(tmp_path / "videos"))
+    now = 10_000.0
+    _, expired = make_request(images, "a.jpg", 10, now - 5000)
+    _, oldest = make_request(videos, "b.mp4", 60, now - 900)
+    _, newer = make_request(images, "c.jpg", 50, now - 600)
+    _, active = make_request(videos, "d.mp4", 500, now - 10)  # 仍在写入，受保护
+
+    janitor = StorageJanitor(
+        [images, videos], ttl_seconds=3600, max_bytes=600, grace_seconds=60
+    )
+    stats = janitor.sweep(now)
+
+    assert not os.path.exists(expired)  # 超过TTL
+    assert not os.path.exists(oldest)  # 超出配额，先删最旧的
+    assert os.path.exists(newer)
+    assert os.path.exists(active)
+    assert stats == {"removed": 2, "freed_bytes": 70, "total_bytes": 550}
+
+
+def test_janitor_skips_pinned_requests(tmp_path):
+    storage = RequestStorage(str(tmp_path))
+    _, pinned = make_request(storage, "a.mp4", 10, 0)
+    _, other = make_request(storage, "b.mp4", 10, 0)
+    janitor = StorageJanitor([storage], ttl_seconds=60, max_bytes=0, grace_seconds=0)
+
+    with storage.pinned(os.path.join(pinned, "a.mp4"), None, "/elsewhere/c.mp4"):
+        stats = janitor.sweep(10_000.0)
+        assert os.path.exists(pinned)
+        assert not os.path.exists(other)
+        assert stats["total_bytes"] == 10  # 固定的目录仍计入总大小
+
+    janitor.sweep(10_000.0)
+    assert not os.path.exists(pinned)
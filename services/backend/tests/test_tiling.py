@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.yolo.tiling import merge_detections, offset_boxes, tile_grid
+
+
+def test_tile_grid_covers_image_with_equal_overlapping_tiles():
+    grid = tile_grid(1000, 1500, 640, 0.25)
+    assert grid[:, 0].min() == 0 and grid[:, 1].min() == 0
+    assert grid[:, 2].max() == 1500 and grid[:, 3].max() == 1000
+    # 最后一块贴齐边缘，所有图块大小相同
+    assert set((grid[:, 2] - grid[:, 0]).tolist()) == {640}
+    assert set((grid[:, 3] - grid[:, 1]).tolist()) == {640}
+    # 小于图块的图像只有一个图块
+    assert tile_grid(300, 400, 640, 0.2).tolist() == [[0, 0, 400, 300]]
+
+
+def test_offset_and_merge_deduplicates_boxes_across_tiles():
+    grid = np.array([[0, 0, 640, 640], [500, 0, 1140, 640]])
+    boxes = [
+        # 完整的目标，以及另一个类别的目标
+        np.array([[520, 100, 600, 180, 0.9, 0], [10, 10, 50, 50, 0.8, 1]]),
+        # 右侧图块中被截断的同一目标(原图坐标520-580)，置信度较低
+        np.array([[20, 100, 80, 180, 0.6, 0]]),
+    ]
+    merged = offset_boxes(boxes, grid)
+    assert merged[2, :4].tolist() == [520, 100, 580, 180]
+
+    kept = merge_detections(merged, 0.5, "ios")
+    assert kept[:, 4].tolist() == pytest.approx([0.9, 0.8])
+    # IoU只有0.75，阈值0.8时截断的框不会被合并
+    assert len(merge_detections(merged, 0.8, "iou")) == 3
+
+
+def test_detect_tiled_returns_boxes_in_original_coordinates(yolo_model_path):
+    pytest.importorskip("ultralytics")
+    from src.yolo.detector import Detector, DetectorCOnfig
+
+    detector = Detector(
+        yolo_model_path, DetectorCOnfig(tile_size=320, tile_full_image=False)
+    )
+    image = np.random.default_rng(0).integers(0, 255, (500, 900, 3), dtype=np.uint8)
+    result = detector.detect_tiled(image, conf_threshold=0.5)
+
+    assert result.orig_shape == (500, 900)
+    xyxy = result.boxes.xyxy.numpy()
+    assert len(xyxy) > 0
+    assert xyxy[:, 2].max() > 320  # 包含来自非第一个图块的检测框
+    assert (xyxy[:, [0, 2]] <= 900).all() and (xyxy[:, [1, 3]] <= 500).all()
@@ -0,0 +1,87 @@
+import numpy as np
+
+from src.yolo.tracker import AdaptiveStride, ByteTracker, box_iou, greedy_match
+
+
+def det(x1, y1, x2, y2, conf=0.9, cls=0):
+    return [x1, y1, x2, y2, conf, cls]
+
+
+def step(tracker, rows):
+    tracker.predict()
+    return tracker.update(np.array(rows, dtype=float).reshape(-1, 6))
+
+
+def test_box_iou_and_greedy_match():
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=float)
+    b = np.array([[20, 20, 30, 30], [0, 0, 10, 5]], dtype=float)
+    iou = box_iou(a, b)
+    assert np.allclose(iou, [[0, 0.5], [1, 0]])
+
+    rows, cols = greedy_match(iou, 0.3)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 0)]
+    assert len(greedy_match(iou, 0.6)[0]) == 1
+
+
+def test_ids_stay_stable_for_moving_objects():
+    tracker = ByteTracker(high_conf=0.5, min_hits=2)
+    ids = []
+    for t in range(5):
+        moving = det(10 + 2 * t, 10, 50 + 2 * t, 50)
+        tracks, _ = step(tracker, [moving, det(200, 200, 260, 260)])
+        ids.append(sorted(tracks[:, 4].astype(int).tolist()))
+
+    assert ids == [[1, 2]] * 5
+    assert tracker.unique_objects == 2
+
+
+def test_low_confidence_detection_continues_track_without_output():
+    tracker = ByteTracker(high_conf=0.5, max_age=1)
+    step(tracker, [det(10, 10, 50, 50)])
+    # 低置信度检测框只用于延续轨迹，不出现在输出中，中间帧也不传递
+    tracks, _ = step(tracker, [det(11, 10, 51, 50, conf=0.2)])
+    assert len(tracks) == 0
+    tracker.predict()
+    assert len(tracker.tracks()) == 0
+
+    # 低置信度检测框不会新建轨迹
+    tracks, _ = step(
+        tracker, [det(11, 10, 51, 50, conf=0.2), det(300, 300, 340, 340, conf=0.2)]
+    )
+    assert len(tracks) == 0
+    # 轨迹一直被低置信度检测框延续，置信度恢复后仍是原来的ID
+    tracks, _ = step(tracker, [det(12, 10, 52, 50)])
+    assert tracks[:, 4].tolist() == [1]
+    assert tracker.unique_objects == 1
+
+
+def test_tracks_propagate_between_detections():
+    tracker = ByteTracker(high_conf=0.5)
+    for t in range(4):
+        step(tracker, [det(10 * t, 0, 10 * t + 40, 40)])
+    tracker.predict()
+    tracks = tracker.tracks()
+    assert tracks[:, 4].tolist() == [1]
+    # 匀速运动的目标被预测到下一帧的位置附近
+    assert abs(tracks[0, 0] - 40) < 5
+
+
+def test_stale_tracks_are_removed():
+    tracker = ByteTracker(high_conf=0.5, max_age=2)
+    step(tracker, [det(10, 10, 50, 50)])
+    for _ in range(3):
+        tracks, disagreement = step(tracker, [])
+    assert len(tracks) == 0
+    assert disagreement == 1.0
+    assert len(tracker.ids) == 0
+
+
+def test_adaptive_stride():
+    stride = AdaptiveStride(stride=2, max_stride=4, low=0.1, high=0.5)
+    assert [stride.update(0.0) for _ in range(3)] == [3, 4, 4]
+    assert stride.update(0.9) == 2
+    assert stride.update(0.3) == 2
+
+    fixed = AdaptiveStride(stride=3, max_stride=1)
+    assert fixed.update(0.0) == 3
+    assert fixed.update(1.0) == 3
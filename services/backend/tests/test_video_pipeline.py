@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+from src.yolo.video_pipeline import FrameDecoder, FrameEncoder, FrameStream
+
+
+class FakeCapture:
+    # 模拟cv2.VideoCapture，依次返回0..n-1作为"帧"
+    def __init__(self, n):
+        self.frames = list(range(n))
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+def test_pipeline_keeps_frame_order_and_batches():
+    stop_event = threading.Event()
+    written = []
+    decoder = FrameDecoder(FakeCapture(10), queue_size=2, stop_event=stop_event)
+    encoder = FrameEncoder(
+        lambda frame, result: written.append((frame, result)),
+        queue_size=2,
+        stop_event=stop_event,
+    )
+    decoder.start()
+    encoder.start()
+
+    batch_sizes = []
+    for frames in decoder.batches(4):
+        batch_sizes.append(len(frames))
+        for frame in frames:
+            encoder.put(frame, frame * 10)
+    encoder.close()
+    decoder.join()
+
+    assert batch_sizes == [4, 4, 2]
+    assert written == [(i, i * 10) for i in range(10)]
+
+
+def test_decoder_stops_after_max_frames():
+    stop_event = threading.Event()
+    capture = FakeCapture(10)
+    decoder = FrameDecoder(capture, queue_size=4, stop_event=stop_event, max_frames=6)
+    decoder.start()
+
+    assert [frame for batch in decoder.batches(4) for frame in batch] == list(range(6))
+    decoder.join()
+    assert capture.frames == list(range(6, 10))  # 之后的帧没有被读取
+
+
+def test_frame_stream_delivers_frames_and_stops_producer_on_cancel():
+    stream = FrameStream(queue_size=2)
+
+    def produce():
+        for i in range(5):
+            stream.put(bytes([i]))
+        stream.close()
+
+    async def consume():
+        return [item async for item in stream]
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    assert asyncio.run(consume()) == [bytes([i]) for i in range(5)]
+    producer.join()
+
+    # 消费者断开后，阻塞在满队列上的生产方应立即返回False
+    stream = FrameStream(queue_size=1)
+    assert stream.put(b"a")
+    stream.cancel()
+    assert not stream.put(b"b")
+
+
+def test_frame_stream_put_gives_up_when_consumer_stalls():
+    # 消费者没有读取也没有取消(如响应开始前断开)：等待超时后按断开处理
+    stream = FrameStream(queue_size=1, stall_timeout=0.2)
+    assert stream.put(b"a")
+    assert not stream.put(b"b")
+    assert stream.cancel_event.is_set()
+    stream.close()  # 已取消，不会阻塞在满队列上
@@ -0,0 +1,112 @@
+import asyncio
+import io
+import threading
+import types
+
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, UploadFile
+
+from src.auth.jwthandler import get_current_user
+from src.routes import yolo as routes
+from src.yolo.detector import DetectionCancelled
+from src.yolo.executor import QueueFullError
+from src.yolo.storage import RequestStorage
+
+
+@pytest_asyncio.fixture()
+async def client():
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_current_user] = lambda: types.SimpleNamespace(id=1)
+    app.dependency_overrides[routes.require_detector_ready] = lambda: None
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "url", ["/yolo/detect_video", "/yolo/detect_video/stream", "/yolo/video_jobs"]
+)
+async def test_upload_is_saved_off_the_event_loop(client, monkeypatch, url):
+    threads = []
+
+    def save(file):
+        threads.append(threading.current_thread())
+        raise OSError("disk full")
+
+    monkeypatch.setattr(routes, "save_upload_video", save)
+    monkeypatch.setattr(routes.detector, "resolve_model", lambda model=None: "m.pt")
+    response = await client.post(url, files={"file": ("a.mp4", b"x", "video/mp4")})
+
+    assert response.status_code == 500
+    # 大文件的复制在线程池中进行，不阻塞事件循环
+    assert threads and threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("render", ["true", "false"])
+async def test_rejected_job_removes_its_directories(
+    client, monkeypatch, tmp_path, render
+):
+    async def submit(*args, **kwargs):
+        raise QueueFullError("queue full")
+
+    monkeypatch.setattr(routes, "upload_videos", RequestStorage(str(tmp_path / "in")))
+    monkeypatch.setattr(routes, "output_videos", RequestStorage(str(tmp_path / "out")))
+    monkeypatch.setattr(routes.detector, "resolve_model", lambda model=None: "m.pt")
+    monkeypatch.setattr(routes.video_jobs, "submit", submit)
+    response = await client.post(
+        "/yolo/video_jobs",
+        files={"file": ("a.mp4", b"x", "video/mp4")},
+        data={"render": render},
+    )
+
+    assert response.status_code == 503
+    # 被拒绝的任务不留下上传文件和空的输出目录
+    assert {p.name for p in tmp_path.rglob("*")} <= {"in", "out"}
+
+
+@pytest.mark.asyncio
+async def test_stream_worker_stops_when_client_leaves_before_first_frame(
+    monkeypatch, tmp_path
+):
+    stopped = threading.Event()
+
+    def detect_video(path, conf, cancel_event, frame_callback, **kwargs):
+        try:
+            while not cancel_event.is_set():
+                frame_callback(np.zeros((8, 8, 3), dtype=np.uint8))
+            raise DetectionCancelled(path)
+        finally:
+            stopped.set()
+
+    monkeypatch.setattr(routes, "upload_videos", RequestStorage(str(tmp_path)))
+    monkeypatch.setattr(routes.detector, "resolve_model", lambda model=None: "m.pt")
+    monkeypatch.setattr(routes.detector, "detect_video", detect_video)
+    # 不依赖超时：只有响应结束后的取消能让工作线程停下
+    monkeypatch.setattr(routes.detector.config, "video_stream_stall_timeout", None)
+    response = await routes.stream_video(
+        file=UploadFile(io.BytesIO(b"x"), filename="a.mp4"),
+        conf_threshold=0.25,
+        model=None,
+        quality=None,
+        stride=None,
+        max_stride=None,
+        motion_threshold=None,
+        current_user=types.SimpleNamespace(id=1),
+    )
+
+    async def receive():
+        return {"type": "http.disconnect"}  # 响应开始前客户端已断开
+
+    async def send(message):
+        await asyncio.Event().wait()  # 发送响应头时阻塞，直到被断开检测取消
+
+    await response({"type": "http"}, receive, send)
+
+    # 工作线程收到取消后停止，不会一直阻塞在满队列上占用视频线程池
+    assert await asyncio.to_thread(stopped.wait, 5)
@@ -0,0 +1,83 @@
+import shutil
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from src.yolo.video_writer import VideoEncodeOptions, VideoSink, output_size
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def write(sink, count, size=(160, 120)):
+    sink.start()
+    for i in range(count):
+        sink.put(np.full((size[1], size[0], 3), i * 10, dtype=np.uint8))
+    sink.close()
+
+
+def test_output_size_is_even():
+    assert output_size(1920, 1080, 0.5) == (960, 540)
+    assert output_size(641, 361, 1.0) == (640, 360)
+    assert output_size(10, 10, 0.01) == (2, 2)
+
+
+def test_opencv_sink_scales_and_decimates(tmp_path):
+    options = VideoEncodeOptions(backend="opencv", scale=0.5, fps_divisor=2)
+    sink = VideoSink(
+        str(tmp_path / "out"), options, 10, (160, 120), 4, threading.Event()
+    )
+    write(sink, 9)
+
+    assert sink.path == str(tmp_path / "out.mp4")
+    assert sink.frames_written == 5
+    assert sink.output_bytes > 0 and sink.encode_seconds > 0
+    frames = read_frames(sink.path)
+    assert len(frames) == 5
+    assert frames[0].shape == (60, 80, 3)
+
+
+def test_abort_removes_partial_output(tmp_path):
+    stop_event = threading.Event()
+    options = VideoEncodeOptions(backend="opencv")
+    sink = VideoSink(str(tmp_path / "out"), options, 10, (160, 120), 4, stop_event)
+    sink.start()
+    sink.put(np.zeros((120, 160, 3), dtype=np.uint8))
+    stop_event.set()
+    sink.abort()
+    assert not (tmp_path / "out.mp4").exists()
+
+
+def test_unknown_codec_is_rejected(tmp_path):
+    options = VideoEncodeOptions(backend="opencv", codec="divx")
+    with pytest.raises(ValueError):
+        VideoSink(str(tmp_path / "out"), options, 10, (160, 120), 4, threading.Event())
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_ffmpeg_quality_controls_output_size(tmp_path):
+    sizes = []
+    for quality in (90, 10):
+        options = VideoEncodeOptions(backend="ffmpeg", codec="h264", quality=quality)
+        sink = VideoSink(
+            str(tmp_path / f"q{quality}"), options, 10, (160, 120), 4, threading.Event()
+        )
+        rng = np.random.default_rng(0)
+        sink.start()
+        for _ in range(10):
+            sink.put(rng.integers(0, 255, (120, 160, 3), dtype=np.uint8))
+        sink.close()
+        assert len(read_frames(sink.path)) == 10
+        sizes.append(sink.output_bytes)
+    assert sizes[1] < sizes[0]